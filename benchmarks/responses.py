@@ -0,0 +1,85 @@
+"""Encode time and bytes sent for a 600-program HackerOne response.
+
+Compares FastAPI's default JSONResponse path with modules.responses, and
+the size of the body sent uncompressed, gzip and brotli encoded.
+
+    python benchmarks/responses.py [programs] [repeats]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from modules import responses
+
+ASSET_TYPES = ["WILDCARD", "URL", "API", "CIDR", "GOOGLE_PLAY_APP_ID", "APPLE_STORE_APP_ID", "OTHER"]
+
+
+def scope_item(rng, program, index):
+    asset_type = rng.choice(ASSET_TYPES)
+    host = f"{'*.' if asset_type == 'WILDCARD' else ''}app{index}.program{program}.example.com"
+    return {
+        "Asset": host,
+        "Type": asset_type,
+        "Last Updated": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00.000Z",
+        "State": "In-Scope",
+        "Eligible for Bounty": rng.choice(["Yes", "No"]),
+        "Max Severity": rng.choice(["critical", "high", "medium", "low"]),
+    }
+
+
+def hackerone_response(programs, seed=0):
+    # The shape of /hackerone/programs, see hackerone.programs_view.
+    rng = random.Random(seed)
+    data = []
+    for program in range(programs):
+        data.append({
+            "Program Name": f"Program {program}",
+            "Program Handle": f"program{program}",
+            "Program Type": rng.choice(["Public", "Private"]),
+            "Offer Rewards": rng.choice(["True", "False"]),
+            "Creation date": f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-01T00:00:00.000Z",
+            "Program In-Scope Items": [scope_item(rng, program, i) for i in range(rng.randint(1, 30))],
+            "Program Out-Scope Items": [scope_item(rng, program, i) for i in range(rng.randint(0, 5))],
+        })
+    return {"description": "Collecting all the programs from H1 of the user benchmark.", "program_data": data}
+
+
+def timed(func, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main(programs=600, repeats=20):
+    content = hackerone_response(programs)
+
+    default_ms, body = timed(lambda: JSONResponse(jsonable_encoder(content)).body, repeats)
+    fast_ms, fast_body = timed(lambda: responses.FastJSONResponse(jsonable_encoder(content)).body, repeats)
+    direct_ms, _ = timed(lambda: responses.FastJSONResponse(content).body, repeats)
+
+    print(f"{programs} programs, best of {repeats}")
+    print(f"  JSONResponse + jsonable_encoder      {default_ms:8.2f} ms")
+    print(f"  FastJSONResponse + jsonable_encoder  {fast_ms:8.2f} ms  (orjson {'on' if responses.orjson else 'off'})")
+    print(f"  FastJSONResponse alone               {direct_ms:8.2f} ms")
+
+    print(f"  identity                             {len(fast_body):8d} bytes")
+    gzip_ms, gzipped = timed(lambda: responses.compress(fast_body, "gzip"), repeats)
+    print(f"  gzip level {responses.GZIP_LEVEL}                         {len(gzipped):8d} bytes  {gzip_ms:6.2f} ms")
+    if responses.brotli is not None:
+        br_ms, compressed = timed(lambda: responses.compress(fast_body, "br"), repeats)
+        print(f"  brotli quality {responses.BROTLI_QUALITY}                     {len(compressed):8d} bytes  {br_ms:6.2f} ms")
+    else:
+        print("  brotli                               not installed")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -1,38 +1,165 @@
-from fastapi import FastAPI, Query, Request
+from fastapi import Body, Depends, FastAPI, HTTPException, Query, Request
 import uvicorn
-from modules.hackerone import (
-    hackerone,
-    hackerone_wildcards,
-    hackerone_private,
-    hackerone_last_three_months,
-)
-# from modules.bugcrowd import bugcrowd_programs
-from modules.intigriti import (
-    intigriti_programs,
-    get_bounty_programs_scope,
-    get_wildcard_programs_scope,
-)
-from modules.yeswehack import yeswehack_programs, yeswehack_wildcard_programs
+from modules.hackerone import hackerone_sync
 from typing import List, Dict
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from modules import bugcrowd, changes, client, filters, hackerone, hostindex, intigriti, jobs, models, paging, ratelimit, responses, search, store, yeswehack
+from modules.scheduler import scheduler
+import codecs
 import sys
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rebuild the host index from the programs persisted by earlier runs.
+    stored = await store.load_index()
+    if stored:
+        hostindex.index.load(*stored)
+    scheduler.start()
+    yield
+    await jobs.manager.stop()
+    await scheduler.stop()
+    # Release the pooled upstream connections on shutdown.
+    await client.close_session()
+
+
 app = FastAPI(
     title="PhoenixScope - API Framework",
     version="1.0",
     description="",
     summary="API to fetch the scope of bug bounty programs listed on various platforms such as HackerOne, BugCrowd, Intigriti, YesWeHack. ",
+    lifespan=lifespan,
+    default_response_class=responses.FastJSONResponse,
 )
+app.add_middleware(responses.CompressionMiddleware)
+
+
+@app.exception_handler(client.HTTPError)
+async def upstream_error(request: Request, e: client.HTTPError):
+    # A crawl the platform refused: pass on a refused credential, and report
+    # anything else as a bad gateway.
+    response = e.response
+    if response.throttled:
+        status_code = 503
+    elif response.status_code in client.AUTH_STATUSES:
+        status_code = response.status_code
+    else:
+        status_code = 502
+    return responses.FastJSONResponse({"detail": str(e)}, status_code=status_code)
+
+
+@app.exception_handler(client.RequestError)
+async def upstream_unreachable(request: Request, e: client.RequestError):
+    # A crawl whose platform could not be reached at all.
+    return responses.FastJSONResponse({"detail": str(e)}, status_code=502)
 app.mount("/static", StaticFiles(directory="templates"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+def page_params(
+    sort: str = Query(None),
+    cursor: str = Query(None),
+    limit: int = Query(None),
+    fields: str = Query(None),
+):
+    # Paging of program endpoints, see paging.paginate: ?sort=-Max Bounty,
+    # ?limit=50 then ?cursor=<Next Cursor>, ?fields=Program Name,Program Type.
+    return {"sort": sort, "cursor": cursor, "limit": limit, "fields": fields}
+
+
+def not_modified_response(request, tag):
+    # 304 for a client whose If-None-Match already names tag, otherwise None.
+    cached = responses.not_modified(request, tag)
+    if cached:
+        return Response(status_code=304, headers={"ETag": cached})
+    return None
+
+
+def page_response(request, page, description, key, items, version, serialize=None):
+    # version: the content hash of items. A client polling with the ETag of
+    # an unchanged result gets 304 before anything is paged or serialized.
+    tag = responses.etag(version, description, key, page)
+    cached = not_modified_response(request, tag)
+    if cached:
+        return cached
+
+    if serialize is not None:
+        items = [serialize(item) for item in items]
+    try:
+        items, next_cursor = paging.paginate(items, **page)
+    except paging.PagingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response = {"description": description, key: items}
+    if page["cursor"] is not None or page["limit"] is not None:
+        response["Next Cursor"] = next_cursor
+    return responses.FastJSONResponse(response, headers={"ETag": tag})
+
+
+def stream_response(request, stream, crawl, fields=None, limit=None):
+    # Program endpoints stream their crawl as Server-Sent Events to EventSource
+    # clients (progress, then one "program" event per program), and as one
+    # JSON document per line with ?stream=1 or "Accept: application/x-ndjson".
+    # Streamed programs are projected on fields but arrive in crawl order;
+    # limit caps how many are sent, and the "done" event still counts them
+    # all. Returns None for the regular JSON answer.
+    fields = paging.parse_fields(fields)
+    if limit is not None and not 1 <= limit <= paging.MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {paging.MAX_LIMIT}")
+    accept = request.headers.get("accept", "")
+    if "text/event-stream" in accept:
+        return sse_response(scheduler.events(*crawl), fields, limit)
+    if stream or "application/x-ndjson" in accept:
+        return ndjson_response(scheduler.stream(*crawl), fields, limit)
+    return None
+
+
+async def serve_crawl(request, stream, page, crawl, description, key):
+    # Answer of a program endpoint: its crawl streamed when the client asks
+    # for a stream, otherwise a page of the latest result under key.
+    response = stream_response(request, stream, crawl, page["fields"], page["limit"])
+    if response is not None:
+        return response
+    items, version = await scheduler.latest_tagged(*crawl)
+    return page_response(request, page, description, key, items, version)
+
+
+def ndjson_response(items, fields=None, limit=None):
+    async def lines():
+        sent = 0
+        async for item in items:
+            yield responses.dumps(paging.project(item, fields)) + b"\n"
+            sent += 1
+            if sent == limit:
+                break
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def sse_response(messages, fields=None, limit=None):
+    async def events():
+        sent = 0
+        async for kind, payload in messages:
+            event = "program" if kind == "item" else kind
+            if kind == "item":
+                # Past the limit, only progress and the end of the crawl are sent.
+                if sent == limit:
+                    continue
+                sent += 1
+                payload = paging.project(payload, fields)
+            yield b"event: " + event.encode() + b"\ndata: " + responses.dumps(payload) + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 # Hackerone Endpoints
 
 @app.get("/hackerone/programs", tags=["HackerOne"])
 async def get_h1_programs(
+    request: Request,
     private: bool = Query(False),
     bounty: bool = Query(False),
     wildcards: bool = Query(False),
@@ -40,43 +167,40 @@ async def get_h1_programs(
     single_domain: bool = Query(False),
     username: str = Query(None),
     token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = hackerone(
-        username, token, private, bounty, wildcards, mobile_app, single_domain
-    )
-
-    return {
-        "description": f"Collecting all the programs from H1 of the user {username}.",
-        "program_data": program_json,
-    }
+    crawl = ("hackerone", hackerone.iter_raw, hackerone.programs_view, (username, token), private, bounty, wildcards, mobile_app, single_domain)
+    return await serve_crawl(request, stream, page, crawl, f"Collecting all the programs from H1 of the user {username}.", "program_data")
 
 
 @app.get("/hackerone/wildcards", tags=["HackerOne"])
 async def get_h1_wildcard_programs(
-    username: str = Query(None), token: str = Query(None)
+    request: Request,
+    username: str = Query(None),
+    token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = hackerone_wildcards(username, token)
-
-    return {
-        "description": f"Collected the wildcard scope domains including public and private for the user {username}",
-        "wildcard_domains": program_json,
-    }
+    crawl = ("hackerone", hackerone.iter_raw, hackerone.wildcards_view, (username, token))
+    return await serve_crawl(request, stream, page, crawl, f"Collected the wildcard scope domains including public and private for the user {username}", "wildcard_domains")
 
 
 @app.get("/hackerone/privates", tags=["HackerOne"])
 async def get_h1_private_programs(
-    username: str = Query(None), token: str = Query(None)
+    request: Request,
+    username: str = Query(None),
+    token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = hackerone_private(username, token)
-
-    return {
-        "description": f"Collected the private program for the user {username}",
-        "Private Program Details": program_json,
-    }
+    crawl = ("hackerone", hackerone.iter_raw, hackerone.private_view, (username, token))
+    return await serve_crawl(request, stream, page, crawl, f"Collected the private program for the user {username}", "Private Program Details")
 
 
 @app.get("/hackerone/latests", tags=["HackerOne"])
 async def get_h1_past_three_months_program(
+    request: Request,
     private: bool = Query(False),
     bounty: bool = Query(False),
     wildcards: bool = Query(False),
@@ -84,31 +208,37 @@ async def get_h1_past_three_months_program(
     single_domain: bool = Query(False),
     username: str = Query(None),
     token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = hackerone_last_three_months(
-        username, token, private, bounty, wildcards, mobile_app, single_domain
-    )
+    crawl = ("hackerone", hackerone.iter_raw, hackerone.last_three_months_view, (username, token), private, bounty, wildcards, mobile_app, single_domain)
+    return await serve_crawl(request, stream, page, crawl, f"Collected all the past three months programs for the user {username}", "Past Three Months Programs Details")
+
+
+@app.get("/hackerone/sync", tags=["HackerOne"])
+async def get_h1_sync(username: str = Query(None), token: str = Query(None)):
+    program_json = await hackerone_sync(username, token)
 
     return {
-        "description": f"Collected all the past three months programs for the user {username}",
-        "Past Three Months Programs Details": program_json,
+        "description": f"Synced the HackerOne programs of the user {username}, re-fetching only the programs that changed since the last sync.",
+        "Sync Details": program_json,
     }
 
 
 # BugCrowd Endpoints
 
 
-# @app.get("/bugcrowd", tags=["Bug Crowd"])
-# async def get_bugcrowd_programs(
-#     vdp: bool = Query(False),
-#     hidden: bool = Query(False),
-#     bugcrowd_token: str = Query(None),
-# ):
-#     program_json = bugcrowd_programs(bugcrowd_token, vdp, hidden)
-#     return {
-#         "description": f"Collected all the bugcrowd programs",
-#         "Programs": program_json,
-#     }
+@app.get("/bugcrowd/programs", tags=["Bug Crowd"])
+async def get_bugcrowd_programs(
+    request: Request,
+    vdp: bool = Query(False),
+    hidden: bool = Query(False),
+    bugcrowd_token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
+):
+    crawl = ("bugcrowd", bugcrowd.iter_raw, bugcrowd.programs_view, (bugcrowd_token,), vdp, hidden)
+    return await serve_crawl(request, stream, page, crawl, "Collected all the bugcrowd programs", "Programs")
 
 
 # Intigriti Endpoints
@@ -116,45 +246,42 @@ async def get_h1_past_three_months_program(
 
 @app.get("/intigriti/programs", tags=["Intigriti"])
 async def get_intigriti_programs(
+    request: Request,
     vdp: bool = Query(False),
     hidden: bool = Query(False),
     wildcard: bool = Query(False),
     intigriti_token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = intigriti_programs(intigriti_token, vdp, hidden, wildcard)
-
-    return {
-        "description": f"Collected all the Intigriti Programs",
-        "Programs": program_json,
-    }
+    crawl = ("intigriti", intigriti.iter_raw, intigriti.all_programs_view, (intigriti_token,), vdp, hidden, "all", wildcard)
+    return await serve_crawl(request, stream, page, crawl, f"Collected all the Intigriti Programs", "Programs")
 
 
 @app.get("/intigriti/bounty", tags=["Intigriti"])
 async def get_intigriti_bounty_programs(
+    request: Request,
     vdp: bool = Query(False),
     hidden: bool = Query(False),
     intigriti_token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = get_bounty_programs_scope(intigriti_token, "all", vdp, hidden)
-
-    return {
-        "description": f"Collected all the Intigriti Bounty Programs",
-        "Programs": program_json,
-    }
+    crawl = ("intigriti", intigriti.iter_raw, intigriti.bounty_programs_view, (intigriti_token,), "all", vdp, hidden)
+    return await serve_crawl(request, stream, page, crawl, f"Collected all the Intigriti Bounty Programs", "Programs")
 
 
 @app.get("/intigriti/wildcards", tags=["Intigriti"])
 async def get_intigriti_wildcard_scope_programs(
+    request: Request,
     vdp: bool = Query(False),
     hidden: bool = Query(False),
     intigriti_token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
 ):
-    program_json = get_wildcard_programs_scope(intigriti_token, "Url", vdp, hidden)
-
-    return {
-        "description": f"Collected all the Intigriti Wildcard Scope Programs",
-        "Programs": program_json,
-    }
+    crawl = ("intigriti", intigriti.iter_raw, intigriti.wildcard_programs_view, (intigriti_token,), "Url", vdp, hidden)
+    return await serve_crawl(request, stream, page, crawl, f"Collected all the Intigriti Wildcard Scope Programs", "Programs")
 
 
 # YesWeHack Endpoints
@@ -162,25 +289,289 @@ async def get_intigriti_wildcard_scope_programs(
 
 @app.get("/yeswehack/programs", tags=["YesWeHack"])
 async def get_ywh_programs(
-    vdp: bool = Query(False), hidden: bool = Query(False), ywh_token: str = Query(None)
+    request: Request,
+    vdp: bool = Query(False),
+    hidden: bool = Query(False),
+    ywh_token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
+):
+    crawl = ("yeswehack", yeswehack.iter_raw, yeswehack.all_programs_view, (ywh_token,), vdp, hidden, "all")
+    return await serve_crawl(request, stream, page, crawl, f"Collected all the YesWeHack Programs", "program_data")
+
+
+@app.get("/yeswehack/wildcards", tags=["YesWeHack"])
+async def get_ywh_wildcard_programs(
+    request: Request,
+    vdp: bool = Query(False),
+    hidden: bool = Query(False),
+    ywh_token: str = Query(None),
+    stream: bool = Query(False),
+    page: dict = Depends(page_params),
+):
+    crawl = ("yeswehack", yeswehack.iter_raw, yeswehack.wildcard_programs_view, (ywh_token,), vdp, hidden, "url")
+    return await serve_crawl(request, stream, page, crawl, f"Collected all the YesWeHack Wildcard Scope Programs", "Programs")
+
+
+# Lookup Endpoints
+
+
+def lookup_credentials(username, token, intigriti_token, ywh_token, bugcrowd_token):
+    # Private programs are only matched for the credentials that fetched them.
+    credentials = set()
+    if username or token:
+        credentials.add(ratelimit.token_key(username, token))
+    if intigriti_token:
+        credentials.add(ratelimit.token_key(intigriti_token))
+    if ywh_token:
+        credentials.add(ratelimit.token_key(ywh_token))
+    if bugcrowd_token:
+        credentials.add(ratelimit.token_key(bugcrowd_token))
+    return credentials
+
+
+@app.get("/lookup", tags=["Lookup"])
+async def lookup_host(
+    request: Request,
+    host: str = Query(...),
+    username: str = Query(None),
+    token: str = Query(None),
+    intigriti_token: str = Query(None),
+    ywh_token: str = Query(None),
+    bugcrowd_token: str = Query(None),
+):
+    credentials = lookup_credentials(username, token, intigriti_token, ywh_token, bugcrowd_token)
+    description = f"Programs whose scope covers {host}"
+    matches = hostindex.index.lookup(host, credentials)
+
+    tag = responses.etag(changes.result_hash(matches), description)
+    cached = not_modified_response(request, tag)
+    if cached:
+        return cached
+    return responses.FastJSONResponse({"description": description, "Matches": matches}, headers={"ETag": tag})
+
+
+@app.post("/lookup", tags=["Lookup"])
+async def lookup_hosts(
+    hosts: List[str] = Body(..., embed=True),
+    username: str = Query(None),
+    token: str = Query(None),
+    intigriti_token: str = Query(None),
+    ywh_token: str = Query(None),
+    bugcrowd_token: str = Query(None),
 ):
-    program_json = yeswehack_programs(ywh_token, vdp, hidden, "all")
+    credentials = lookup_credentials(username, token, intigriti_token, ywh_token, bugcrowd_token)
 
     return {
-        "description": f"Collected all the YesWeHack Programs",
-        "program_data": program_json,
+        "description": f"Programs whose scope covers each of the {len(hosts)} hosts",
+        "Matches": {host: hostindex.index.lookup(host, credentials) for host in hosts},
     }
 
 
-@app.get("/yeswehack/wildcards", tags=["YesWeHack"])
-async def get_ywh_wildcard_programs(
-    vdp: bool = Query(False), hidden: bool = Query(False), ywh_token: str = Query(None)
+class DuplexStreamingResponse(StreamingResponse):
+    # The body generator reads the request stream itself, which also reports
+    # client disconnects; listening for them concurrently would swallow the
+    # request body.
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@app.post("/lookup/classify", tags=["Lookup"])
+async def classify_hosts(
+    request: Request,
+    username: str = Query(None),
+    token: str = Query(None),
+    intigriti_token: str = Query(None),
+    ywh_token: str = Query(None),
+    bugcrowd_token: str = Query(None),
+):
+    # Reads newline-delimited hosts from the request body and streams back one
+    # JSON classification per line as the hosts arrive.
+    credentials = lookup_credentials(username, token, intigriti_token, ywh_token, bugcrowd_token)
+
+    def classify(lines):
+        return b"".join(
+            responses.dumps(hostindex.index.classify(host, credentials)) + b"\n"
+            for host in (line.strip() for line in lines)
+            if host
+        )
+
+    async def classifications():
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        async for chunk in request.stream():
+            pending += decoder.decode(chunk)
+            lines = pending.split("\n")
+            pending = lines.pop()
+            output = classify(lines)
+            if output:
+                yield output
+        if pending.strip():
+            yield classify([pending])
+
+    return DuplexStreamingResponse(classifications(), media_type="application/x-ndjson")
+
+
+# Search Endpoints
+
+
+def search_timestamp(name, value):
+    try:
+        date = filters.parse_date(value)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail=f"Invalid {name} date: {value}")
+    return date.timestamp() if date else None
+
+
+@app.get("/programs/search", tags=["Search"])
+async def search_programs(
+    request: Request,
+    platform: List[str] = Query(None),
+    bounty: bool = Query(None),
+    private: bool = Query(None),
+    asset_type: List[str] = Query(None),
+    created_since: str = Query(None),
+    updated_since: str = Query(None),
+    min_bounty: float = Query(None),
+    max_bounty: float = Query(None),
+    username: str = Query(None),
+    token: str = Query(None),
+    intigriti_token: str = Query(None),
+    ywh_token: str = Query(None),
+    bugcrowd_token: str = Query(None),
+    page: dict = Depends(page_params),
+):
+    # Answers from the programs already crawled on any platform, without
+    # crawling; repeated platform and asset_type parameters match any value.
+    unknown = [p for p in platform or [] if p not in {m.value for m in models.Platform}]
+    unknown += [k for k in asset_type or [] if k not in {m.value for m in models.AssetKind}]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown platform or asset type: {', '.join(unknown)}")
+
+    credentials = lookup_credentials(username, token, intigriti_token, ywh_token, bugcrowd_token)
+    programs = search.index.search(
+        credentials,
+        platforms=platform,
+        bounty=bounty,
+        private=private,
+        kinds=asset_type,
+        created_since=search_timestamp("created_since", created_since),
+        updated_since=search_timestamp("updated_since", updated_since),
+        min_bounty=min_bounty,
+        max_bounty=max_bounty,
+    )
+
+    version = search.index.result_hash(programs)
+    return page_response(request, page, f"Found {len(programs)} programs matching the search", "Programs", programs, version, models.program_to_dict)
+
+
+# Change Endpoints
+
+
+@app.get("/changes", tags=["Changes"])
+async def get_scope_changes(
+    request: Request,
+    platform: List[str] = Query(None),
+    since: str = Query(None),
+    username: str = Query(None),
+    token: str = Query(None),
+    intigriti_token: str = Query(None),
+    ywh_token: str = Query(None),
+    bugcrowd_token: str = Query(None),
+    page: dict = Depends(page_params),
+):
+    # Scope changes found whenever a crawl fetched a program's scope afresh,
+    # oldest first. Private programs only show up for the credentials that
+    # fetched them.
+    credentials = lookup_credentials(username, token, intigriti_token, ywh_token, bugcrowd_token)
+    since = search_timestamp("since", since)
+
+    def visible(change):
+        program = hostindex.index.programs.get((change["Platform"], change["Program Handle"]))
+        return program is not None and hostindex.index.visible(program, credentials)
+
+    found = [
+        change for change in changes.detector.recent
+        if (not platform or change["Platform"] in platform)
+        and (since is None or change["Detected At"] >= since)
+        and visible(change)
+    ]
+    return page_response(request, page, f"Found {len(found)} scope changes", "Changes", found, changes.result_hash(found))
+
+
+# Crawl Job Endpoints
+
+
+def job_call(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except jobs.JobError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+async def job_await(func, *args, **kwargs):
+    # job_call for coroutine functions, whose errors surface at the await.
+    try:
+        return await func(*args, **kwargs)
+    except jobs.JobError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.post("/jobs", tags=["Jobs"], status_code=202)
+async def submit_job(
+    platform: str = Body(...),
+    filters: Dict = Body({}),
+    credentials: Dict[str, str] = Body({}),
 ):
-    program_json = yeswehack_wildcard_programs(ywh_token, vdp, hidden, "url")
+    # Starts a crawl in the background, e.g. {"platform": "hackerone",
+    # "filters": {"bounty": true}, "credentials": {"username": ..., "token": ...}}.
+    job = job_call(jobs.manager.submit, platform, filters, credentials)
+
+    return {
+        "description": f"Queued a {platform} crawl",
+        "Job": job.status(),
+    }
+
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_job(request: Request, job_id: str):
+    # Status of a crawl job; EventSource clients get every status change
+    # until the job finishes.
+    if "text/event-stream" in request.headers.get("accept", ""):
+        job_call(jobs.manager.get, job_id)
+        return sse_response(("status", status) async for status in jobs.manager.follow(job_id))
+
+    return {
+        "description": f"Status of crawl job {job_id}",
+        "Job": job_call(jobs.manager.get, job_id).status(),
+    }
+
+
+@app.get("/jobs/{job_id}/results", tags=["Jobs"])
+async def get_job_results(
+    request: Request,
+    job_id: str,
+    offset: int = Query(0),
+    limit: int = Query(jobs.PAGE_SIZE),
+):
+    page = job_call(jobs.manager.results, job_id, offset, limit)
+
+    # Results are only ever appended, so the state, the total and the page
+    # bounds name the page's content.
+    tag = responses.etag(job_id, page["State"], page["Total"], page["Offset"], len(page["Results"]))
+    cached = not_modified_response(request, tag)
+    if cached:
+        return cached
+    return responses.FastJSONResponse({"description": f"Programs collected by crawl job {job_id}", **page}, headers={"ETag": tag})
+
+
+@app.delete("/jobs/{job_id}", tags=["Jobs"])
+async def cancel_job(job_id: str):
+    job = await job_await(jobs.manager.cancel, job_id)
 
     return {
-        "description": f"Collected all the YesWeHack Wildcard Scope Programs",
-        "Programs": program_json,
+        "description": f"Cancelled crawl job {job_id}",
+        "Job": job.status(),
     }
 
 
@@ -1,59 +1,139 @@
-import requests
-import concurrent.futures
-import json
-
-
-def get_total_pages(base_url):
-    response = requests.get(base_url)
-    if response.status_code == 200:
-        data = response.json()
-        return data['meta']['totalPages']
-    else:
-        print("Failed to fetch initial data")
-        return 0
-
-def fetch_program_urls_for_page(base_url, page):
-    response = requests.get(f"{base_url}?page[]={page}")
-    if response.status_code == 200:
-        data = response.json()
-        return [program.get("program_url", "") for program in data.get("programs", []) if program.get("program_url", "")]
-    else:
-        print(f"Failed to fetch data for page {page}")
-        return []
-
-def fetch_program_target_url(program_url):
-    full_url = f"https://bugcrowd.com{program_url}/target_groups"
-    response = requests.get(full_url)
-    if response.status_code == 200:
-        data = response.json()
-        target_urls = [f"https://bugcrowd.com{group['targets_url']}" for group in data.get("groups", []) if group.get("targets_url", "")]
-        return target_urls
-    else:
-        return []
-
-def fetch_all_programs_and_targets_concurrently(base_url, total_pages):
-    program_targets_dict = {}
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # First, fetch all program URLs
-        page_futures = [executor.submit(fetch_program_urls_for_page, base_url, page) for page in range(1, total_pages + 1)]
-        program_urls = []
-        for future in concurrent.futures.as_completed(page_futures):
-            program_urls.extend(future.result())
-
-        # Next, fetch target URLs for each program
-        target_futures = {executor.submit(fetch_program_target_url, url): url for url in program_urls}
-        for future in concurrent.futures.as_completed(target_futures):
-            program_url = f"https://bugcrowd.com{target_futures[future]}"
-            target_urls = future.result()
-            program_targets_dict[program_url] = target_urls
-
-    return program_targets_dict
-
-base_url = "https://bugcrowd.com/programs.json"
-total_pages = get_total_pages(base_url)
-
-if total_pages > 0:
-    program_targets_dict = fetch_all_programs_and_targets_concurrently(base_url, total_pages)
-    print(json.dumps(program_targets_dict, indent=2))
-else:
-    print("Could not retrieve total pages.")
+import asyncio
+import logging
+from modules import cache, client, hostindex, progress, ratelimit, store
+
+BUGCROWD_BASE_URL = "https://bugcrowd.com"
+BUGCROWD_PROGRAMS_ENDPOINT = "https://bugcrowd.com/programs.json"
+SCOPE_WORKERS = 10
+
+def program_handle(program):
+    # "/tesla" or "/engagements/tesla" -> "tesla"
+    return program["program_url"].rstrip("/").rsplit("/", 1)[-1]
+
+def is_public(program):
+    return program.get("participation", "public") == "public"
+
+def normalize_program(program):
+    return {
+        "handle": program_handle(program),
+        "name": program.get("name"),
+        "private": not is_public(program),
+        "bounty": bool(program.get("max_rewards")),
+        "max_bounty": program.get("max_rewards"),
+        "raw": program,
+    }
+
+def normalize_scope(target):
+    return {
+        "asset": target["name"],
+        "type": target.get("category"),
+        "in_scope": target["in_scope"],
+        "raw": target,
+    }
+
+def record_key(raw):
+    # See hackerone.record_key.
+    return {"handle": program_handle(raw["program"]), "scoped": raw["targets"] is not None}
+
+def stored_record(key, program, targets):
+    return {"program": program["raw"], "targets": targets}
+
+def auth_headers(token):
+    # Bugcrowd has no researcher API; the session cookie of a logged-in
+    # researcher adds their private invitations to the listing.
+    return {"Cookie": f"_crowdcontrol_session={token}"} if token else {}
+
+async def fetch_programs_page(token, page):
+    params = {"page[]": page, "hidden[]": "false"}
+    response = await client.get(BUGCROWD_PROGRAMS_ENDPOINT, headers=auth_headers(token), params=params, cache_ttl=cache.LISTING_TTL)
+    response.raise_for_status()
+
+    data = response.json()
+    if not response.from_cache:
+        programs = [normalize_program(program) for program in data.get("programs", []) if program.get("program_url")]
+        await store.save_programs("bugcrowd", ratelimit.token_key(token), programs)
+        hostindex.index.add_programs("bugcrowd", ratelimit.token_key(token), programs)
+    progress.emit("page", platform="bugcrowd", page=page)
+    return data
+
+async def fetch_group_targets(token, group):
+    response = await client.get(f"{BUGCROWD_BASE_URL}{group['targets_url']}", headers=auth_headers(token), cache_ttl=cache.SCOPE_TTL)
+    response.raise_for_status()
+    return [
+        {**target, "in_scope": bool(group.get("in_scope", True)), "group": group.get("name")}
+        for target in response.json().get("targets", [])
+        if target.get("name")
+    ]
+
+async def fetch_program_targets(token, program_url, public=False):
+    handle = program_url.rstrip("/").rsplit("/", 1)[-1]
+    return await store.snapshot_scopes(
+        "bugcrowd", handle, ratelimit.token_key(token), public,
+        lambda: _fetch_targets(token, program_url, handle),
+    )
+
+async def _fetch_targets(token, program_url, handle):
+    response = await client.get(f"{BUGCROWD_BASE_URL}{program_url}/target_groups", headers=auth_headers(token), cache_ttl=cache.SCOPE_TTL)
+    response.raise_for_status()
+
+    # Every target group lists its targets at a URL of its own.
+    groups = [group for group in response.json().get("groups", []) if group.get("targets_url")]
+    targets = [target for group_targets in await asyncio.gather(*[fetch_group_targets(token, group) for group in groups]) for target in group_targets]
+
+    if response.from_cache:
+        return targets, None
+    return targets, (handle, {}, [normalize_scope(target) for target in targets])
+
+def shape_scope(program, targets):
+    pdata = {
+        "Program Name": program.get("name"),
+        "Program Handle": program_handle(program),
+        "Program Type": "Public" if is_public(program) else "Private",
+        "Max Bounty": program.get("max_rewards"),
+        "InScope": [],
+        "OutOfScope": [],
+    }
+    for target in targets:
+        scope_entry = {
+            "Target": target["name"],
+            "Category": target.get("category"),
+        }
+        pdata["InScope" if target["in_scope"] else "OutOfScope"].append(scope_entry)
+    return pdata
+
+async def iter_raw(token, workers=SCOPE_WORKERS):
+    # The raw crawl every Bugcrowd view is taken from: each listed program with
+    # its targets, None when they could not be fetched.
+    first = await fetch_programs_page(token, 1)
+    total_pages = first.get("meta", {}).get("totalPages", 1)
+    # The page count is known after the first page, so the rest are fetched
+    # together.
+    pages = [first] + list(await asyncio.gather(*[fetch_programs_page(token, page) for page in range(2, total_pages + 1)]))
+
+    programs = [program for page in pages for program in page.get("programs", []) if program.get("program_url")]
+
+    async def collect_program(program):
+        try:
+            targets = await fetch_program_targets(token, program["program_url"], is_public(program))
+        except client.RequestError as e:
+            logging.error(f"HTTP request failed: {e}")
+            targets = None
+        finally:
+            progress.emit("program", platform="bugcrowd", program=program_handle(program))
+        return {"program": program, "targets": targets}
+
+    async for raw in client.stream_limited(collect_program, programs, workers):
+        yield raw
+
+def programs_view(raw, vdp, hidden):
+    program = raw["program"]
+    # Like the other platforms' vdp filter, keep bounty programs only.
+    if vdp and not program.get("max_rewards"):
+        return None
+    if hidden and is_public(program):
+        return None
+    if raw["targets"] is None:
+        return None
+    pdata = shape_scope(program, raw["targets"])
+    if pdata["InScope"] or pdata["OutOfScope"]:
+        return pdata
@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+
+# How long raw upstream payloads stay fresh. Program listings change more
+# often than the scope of a single program.
+LISTING_TTL = 300
+SCOPE_TTL = 900
+MAX_ENTRIES = 20000
+# Upstream bodies vary from a few hundred bytes to megabytes per listing page,
+# so the response cache is bounded by their total size as well.
+MAX_RESPONSE_BYTES = 128 * 1024 * 1024
+
+
+class TTLCache:
+    def __init__(self, maxsize, ttl, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Optional bound on the summed sizeof(value) of the entries.
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value, size = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.size -= size
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        size = self.sizeof(value) if self.sizeof else 0
+        self.pop(key)
+        # A value larger than the whole cache would only evict everything else.
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value, size)
+        self.size += size
+
+        # Evict the least recently used entries once over capacity.
+        while len(self._data) > self.maxsize or (self.maxbytes is not None and self.size > self.maxbytes):
+            _, (_, _, evicted) = self._data.popitem(last=False)
+            self.size -= evicted
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.size -= entry[2]
+        return entry[1]
+
+    def clear(self):
+        self._data.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Successful upstream GET responses, keyed by platform host, credential hash
+# and request URL. Shared by every platform module through client.get.
+responses = TTLCache(MAX_ENTRIES, SCOPE_TTL, MAX_RESPONSE_BYTES, lambda response: len(response.text))
+
+# Scopes of public programs, keyed by platform and program. They are the same
+# whoever fetches them, so unlike responses this tier is shared by every
+# credential: only the first crawl of a public program goes upstream.
+public_scopes = TTLCache(MAX_ENTRIES, SCOPE_TTL)
@@ -0,0 +1,131 @@
+import collections
+import hashlib
+import json
+import time
+
+from modules import store
+
+# Scope change detection. Every scope item gets a content hash, and a
+# program's scope set is summarised by one order-independent hash of its item
+# hashes, so unchanged programs are skipped with a single comparison and the
+# rest are diffed in linear time. Every platform fetcher runs the detector on
+# the normalized scope records it persists, so any crawl that fetches a scope
+# afresh records what changed in it.
+
+HASH_BITS = 128
+# Changed programs kept for the change feed.
+MAX_RECENT = 5000
+# Stored snapshots are only compared against snapshots of the same version,
+# i.e. whose items were hashed in the same shape.
+SNAPSHOT_VERSION = 1
+
+
+def item_hash(item):
+    canonical = json.dumps(item, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=HASH_BITS // 8).hexdigest()
+
+
+def result_hash(items):
+    # Order-dependent hash of a list of items, e.g. a crawl result: equal
+    # content gives equal hashes whichever crawl produced it.
+    digest = hashlib.blake2b(digest_size=HASH_BITS // 8)
+    for item in items:
+        digest.update(item_hash(item).encode())
+    return digest.hexdigest()
+
+
+class ScopeSnapshot:
+    def __init__(self, items):
+        # items: normalized scope records. identity -> item hash; repeated
+        # assets get an occurrence counter.
+        self.items = {}
+        seen = {}
+        for item in items:
+            asset, asset_type = item["asset"], item["type"]
+            occurrence = seen.get((asset, asset_type), 0)
+            seen[(asset, asset_type)] = occurrence + 1
+            self.items[(asset, asset_type, occurrence)] = item_hash(item)
+
+        # Summing the item hashes keeps the set hash independent of order.
+        total = sum(int(digest, 16) for digest in self.items.values()) % (1 << HASH_BITS)
+        self.hash = format(total, "032x")
+
+    def to_document(self):
+        return {
+            "version": SNAPSHOT_VERSION,
+            "hash": self.hash,
+            "items": [[asset, asset_type, occurrence, digest] for (asset, asset_type, occurrence), digest in self.items.items()],
+        }
+
+    @classmethod
+    def from_document(cls, document):
+        snapshot = cls([])
+        snapshot.items = {(asset, asset_type, occurrence): digest for asset, asset_type, occurrence, digest in document["items"]}
+        snapshot.hash = document["hash"]
+        return snapshot
+
+
+def diff(old, new):
+    changes = {"Added": [], "Removed": [], "Modified": []}
+    if old is not None and old.hash == new.hash:
+        return changes
+
+    old_items = old.items if old is not None else {}
+    for identity, digest in new.items.items():
+        previous = old_items.get(identity)
+        if previous is None:
+            changes["Added"].append(_describe(identity))
+        elif previous != digest:
+            changes["Modified"].append(_describe(identity))
+    for identity in old_items:
+        if identity not in new.items:
+            changes["Removed"].append(_describe(identity))
+    return changes
+
+
+def _describe(identity):
+    asset, asset_type, _ = identity
+    return {"Asset": asset, "Type": asset_type}
+
+
+class ChangeDetector:
+    def __init__(self):
+        self.snapshots = {}
+        # Differences found by the last detection of each program, while not
+        # empty, and the feed of programs that changed since their previous
+        # snapshot, oldest first.
+        self.latest = {}
+        self.recent = collections.deque(maxlen=MAX_RECENT)
+
+    async def detect(self, platform, handle, scopes):
+        # Compare a freshly fetched scope against the last snapshot of the
+        # program, remember the new one and return the differences. The first
+        # snapshot of a program reports every item as added.
+        new = ScopeSnapshot(scopes)
+        key = (platform, handle)
+
+        old = self.snapshots.get(key)
+        outdated = False
+        if old is None:
+            document = await store.load_snapshot(platform, handle)
+            if document and document.get("version") == SNAPSHOT_VERSION:
+                old = ScopeSnapshot.from_document(document)
+            elif document:
+                # Its item hashes are of another shape and would all differ, so
+                # the new snapshot replaces it without reporting changes.
+                old, outdated = new, True
+
+        changes = diff(old, new)
+        self.snapshots[key] = new
+        if any(changes.values()):
+            self.latest[key] = changes
+            if old is not None:
+                self.recent.append({"Platform": platform, "Program Handle": handle, "Detected At": time.time(), **changes})
+        else:
+            self.latest.pop(key, None)
+        if old is None or old.hash != new.hash or outdated:
+            await store.save_snapshot(platform, handle, new.to_document())
+        return changes
+
+
+detector = ChangeDetector()
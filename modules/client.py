@@ -0,0 +1,200 @@
+import asyncio
+import collections
+import copy
+import json
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from modules import cache, progress, ratelimit, singleflight
+
+# Shared async HTTP client used by every platform module. One aiohttp session
+# is kept per event loop so TCP/TLS connections are pooled and kept alive
+# across requests instead of being re-opened for every call.
+POOL_SIZE = 100
+POOL_SIZE_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 60
+
+_session = None
+_session_loop = None
+
+# Upstream requests in flight, keyed like the response cache. Identical
+# requests made meanwhile, e.g. the same listing page or program scope fetched
+# by overlapping crawls with one token, wait for the first one.
+_in_flight = singleflight.Group()
+
+# Statuses telling that the credential itself was refused.
+AUTH_STATUSES = (401, 403)
+
+
+class RequestError(Exception):
+    pass
+
+
+class HTTPError(RequestError):
+    def __init__(self, response):
+        super().__init__(f"{response.status_code} Error for url: {response.url}")
+        self.response = response
+
+
+class Response:
+    def __init__(self, url, status_code, headers, text):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.from_cache = False
+        # Still throttled after the last retry.
+        self.throttled = False
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(self)
+
+    def raise_for_refusal(self):
+        # Errors no other page or program of the crawl would get past: a
+        # refused credential, or throttling that outlasted every retry.
+        if self.status_code in AUTH_STATUSES or self.throttled:
+            raise HTTPError(self)
+
+
+async def get_session():
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_SIZE,
+            limit_per_host=POOL_SIZE_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_session():
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def get(url, headers=None, auth=None, params=None, cache_ttl=None, refresh=False):
+    session = await get_session()
+
+    # Accept requests-style (username, token) tuples for basic auth.
+    if isinstance(auth, tuple):
+        auth = aiohttp.BasicAuth(auth[0] or "", auth[1] or "")
+
+    # Every call is throttled by the token bucket of the platform host and the
+    # credential it is made with.
+    host = urlsplit(url).hostname
+    if auth is not None:
+        credential = ratelimit.token_key(auth.login, auth.password)
+    else:
+        headers = headers or {}
+        credential = ratelimit.token_key(headers.get("Authorization") or headers.get("Cookie"))
+    bucket = ratelimit.get_bucket(host, credential)
+
+    # Callers opt in to serving repeated reads from the response cache; with
+    # refresh the upstream is always hit and the cached copy replaced.
+    cache_key = (host, credential, url, tuple(sorted((params or {}).items())))
+    if cache_ttl and not refresh:
+        cached = cache.responses.get(cache_key)
+        if cached is not None:
+            # A copy, so flagging it does not touch the response other callers share.
+            hit = copy.copy(cached)
+            hit.from_cache = True
+            return hit
+
+    return await _in_flight.do(cache_key, _fetch, session, url, headers, auth, params, host, bucket, cache_key, cache_ttl)
+
+
+async def _fetch(session, url, headers, auth, params, host, bucket, cache_key, cache_ttl):
+    for attempt in range(ratelimit.MAX_RETRIES + 1):
+        waited = await bucket.acquire()
+        if waited >= ratelimit.REPORT_WAIT:
+            progress.emit("rate_limit", host=host, delay=round(waited, 1))
+        try:
+            async with session.get(url, headers=headers, auth=auth, params=params) as resp:
+                text = await resp.text()
+                response = Response(str(resp.url), resp.status, resp.headers, text)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RequestError(f"Request to {url} failed: {e!r}") from e
+
+        delay = ratelimit.throttle_delay(host, response, attempt)
+        if delay is None:
+            bucket.success()
+            if cache_ttl and response.status_code == 200:
+                cache.responses.set(cache_key, response, cache_ttl)
+            return response
+        if attempt == ratelimit.MAX_RETRIES:
+            response.throttled = True
+            break
+
+        logging.info(f"Rate limited by {host}, retrying in {delay:.1f}s")
+        progress.emit("rate_limit", host=host, delay=round(delay, 1))
+        bucket.backoff(delay)
+
+    return response
+
+
+async def gather_limited(func, items, limit):
+    # Run func over items with at most `limit` calls in flight, returning the
+    # results in the same order as items.
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*[run(item) for item in items])
+
+
+async def stream_limited(func, items, limit):
+    # Like gather_limited, but yields each result as soon as it and every
+    # result before it are ready. Calls still pending when the consumer stops
+    # are cancelled.
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def pipeline(func, items, limit):
+    # Like stream_limited, but items is an async iterable, e.g. a listing whose
+    # pages are still coming in. Calls start as items arrive, with at most
+    # `limit` of them queued ahead of the consumer, so the listing and the
+    # per-item work overlap. Results are yielded in the order of items.
+    window = collections.deque()
+    try:
+        async for item in items:
+            window.append(asyncio.ensure_future(func(item)))
+            while window and (window[0].done() or len(window) >= limit):
+                yield await window.popleft()
+        while window:
+            yield await window.popleft()
+    finally:
+        for task in window:
+            task.cancel()
@@ -0,0 +1,127 @@
+import dateutil.parser
+import pytz
+
+# Query flags are compiled once per request into a ProgramFilter. Its
+# program checks only look at the listing record, so they run before the scope
+# is looked at. Its scope checks run once the program's scope is shaped.
+#
+# Every endpoint of a platform is a view over the same raw crawl (each listed
+# program with its scope), so the platform is crawled once per credential
+# whatever filters are asked for. A view takes one raw record and the filter
+# values and returns the endpoint's item, or None to leave the program out.
+
+
+async def viewed(records, view, *filters):
+    # The items of view(record, *filters) over an async iterable of raw
+    # records, i.e. one filtered crawl.
+    async for record in records:
+        item = view(record, *filters)
+        if item is not None:
+            yield item
+
+
+class ProgramFilter:
+    def __init__(self, program_checks, scope_checks, include_out_of_scope=True):
+        self.program_checks = program_checks
+        self.scope_checks = scope_checks
+        self.include_out_of_scope = include_out_of_scope
+
+    def matches_program(self, program):
+        return all(check(program) for check in self.program_checks)
+
+    def matches_scope(self, program, in_scope, out_scope):
+        return all(check(program, in_scope, out_scope) for check in self.scope_checks)
+
+
+def parse_date(value):
+    if not value:
+        return None
+    date = dateutil.parser.parse(value)
+    if not date.tzinfo:
+        date = date.replace(tzinfo=pytz.utc)
+    return date
+
+
+# Program checks, run against the HackerOne listing record.
+
+def is_public(program):
+    return program["attributes"]["state"] == "public_mode"
+
+
+def is_private(program):
+    return not is_public(program)
+
+
+def is_soft_launched(program):
+    return program["attributes"]["state"] == "soft_launched"
+
+
+def offers_bounties(program):
+    return bool(program["attributes"]["offers_bounties"])
+
+
+def created_since(cutoff):
+    def check(program):
+        creation_date = parse_date(program["attributes"]["started_accepting_at"])
+        return creation_date is not None and creation_date >= cutoff
+    return check
+
+
+# Scope checks, run against the (in_scope, out_of_scope) lists returned by
+# hackerone.shape_scope.
+
+def has_scope(program, in_scope, out_scope):
+    return bool(in_scope or out_scope)
+
+
+def has_in_scope(program, in_scope, out_scope):
+    return bool(in_scope)
+
+
+def any_updated_since(items, cutoff):
+    for item in items:
+        updated_date = parse_date(item.get("Last Updated"))
+        if updated_date and updated_date >= cutoff:
+            return True
+    return False
+
+
+def created_or_updated_since(cutoff):
+    program_created = created_since(cutoff)
+
+    def check(program, in_scope, out_scope):
+        return program_created(program) or any_updated_since(in_scope, cutoff) or any_updated_since(out_scope, cutoff)
+    return check
+
+
+def compile_h1_filter(private, reward, wildcard, mobile_app, url):
+    program_checks = [is_soft_launched if private else is_public]
+    if reward:
+        program_checks.append(offers_bounties)
+
+    # Private VDP programs filtered on wildcards alone only list their
+    # in-scope wildcards.
+    wildcard_only_vdp = private and wildcard and not url and not mobile_app and not reward
+    if wildcard_only_vdp:
+        return ProgramFilter(program_checks, [has_in_scope], include_out_of_scope=False)
+
+    return ProgramFilter(program_checks, [has_scope])
+
+
+def compile_h1_recent_filter(private, reward, wildcard, mobile_app, url, cutoff):
+    # Without the private flag, /hackerone/latests has always listed every
+    # non-public program, and public programs only when a scope filter is set.
+    if private or not (wildcard or url or mobile_app):
+        program_checks = [is_private]
+    else:
+        program_checks = []
+    if reward:
+        program_checks.append(offers_bounties)
+
+    # Private VDP programs without scope filters only count as recent when the
+    # program itself was launched after the cutoff.
+    if private and not reward and not wildcard and not url and not mobile_app:
+        program_checks.append(created_since(cutoff))
+        return ProgramFilter(program_checks, [has_scope])
+
+    return ProgramFilter(program_checks, [has_scope, created_or_updated_since(cutoff)])
@@ -1,102 +1,215 @@
-import requests
 import json
-import sys
+import logging
 from datetime import datetime, timedelta
-import dateutil.parser
 import pytz
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-
-def hackerone(username, api_token, private, bounty, wildcards, mobile_app, single_domain):
-    program_json_output = get_h1_programs(username, api_token, private, bounty, wildcards, mobile_app, single_domain)
-    return program_json_output
-
-def fetch_programs_page(page_number, auth):
-    response = requests.get(f"https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={page_number}", auth=auth)
-    if response.status_code not in [200, 404]:
-        print(f"Request returned {response.status_code}!")
-        sys.exit()
+import asyncio
+from modules import cache, changes, client, filters, hostindex, progress, ratelimit, store, sync
+
+# Number of structured_scopes requests allowed in flight at once per crawl.
+SCOPE_WORKERS = 20
+# structured_scopes page size, the API maximum.
+SCOPE_PAGE_SIZE = 100
+# Listing pages requested at once.
+LISTING_BATCH = 10
+# /hackerone/programs shows the first PROGRAMS_LIMIT listed programs, the
+# other endpoints the last LATEST_LIMIT.
+PROGRAMS_LIMIT = 600
+LATEST_LIMIT = 200
+
+
+def iter_hackerone(username, api_token, private, bounty, wildcards, mobile_app, single_domain, workers=SCOPE_WORKERS):
+    return iter_h1_programs(username, api_token, private, bounty, wildcards, mobile_app, single_domain, workers)
+
+async def fetch_programs_page(page_number, auth, refresh=False):
+    response = await client.get(f"https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={page_number}", auth=auth, cache_ttl=cache.LISTING_TTL, refresh=refresh)
+    # A failed page must fail the crawl, not look like the end of the listing.
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
 
     data = response.json()
 
-    if response.status_code == 404 or len(data["data"]) == 0:
+    if len(data["data"]) == 0:
         return []
 
-    return data["data"]
+    progress.emit("page", platform="hackerone", page=page_number)
 
-def hackerone_wildcards(username, api_token):
-    auth = (username, api_token)
+    if not response.from_cache:
+        programs = [normalize_program(program) for program in data["data"]]
+        await store.save_programs("hackerone", ratelimit.token_key(*auth), programs)
+        hostindex.index.add_programs("hackerone", ratelimit.token_key(*auth), programs)
 
-    max_results = 200
+    return data["data"]
 
+async def list_programs(auth, refresh=False):
+    # Every listed program, in listing order. Pages are requested
+    # LISTING_BATCH at a time until one comes back empty.
+    programs = []
     page_number = 0
-    programs_list = []
-
     while True:
-        response = requests.get(f"https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={page_number}", auth=auth)
-
-        if response.status_code not in [200, 404]:
-            print(f"Request returned {response.status_code}!")
-            sys.exit()
-
-        data = response.json()
-
-        if response.status_code == 404 or len(data["data"]) == 0:
-            break
-
-        programs_list.extend(data["data"])
-        page_number += 1
-
-    # Reversing the list
-    programs_list = programs_list[::-1]
-
-    count = 0
-    json_output = []
-
-    wildcard = True
-    url = False
-    mobile_app = False
-
-    for program in programs_list:
-        if count == max_results:
-            break
-
-        program_handle = program["attributes"]["handle"]
-        program_INscope, program_OUTscope = get_wildcard_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-        if program_INscope or program_OUTscope:
-            INscope_info = program_INscope
-            OUTscope_info = program_OUTscope
-
-            program_info = {
-                    "Program Name": program["attributes"]["name"],
-                    "In Scope": INscope_info
-            }
-            json_output.append(program_info)
-        count +=1
-
-    return json_output
-
-def get_wildcard_program_scope(program_handle, username, api_token, wildcard, url, mobile_app):
+        pages = await asyncio.gather(*[fetch_programs_page(page, auth, refresh) for page in range(page_number, page_number + LISTING_BATCH)])
+        page_number += LISTING_BATCH
+        for data in pages:
+            if not data:
+                return programs
+            programs.extend(data)
+
+def in_first(record):
+    # Among the first PROGRAMS_LIMIT listed programs, which /hackerone/programs shows.
+    return record["position"] < PROGRAMS_LIMIT
+
+def in_last(record):
+    # Among the last LATEST_LIMIT listed programs, which the other views show.
+    return record["position"] >= record["count"] - LATEST_LIMIT
+
+def record_key(record):
+    # What a persisted schedule keeps of a raw record; stored_record rebuilds
+    # the record from it, the stored program and its stored scopes (None
+    # unless scoped).
+    return {
+        "handle": record["program"]["attributes"]["handle"],
+        "scoped": record["scopes"] is not None,
+        "position": record["position"],
+        "count": record["count"],
+    }
+
+def stored_record(key, program, scopes):
+    return {"program": program["raw"], "position": key["position"], "count": key["count"], "scopes": scopes}
+
+async def iter_raw(username, api_token, workers=SCOPE_WORKERS, wanted=None):
+    # The raw crawl every HackerOne view is taken from: the listed programs,
+    # last listed first, each with its listing position and structured scopes
+    # (None when they could not be fetched). Programs no view can show are
+    # skipped.
+    #
+    # Being shared by every view and filter, this crawl fetches the scope of
+    # each program any view could show, even those the asked filters drop on
+    # listing metadata alone. A crawl serving a single known filter, e.g. a
+    # job, passes wanted, a predicate on the record, so that only the programs
+    # it keeps have their scope fetched.
     auth = (username, api_token)
+    programs = await list_programs(auth)
+    records = [
+        {"program": program, "position": position, "count": len(programs)}
+        for position, program in reversed(list(enumerate(programs)))
+    ]
+    if wanted is None:
+        records = [record for record in records if in_first(record) or in_last(record)]
+    else:
+        records = [record for record in records if wanted(record)]
+
+    async def collect_program(record):
+        program_handle = record["program"]["attributes"]["handle"]
+        record["scopes"] = await fetch_structured_scopes(program_handle, auth, public=is_public(record["program"]))
+        progress.emit("program", platform="hackerone", program=program_handle)
+        return record
+
+    async for record in client.stream_limited(collect_program, records, workers):
+        yield record
+
+def wildcards_view(record):
+    if not in_last(record):
+        return None
+    program = record["program"]
+    program_INscope, program_OUTscope = shape_wildcard_scope(record["scopes"])
+    if program_INscope or program_OUTscope:
+        return {
+            "Program Name": program["attributes"]["name"],
+            "In Scope": program_INscope
+        }
 
-    # Constructing the API request URL
-    request_url = f"https://api.hackerone.com/v1/hackers/programs/{program_handle}/structured_scopes?page%5Bsize%5D=100"
-
+def normalize_program(program):
+    attributes = program["attributes"]
+    return {
+        "handle": attributes["handle"],
+        "name": attributes["name"],
+        "private": not is_public(program),
+        "bounty": bool(attributes["offers_bounties"]),
+        "created_at": attributes["started_accepting_at"],
+        "raw": program,
+    }
+
+def normalize_scope(scope):
+    attributes = scope["attributes"]
+    return {
+        "asset": attributes["asset_identifier"],
+        "type": attributes["asset_type"],
+        "in_scope": bool(attributes["eligible_for_submission"]),
+        "bounty": bool(attributes.get("eligible_for_bounty", False)),
+        "updated_at": attributes.get("updated_at"),
+        "raw": scope,
+    }
+
+def is_public(program):
+    return program["attributes"]["state"] == "public_mode"
+
+def scope_page_url(program_handle, page):
+    return f"https://api.hackerone.com/v1/hackers/programs/{program_handle}/structured_scopes?page%5Bsize%5D={SCOPE_PAGE_SIZE}&page%5Bnumber%5D={page}"
+
+async def fetch_structured_scopes(program_handle, auth, refresh=False, public=False):
+    return await store.snapshot_scopes(
+        "hackerone", program_handle, ratelimit.token_key(*auth), public,
+        lambda: _fetch_scope_pages(program_handle, auth, refresh),
+        refresh=refresh,
+    )
+
+async def _fetch_scope_pages(program_handle, auth, refresh):
     # Making the GET request to the HackerOne API for fetching the program scope with the page size to max=100.
-    r = requests.get(request_url, auth=auth)
+    r = await client.get(scope_page_url(program_handle, 1), auth=auth, cache_ttl=cache.SCOPE_TTL, refresh=refresh)
+    r.raise_for_refusal()
     if r.status_code != 200:
-        print(f"Request returned {r.status_code}!")
-        sys.exit()
-
-    data = r.json()
+        logging.error(f"Request returned {r.status_code} for {program_handle}!")
+        return None, None
+
+    body = r.json()
+    scopes = body["data"]
+    responses = [r]
+    total = (body.get("meta") or {}).get("total_count")
+    if total is not None:
+        # The first page tells how many there are: fetch the rest at once.
+        page_count = -(-total // SCOPE_PAGE_SIZE)
+        responses += await asyncio.gather(*[
+            client.get(scope_page_url(program_handle, page), auth=auth, cache_ttl=cache.SCOPE_TTL, refresh=refresh)
+            for page in range(2, page_count + 1)
+        ])
+        for response in responses[1:]:
+            response.raise_for_refusal()
+        pages = [response.json() if response.status_code == 200 else None for response in responses[1:]]
+    else:
+        # Otherwise follow links.next one page at a time.
+        pages = []
+        next_url = (body.get("links") or {}).get("next")
+        while next_url:
+            response = await client.get(next_url, auth=auth, cache_ttl=cache.SCOPE_TTL, refresh=refresh)
+            responses.append(response)
+            response.raise_for_refusal()
+            pages.append(response.json() if response.status_code == 200 else None)
+            if pages[-1] is None:
+                break
+            next_url = (pages[-1].get("links") or {}).get("next")
+
+    # A scope missing pages would look like removed assets; give up instead.
+    if None in pages:
+        logging.error(f"Could not fetch every scope page of {program_handle}!")
+        return None, None
+    for page in pages:
+        scopes.extend(page["data"])
+    if all(response.from_cache for response in responses):
+        return scopes, None
+    return scopes, (program_handle, {}, [normalize_scope(scope) for scope in scopes])
+
+def shape_wildcard_scope(scopes):
+    # (in-scope, out-of-scope) wildcard assets of the structured scopes.
+    if scopes is None:
+        return [], []
 
     in_scope_list = []
     out_of_scope_list = []
-    for scope in data["data"]:
+    for scope in scopes:
         asset_type = scope["attributes"]["asset_type"]
 
         # For WILDCARD Scope
-        if (wildcard and asset_type == "WILDCARD"):
+        if asset_type == "WILDCARD":
             scope_info = {
                 "Asset": scope["attributes"]["asset_identifier"]
             }
@@ -109,936 +222,51 @@ def get_wildcard_program_scope(program_handle, username, api_token, wildcard, ur
 
     return in_scope_list, out_of_scope_list
 
-def hackerone_private(username, api_token):
-    auth = (username, api_token)
-
-    max_results = 200
-
-    page_number = 0
-    programs_list = []
-
-    while True:
-        response = requests.get(f"https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={page_number}", auth=auth)
-
-        if response.status_code not in [200, 404]:
-            print(f"Request returned {response.status_code}!")
-            sys.exit()
-
-        data = response.json()
-
-        if response.status_code == 404 or len(data["data"]) == 0:
-            break
-
-        programs_list.extend(data["data"])
-        page_number += 1
-
-    # Reversing the list
-    programs_list = programs_list[::-1]
-
-    count = 0
-    json_output = []
-    for program in programs_list:
-        if count == max_results:
-            break
-
-        program_handle = program["attributes"]["handle"]
-        program_scope = get_program_scope(program_handle, username, api_token, False, False, False)
-        if program_scope:
-            scope_info = program_scope
-
-            program_info = {
-                    "Program": program["attributes"]["name"],
-                    "Creation Date": program["attributes"]["started_accepting_at"],
-                    "Program Type": "Public" if program["attributes"]["state"] == "public_mode" else "Private",
-                    "Scope": scope_info
-            }
-            if program_info["Program Type"] != "Public":
-                json_output.append(program_info)
-        count +=1
-    return json_output
-
-def hackerone_last_three_months(username, api_token, private, reward, wildcard, mobile_app, url):
-    auth = (username, api_token)
-
-    max_results = 200
-
-    page_number = 0
-    programs_list = []
-
-    while True:
-        response = requests.get(f"https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={page_number}", auth=auth)
-
-        if response.status_code not in [200, 404]:
-            print(f"Request returned {response.status_code}!")
-            sys.exit()
+def private_view(record):
+    program = record["program"]
+    if not in_last(record) or is_public(program):
+        return None
+    return {
+            "Program": program["attributes"]["name"],
+            "Creation Date": program["attributes"]["started_accepting_at"],
+            "Program Type": "Private",
+            "Scope": shape_scope(record["scopes"], False, False, False)
+    }
+
+def last_three_months_view(record, private, reward, wildcard, mobile_app, url):
+    if not in_last(record):
+        return None
+    program = record["program"]
 
-        data = response.json()
-
-        if response.status_code == 404 or len(data["data"]) == 0:
-            break
-
-        programs_list.extend(data["data"])
-        page_number += 1
-
-    # Reversing the list
-    programs_list = programs_list[::-1]
-
-    count = 0
-    json_output = []
     current_date = datetime.now(pytz.utc)
     three_months_ago = current_date - timedelta(days=90)
 
-    for program in programs_list:
-        if count == max_results:
-            break
-
-        program_handle = program["attributes"]["handle"]
-        program_info = {
-            "Program Name": program["attributes"]["name"],
-            "Program Type": "Public" if program["attributes"]["state"] == "public_mode" else "Private",
-            "Offer Rewards": ("True" if program["attributes"]["offers_bounties"] else "False"),
-            "Creation Date": program["attributes"]["started_accepting_at"]
-        }
-        # Function to check if any scope item was updated in the last 90 days
-        def is_updated_recently(scope_list):
-            for item in scope_list:
-                updated_str = item.get("Last Updated")
-                if updated_str:
-                    updated_date = dateutil.parser.parse(updated_str)
-                    if not updated_date.tzinfo:
-                        updated_date = updated_date.replace(tzinfo=pytz.utc)
-                    if updated_date >= three_months_ago:
-                        return True
-            return False
-
-        # Conditions for type of program == "private/soft_launched"
-        if private:
-            if program_info["Program Type"] == "Private":
-                if wildcard:
-                    if url and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    # Check if the program creation date, updated date, or any scope item was updated recently
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with only wildcard scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with only wildcard scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-
-                # When the user selected for url and private with other filter conditions.
-                elif url:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with urls and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with only urls scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with only urls scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-
-                # When the user selected for mobile apps and private program with other filters.
-                elif mobile_app:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with mobile apps and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with only mobile applications scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with only mobile applications scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-
-                # When only private program required without any filters in the scope.
-                else:
-                    if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                    else:
-                        # When user asking for private VDP program with all scopes.
-                        program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                        if program_INscope or program_OUTscope:
-                            creation_date_str = program["attributes"]["started_accepting_at"]
-                            creation_date = dateutil.parser.parse(creation_date_str)
-
-                            if not creation_date.tzinfo:
-                                creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                            if creation_date >= three_months_ago:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-
-        # Condition for type of program == "public/public_mode --- When the above private condition is False."
-        else:
-            if program_info["Program Type"] == "Public":
-                if wildcard:
-                    if url and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with only wildcard scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with only wildcard scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-
-                # When the user selected for url and public with other filter conditions.
-                elif url:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with urls and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with only urls scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with only urls scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-
-                # When the user selected for mobile apps and public program with other filters.
-                elif mobile_app:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with mobile apps and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with only mobile applications scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    creation_date_str = program["attributes"]["started_accepting_at"]
-                                    creation_date = dateutil.parser.parse(creation_date_str)
-
-                                    if not creation_date.tzinfo:
-                                        creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                    if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                        program_info["Program In-Scope Items"] = program_INscope
-                                        program_info["Program Out-Scope Items"] = program_OUTscope
-                                        json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with only mobile applications scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-
-            # When only public program required without any filters in the scope.
-            else:
-                if reward:
-                        if program_info["Offer Rewards"] == "True":
-                            # When user asking for public program offering reward with all scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                creation_date_str = program["attributes"]["started_accepting_at"]
-                                creation_date = dateutil.parser.parse(creation_date_str)
-
-                                if not creation_date.tzinfo:
-                                    creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                                if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-
-                else:
-                    # When user asking for public VDP program with all scopes.
-                    program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                    if program_INscope or program_OUTscope:
-                        creation_date_str = program["attributes"]["started_accepting_at"]
-                        creation_date = dateutil.parser.parse(creation_date_str)
-
-                        if not creation_date.tzinfo:
-                            creation_date = creation_date.replace(tzinfo=pytz.utc)
-
-                        if ((creation_date and creation_date >= three_months_ago) or (program_INscope and is_updated_recently(program_INscope)) or (program_OUTscope and is_updated_recently(program_OUTscope))):
-                            program_info["Program In-Scope Items"] = program_INscope
-                            program_info["Program Out-Scope Items"] = program_OUTscope
-                            json_output.append(program_info)
-        count +=1
-
-    return json_output
-
-def get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app):
-    auth = (username, api_token)
-
-    # Constructing the API request URL
-    request_url = f"https://api.hackerone.com/v1/hackers/programs/{program_handle}/structured_scopes?page%5Bsize%5D=100"
-
-    # Making the GET request to the HackerOne API for fetching the program scope with the page size to max=100.
-    r = requests.get(request_url, auth=auth)
-    if r.status_code != 200:
-        print(f"Request returned {r.status_code}!")
-        sys.exit()
-
-    data = r.json()
+    program_filter = filters.compile_h1_recent_filter(private, reward, wildcard, mobile_app, url, three_months_ago)
+    if not program_filter.matches_program(program):
+        return None
+
+    program_info = {
+        "Program Name": program["attributes"]["name"],
+        "Program Type": "Public" if program["attributes"]["state"] == "public_mode" else "Private",
+        "Offer Rewards": ("True" if program["attributes"]["offers_bounties"] else "False"),
+        "Creation Date": program["attributes"]["started_accepting_at"]
+    }
+
+    program_INscope, program_OUTscope = shape_scope(record["scopes"], wildcard, url, mobile_app)
+    if program_filter.matches_scope(program, program_INscope, program_OUTscope):
+        program_info["Program In-Scope Items"] = program_INscope
+        program_info["Program Out-Scope Items"] = program_OUTscope
+        return program_info
+
+def shape_scope(scopes, wildcard, url, mobile_app):
+    # (in-scope, out-of-scope) items of the structured scopes, filtered on
+    # asset types.
+    if scopes is None:
+        return [], []
 
     in_scope_list = []
     out_of_scope_list = []
-    for scope in data["data"]:
+    for scope in scopes:
         # Filtering based on provided parameters (wildcard, url, mobile_app)
         asset_type = scope["attributes"]["asset_type"]
 
@@ -1115,491 +343,84 @@ def get_program_scope(program_handle, username, api_token, wildcard, url, mobile
 
     return in_scope_list, out_of_scope_list
 
-def get_h1_programs(username, api_token, private, reward, wildcard, mobile_app, url):
-
-    max_results = 600
+def iter_h1_programs(username, api_token, private, reward, wildcard, mobile_app, url, workers=SCOPE_WORKERS):
+    # The filter is known up front, so programs it drops on listing metadata
+    # are left out before their scope is fetched.
+    program_filter = filters.compile_h1_filter(private, reward, wildcard, mobile_app, url)
+
+    def wanted(record):
+        return in_first(record) and program_filter.matches_program(record["program"])
+
+    return filters.viewed(iter_raw(username, api_token, workers, wanted), programs_view, private, reward, wildcard, mobile_app, url)
+
+def programs_view(record, private, reward, wildcard, mobile_app, url):
+    if not in_first(record):
+        return None
+    program = record["program"]
+
+    # Programs that can't match are dropped before their scope is shaped.
+    program_filter = filters.compile_h1_filter(private, reward, wildcard, mobile_app, url)
+    if not program_filter.matches_program(program):
+        return None
+
+    program_handle = program["attributes"]["handle"]
+    program_info = {
+        "Program Name": program["attributes"]["name"],
+        "Program Handle": program_handle,
+        "Program Type": "Public" if program["attributes"]["state"] == "public_mode" else "Private",
+        "Offer Rewards": ("True" if program["attributes"]["offers_bounties"] else "False"),
+        "Creation date": program["attributes"]["started_accepting_at"],
+    }
+
+    program_INscope, program_OUTscope = shape_scope(record["scopes"], wildcard, url, mobile_app)
+    if program_filter.matches_scope(program, program_INscope, program_OUTscope):
+        program_info["Program In-Scope Items"] = program_INscope
+        if program_filter.include_out_of_scope:
+            program_info["Program Out-Scope Items"] = program_OUTscope
+        return program_info
+
+async def hackerone_sync(username, api_token, workers=SCOPE_WORKERS):
     auth = (username, api_token)
-    programs_list = []
-    page_number = 0
+    state = sync.get_state("hackerone", ratelimit.token_key(username, api_token))
 
-    while len(programs_list) < max_results:
-        pages_to_fetch = min(10, (max_results - len(programs_list)) // 100)
+    # The listing is always fetched fresh; it is what tells us which programs
+    # changed since the last run.
+    programs = {program["attributes"]["handle"]: program for program in await list_programs(auth, refresh=True)}
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_page = {executor.submit(fetch_programs_page, page, auth): page for page in range(page_number, page_number + pages_to_fetch)}
-
-            for future in as_completed(future_to_page):
-                data = future.result()
-                if data:
-                    programs_list.extend(data)
-                    if len(programs_list) >= max_results:
-                        # Trim the list to the max_results if overfilled
-                        programs_list = programs_list[:max_results]
-                        break
-
-            page_number += pages_to_fetch
-
-
-    # Reversing the list
-    programs_list = programs_list[::-1]
-
-    count = 0
-    json_output = []
-    for program in programs_list:
-        if count == max_results:
-            break
+    added, removed, stale = state.update_listing(programs)
 
+    # Only programs with changed listing metadata get their scopes re-fetched.
+    async def refresh_program(program):
         program_handle = program["attributes"]["handle"]
-        program_info = {
-            "Program Name": program["attributes"]["name"],
-            "Program Handle": program_handle,
-            "Program Type": "Public" if program["attributes"]["state"] == "public_mode" else "Private",
-            "Offer Rewards": ("True" if program["attributes"]["offers_bounties"] else "False"),
-            "Creation date": program["attributes"]["started_accepting_at"],
-        }
-
-        # Conditions for type of program == "private/soft_launched"
-        if private:
-            if program["attributes"]["state"] == "soft_launched":
-                if wildcard:
-                    if url and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with only wildcard scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with only wildcard scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                # program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-
-                # When the user selected for url and private with other filter conditions.
-                elif url:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with urls and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with only urls scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with only urls scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-
-                # When the user selected for mobile apps and private program with other filters.
-                elif mobile_app:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with mobile apps and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with only mobile applications scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for private VDP program with only mobile applications scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-
-                # When only private program required without any filters in the scope.
-                else:
-                    if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for private program offering reward with all scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        # When user asking for private VDP program with all scopes.
-                        program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                        if program_INscope or program_OUTscope:
-                            program_info["Program In-Scope Items"] = program_INscope
-                            program_info["Program Out-Scope Items"] = program_OUTscope
-                            json_output.append(program_info)
-
-        # Condition for type of program == "public/public_mode --- When the above private condition is False."
-        else:
-            if program_info["Program Type"] == "Public":
-                if wildcard:
-                    if url and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with only wildcard scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with only wildcard scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
+        scopes = await fetch_structured_scopes(program_handle, auth, refresh=True, public=is_public(program))
+        if scopes is None:
+            return [], None
 
-                # When the user selected for url and public with other filter conditions.
-                elif url:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with urls and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with only urls scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with only urls scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
+        # The refreshed fetch ran the change detector on the new scope.
+        scope_changes = changes.detector.latest.get(("hackerone", program_handle))
 
-                # When the user selected for mobile apps and public program with other filters.
-                elif mobile_app:
-                    if wildcard and mobile_app:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all the scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with all the scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif url:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with mobile apps and urls in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and urls in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    elif wildcard:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with wildcard and mobile apps in scope.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with wildcard and mobile apps in scope.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-                    else:
-                        if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with only mobile applications scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                        else:
-                            # When user asking for public VDP program with only mobile applications scopes.
-                            program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                            if program_INscope or program_OUTscope:
-                                program_info["Program In-Scope Items"] = program_INscope
-                                program_info["Program Out-Scope Items"] = program_OUTscope
-                                json_output.append(program_info)
-
-                # When only public program required without any filters in the scope.
-                else:
-                    if reward:
-                            if program_info["Offer Rewards"] == "True":
-                                # When user asking for public program offering reward with all scopes.
-                                program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                                if program_INscope or program_OUTscope:
-                                    program_info["Program In-Scope Items"] = program_INscope
-                                    program_info["Program Out-Scope Items"] = program_OUTscope
-                                    json_output.append(program_info)
-                    else:
-                        # When user asking for public VDP program with all scopes.
-                        program_INscope, program_OUTscope = get_program_scope(program_handle, username, api_token, wildcard, url, mobile_app)
-                        if program_INscope or program_OUTscope:
-                            program_info["Program In-Scope Items"] = program_INscope
-                            program_info["Program Out-Scope Items"] = program_OUTscope
-                            json_output.append(program_info)
-
-        count += 1
-
-    return json_output
+        updated = [
+            {
+                "Program Handle": program_handle,
+                "Asset": scope["attributes"]["asset_identifier"],
+                "Type": scope["attributes"]["asset_type"],
+                "Last Updated": scope["attributes"]["updated_at"],
+            }
+            for scope in state.update_scopes(program_handle, scopes)
+        ]
+        return updated, scope_changes
+
+    results = await client.gather_limited(refresh_program, stale, workers)
+
+    return {
+        "Programs": len(programs),
+        "Programs Added": added,
+        "Programs Removed": removed,
+        "Programs Refetched": [program["attributes"]["handle"] for program in stale],
+        "Updated Scopes": [scope for updated, _ in results for scope in updated],
+        "Scope Changes": {
+            program["attributes"]["handle"]: scope_changes
+            for program, (_, scope_changes) in zip(stale, results)
+            if scope_changes and any(scope_changes.values())
+        },
+    }
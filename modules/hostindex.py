@@ -0,0 +1,192 @@
+import re
+
+from modules import ipindex, models
+
+# In-memory index answering "which program's scope covers this host". Host
+# scopes are stored in a trie keyed on reversed domain labels, so a lookup
+# walks one node per label of the host no matter how many programs are indexed.
+# "*.example.com" matches every subdomain of example.com; a "*" anywhere else
+# matches exactly one label. Network scopes go to an ipindex.NetworkIndex and
+# IP addresses are looked up there. Programs and their scope items are kept as
+# models.Program and models.ScopeItem records, which the trie and the network
+# index point at.
+
+# Kinds of scope items that name hosts; the platform types behind each kind
+# are listed in models.ASSET_KINDS.
+HOST_KINDS = {models.AssetKind.WILDCARD, models.AssetKind.URL, models.AssetKind.API}
+
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://")
+_LABEL = re.compile(r"^(\*|[a-z0-9_]([a-z0-9_-]*[a-z0-9_])?)$")
+
+
+def host_labels(value):
+    # Reversed labels of the host in a URL, hostname or host pattern, or None
+    # when it doesn't name one.
+    host = _SCHEME.sub("", value.strip().lower())
+    host = re.split(r"[/?#\s]", host, maxsplit=1)[0]
+    host = host.rsplit("@", 1)[-1].split(":", 1)[0].strip(".")
+    labels = host.split(".")
+    if len(labels) < 2 or not all(_LABEL.match(label) for label in labels):
+        return None
+    return labels[::-1]
+
+
+def host_patterns(asset):
+    # Scope assets sometimes list several hosts: "example.com, *.example.org".
+    patterns = []
+    for part in re.split(r"[,\s]+", asset):
+        labels = host_labels(part) if part else None
+        if labels:
+            patterns.append(labels)
+    return patterns
+
+
+class Node:
+    __slots__ = ("children", "exact", "subdomains")
+
+    def __init__(self):
+        self.children = {}
+        # Entries whose pattern ends at this node, and entries of "*." patterns
+        # covering everything below it.
+        self.exact = []
+        self.subdomains = []
+
+
+class HostIndex:
+    def __init__(self):
+        self.root = Node()
+        self.programs = {}
+        self.entries = {}
+        self.networks = ipindex.NetworkIndex()
+        # Programs changed since search.ProgramIndex last caught up.
+        self.changed = set()
+
+    def _program(self, platform, handle):
+        key = (platform, handle)
+        if key not in self.programs:
+            self.programs[key] = models.Program(platform, handle)
+        return self.programs[key]
+
+    def add_programs(self, platform, credential, programs):
+        # programs: normalized program records from a platform listing.
+        for record in programs:
+            program = self._program(platform, record["handle"])
+            program.update(record)
+            program.owners.add(credential)
+            self.changed.add((platform, record["handle"]))
+
+    def add_scopes(self, platform, handle, credential, scopes):
+        # scopes: the complete normalized scope of one program; replaces
+        # whatever was indexed for it before.
+        program = self._program(platform, handle)
+        program.owners.add(credential)
+        self._index_scopes(program, scopes)
+        self.changed.add((platform, handle))
+
+    def _index_scopes(self, program, scopes):
+        key = (program.platform.value, program.handle)
+        self._remove(key)
+
+        program.set_scopes(scopes)
+        entries = []
+        networks = []
+        for item in program.scopes:
+            if item.kind in HOST_KINDS:
+                for labels in host_patterns(item.asset):
+                    self._insert(labels, item)
+                    entries.append((labels, item))
+            elif item.kind is models.AssetKind.NETWORK:
+                networks.extend((version, first, last, item) for version, first, last in ipindex.ip_ranges(item.asset))
+        self.entries[key] = entries
+        self.networks.set(key, networks)
+
+    def _insert(self, labels, entry):
+        node = self.root
+        if labels[-1] == "*":
+            for label in labels[:-1]:
+                node = node.children.setdefault(label, Node())
+            node.subdomains.append(entry)
+        else:
+            for label in labels:
+                node = node.children.setdefault(label, Node())
+            node.exact.append(entry)
+
+    def _remove(self, key):
+        for labels, entry in self.entries.pop(key, []):
+            node = self.root
+            path = labels[:-1] if labels[-1] == "*" else labels
+            for label in path:
+                node = node.children[label]
+            (node.subdomains if labels[-1] == "*" else node.exact).remove(entry)
+
+    def _match(self, node, labels, depth, matches):
+        if depth == len(labels):
+            matches.extend(node.exact)
+            return
+        # A "*." pattern covers the host only if at least one label is left.
+        matches.extend(node.subdomains)
+        for label in (labels[depth], "*"):
+            child = node.children.get(label)
+            if child is not None:
+                self._match(child, labels, depth + 1, matches)
+
+    def visible(self, program, credentials):
+        # Private programs only show up for a credential that fetched them.
+        return program.private is False or bool(program.owners & credentials)
+
+    def lookup(self, host, credentials=frozenset()):
+        address = ipindex.parse_address(host)
+        if address is not None:
+            matches = self.networks.lookup(address)
+        else:
+            labels = host_labels(host)
+            if labels is None:
+                return []
+            matches = []
+            self._match(self.root, labels, 0, matches)
+
+        results = []
+        seen = set()
+        for item in matches:
+            identity = (item.program, item.asset, item.type)
+            if identity in seen or not self.visible(item.program, credentials):
+                continue
+            seen.add(identity)
+            results.append(models.scope_to_match(item))
+        return results
+
+    def classify(self, host, credentials=frozenset()):
+        # Scope status of a host in every program matching it. Within a
+        # program an out-of-scope rule wins over any in-scope one.
+        programs = {}
+        for match in self.lookup(host, credentials):
+            key = (match["Platform"], match["Program Handle"])
+            if key not in programs or match["State"] == "Out-of-Scope":
+                programs[key] = match
+
+        states = {match["State"] for match in programs.values()}
+        if "In-Scope" in states:
+            state = "In-Scope"
+        elif states:
+            state = "Out-of-Scope"
+        else:
+            state = "No Match"
+        return {"Host": host, "State": state, "Programs": list(programs.values())}
+
+    def load(self, programs, scopes):
+        # Rebuild from the program and scope documents of the store.
+        grouped = {}
+        for scope in scopes:
+            grouped.setdefault((scope["platform"], scope["handle"]), []).append(scope)
+
+        for document in programs:
+            program = self._program(document["platform"], document["handle"])
+            program.update(document)
+            program.owners.update(document.get("owners", []))
+            key = (document["platform"], document["handle"])
+            self.changed.add(key)
+            if key in grouped:
+                self._index_scopes(program, grouped[key])
+
+
+index = HostIndex()
@@ -1,12 +1,16 @@
-import requests
 import json
-import time
 import logging
 from datetime import datetime
+from modules import cache, client, filters, hostindex, progress, ratelimit, store
 
-def intigriti_programs(api_token, vdp, hidden, wildcard):
-    program_info = get_all_programs_scope(api_token, vdp, hidden, "all", wildcard)
-    return program_info
+# Listing page size, and listing pages and program details requested at once
+# per crawl.
+PAGE_SIZE = 50
+LISTING_WORKERS = 5
+DETAIL_WORKERS = 10
+
+def iter_intigriti_programs(api_token, vdp, hidden, wildcard):
+    return iter_all_programs_scope(api_token, vdp, hidden, "all", wildcard)
 
 def get_category_id(input_str):
     categories = {
@@ -25,24 +29,95 @@ def get_category_id(input_str):
         raise ValueError("Invalid category")
     return selected_category
 
-def get_program_scope(token, program_id, categories, wildcard):
+def is_public(record):
+    return record["confidentialityLevel"]["id"] == 4
+
+def normalize_program(record):
+    max_bounty = record.get("maxBounty", {}).get("value", 0)
+    return {
+        "handle": record["handle"],
+        "program_id": record["id"],
+        "name": record.get("name"),
+        "private": not is_public(record),
+        "bounty": max_bounty > 0,
+        "max_bounty": max_bounty,
+        "raw": record,
+    }
+
+def normalize_scope(item):
+    return {
+        "asset": item["endpoint"],
+        "type": item["type"]["value"],
+        "in_scope": item["tier"]["id"] != 5,
+        "raw": item,
+    }
+
+async def fetch_programs_page(token, offset, limit):
+    url = f"https://api.intigriti.com/external/researcher/v1/programs?limit={limit}&offset={offset}"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = await client.get(url, headers=headers, cache_ttl=cache.LISTING_TTL)
+    # A block page that outlasted the retries is not a listing.
+    res.raise_for_refusal()
+    res.raise_for_status()
+
+    body = json.loads(res.text)
+    if not res.from_cache:
+        programs = [normalize_program(record) for record in body["records"]]
+        await store.save_programs("intigriti", ratelimit.token_key(token), programs)
+        hostindex.index.add_programs("intigriti", ratelimit.token_key(token), programs)
+    progress.emit("page", platform="intigriti", offset=offset)
+    return body
+
+async def fetch_program_detail(token, program_id, handle=None, public=False):
+    return await store.snapshot_scopes(
+        "intigriti", handle, ratelimit.token_key(token), public,
+        lambda: _fetch_detail(token, program_id),
+        from_stored=stored_detail,
+        key=program_id,
+    )
+
+def stored_detail(program, content):
+    return {**program["detail"], "domains": {**program["detail"].get("domains", {}), "content": content}}
+
+def record_key(record):
+    # See hackerone.record_key.
+    return {"handle": record["program"]["handle"], "scoped": record["detail"] is not None}
+
+def stored_record(key, program, content):
+    return {"program": program["raw"], "detail": stored_detail(program, content) if content is not None else None}
+
+async def _fetch_detail(token, program_id):
     url = f"https://api.intigriti.com/external/researcher/v1/programs/{program_id}"
     headers = {"Authorization": f"Bearer {token}"}
 
     try:
-        res = requests.get(url, headers=headers)
+        res = await client.get(url, headers=headers, cache_ttl=cache.SCOPE_TTL)
         res.raise_for_status()
-    except requests.HTTPError as e:
-        # logging.fatal("HTTP request failed: ", e)
-        return None
+    except client.HTTPError as e:
+        logging.error(f"HTTP request failed: {e}")
+        return None, None
 
+    # The shared client already backed off and retried; give up on this program.
     if "Request blocked" in res.text:
-        logging.info("Rate limited. Retrying...")
-        time.sleep(2)
-        return get_program_scope(token, program_id, categories)
+        logging.warning(f"Rate limited while fetching program {program_id}, skipping.")
+        return None, None
 
-    content_array = json.loads(res.text)["domains"]["content"]
     res_json = json.loads(res.text)
+    if res.from_cache:
+        return res_json, None
+    domains = res_json.get("domains") or {}
+    detail = {**res_json, "domains": {key: value for key, value in domains.items() if key != "content"}}
+    scopes = [normalize_scope(item) for item in domains.get("content", [])]
+    return res_json, (res_json["handle"], {"program_id": program_id, "detail": detail}, scopes)
+
+def shape_scope(res_json, categories, wildcard):
+    # The in-scope targets of a program detail in the selected categories, or
+    # None without a detail.
+    if res_json is None:
+        return None
+
+    content_array = res_json["domains"]["content"]
     program_handle = res_json["handle"]
     program_name = res_json["name"]
     created_date = datetime.utcfromtimestamp(res_json["rulesOfEngagement"].get("createdAt", 0)).strftime('%d/%m/%Y') if res_json.get("rulesOfEngagement") else "N/A"
@@ -118,135 +193,69 @@ def get_program_scope(token, program_id, categories, wildcard):
             #         })
         return pdata
 
-def get_all_programs_scope(token, bbp_only, pvt_only, categories, wildcard):
-    offset = 0
-    limit = 50
-    total = 0
-    programs = []
-
-    while True:
-        url = f"https://api.intigriti.com/external/researcher/v1/programs?limit={limit}&offset={offset}"
-        headers = {"Authorization": f"Bearer {token}"}
-
-        try:
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-        except requests.HTTPError as e:
-            # logging.fatal("HTTP request failed: ", e)
-            return []
-
-        body = json.loads(res.text)
-
-        if offset == 0:
-            total = body["maxCount"]
-            logging.info("Total Programs available: ", total)
-
-        records = body["records"]
-        for record in records:
-            id = record["id"]
-            handle = record["handle"]
-            max_bounty = record.get("maxBounty", {}).get("value", 0)
-            confidentiality_level = record["confidentialityLevel"]["id"]
-            # created_date = record["rulesOfEngagement"]["createdAt"]
-
-            if (pvt_only and confidentiality_level != 4) or not pvt_only:
-                if (bbp_only or max_bounty != 0) or not bbp_only:
-                    pdata = get_program_scope(token, id, categories, wildcard)
-                    if pdata and "InScope" in pdata and pdata["InScope"]:
-                        if any([bbp_only, pvt_only, categories, wildcard]):
-                            pdata["MaxBounty"] = 0 if bbp_only else max_bounty
-                        pdata["Program Type"] = record["confidentialityLevel"]["value"]
-                        print(f"{handle}:{max_bounty}")
-                        programs.append(pdata)
-
-        offset += len(records)
-        if offset >= total:
-            break
-
-    return programs
-
-def get_bounty_programs_scope(token, categories, bbp_only, pvt_only):
-    offset = 0
-    limit = 50
-    total = 0
-    programs = []
-
-    while True:
-        url = f"https://api.intigriti.com/external/researcher/v1/programs?limit={limit}&offset={offset}"
-        headers = {"Authorization": f"Bearer {token}"}
-
-        try:
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-        except requests.HTTPError as e:
-            logging.fatal(f"HTTP request failed: {e}")
-            return []
-
-        body = json.loads(res.text)
-
-        if offset == 0:
-            total = body["maxCount"]
-            logging.info(f"Total Programs available: {total}")
-
-        records = body["records"]
-        for record in records:
-            id = record["id"]
-            handle = record["handle"]
-            max_bounty = record.get("maxBounty", {}).get("value", 0)
-            confidentiality_level = record["confidentialityLevel"]["id"]
-
-            if (pvt_only and confidentiality_level != 4) or not pvt_only:
-                if (bbp_only or max_bounty != 0) or not bbp_only:
-                    pdata = get_program_scope(token, id, categories, False)
-                    if pdata is not None and max_bounty > 0:
-                        pdata["MaxBounty"] = max_bounty
-                        programs.append(pdata)
-
-        offset += len(records)
-        if offset >= total:
-            break
-
-    return programs
-
-def get_wildcard_programs_scope(token, categories, bbp_only, pvt_only):
-    offset = 0
-    limit = 50
-    total = 0
-    programs = []
-
-    while True:
-        url = f"https://api.intigriti.com/external/researcher/v1/programs?limit={limit}&offset={offset}"
-        headers = {"Authorization": f"Bearer {token}"}
-
-        try:
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-        except requests.HTTPError as e:
-            logging.fatal(f"HTTP request failed: {e}")
-            return []
-
-        body = json.loads(res.text)
-
-        if offset == 0:
-            total = body["maxCount"]
-            logging.info(f"Total Programs available: {total}")
-
-        records = body["records"]
-        for record in records:
-            id = record["id"]
-            handle = record["handle"]
-            max_bounty = record.get("maxBounty", {}).get("value", 0)
-            confidentiality_level = record["confidentialityLevel"]["id"]
-
-            if (pvt_only and confidentiality_level != 4) or not pvt_only:
-                if (bbp_only or max_bounty != 0) or not bbp_only:
-                    pdata = get_program_scope(token, id, categories, True)
-                    if pdata and pdata["InScope"]:
-                        pdata["MaxBounty"] = max_bounty
-                        programs.append(pdata)
-
-        offset += len(records)
-        if offset >= total:
-            break
-
-    return programs
+async def iter_program_records(token):
+    # Listing records in offset order. The first page tells how many programs
+    # there are; the remaining pages are then requested together.
+    body = await fetch_programs_page(token, 0, PAGE_SIZE)
+    total = body["maxCount"]
+    logging.info(f"Total Programs available: {total}")
+    for record in body["records"]:
+        yield record
+
+    offsets = range(PAGE_SIZE, total, PAGE_SIZE)
+    async for body in client.stream_limited(lambda offset: fetch_programs_page(token, offset, PAGE_SIZE), offsets, LISTING_WORKERS):
+        for record in body["records"]:
+            yield record
+
+def is_listed(record, bbp_only, pvt_only):
+    return (
+        ((pvt_only and record["confidentialityLevel"]["id"] != 4) or not pvt_only)
+        and ((bbp_only or record.get("maxBounty", {}).get("value", 0) != 0) or not bbp_only)
+    )
+
+async def iter_raw(token, workers=DETAIL_WORKERS):
+    # The raw crawl every Intigriti view is taken from: each listing record
+    # with its program detail, None when it could not be fetched. Details are
+    # fetched while the listing is still paging.
+    async def collect_program(record):
+        detail = await fetch_program_detail(token, record["id"], record["handle"], is_public(record))
+        progress.emit("program", platform="intigriti", program=record["handle"])
+        return {"program": record, "detail": detail}
+
+    async for raw in client.pipeline(collect_program, iter_program_records(token), workers):
+        yield raw
+
+def iter_all_programs_scope(token, bbp_only, pvt_only, categories, wildcard):
+    return filters.viewed(iter_raw(token), all_programs_view, bbp_only, pvt_only, categories, wildcard)
+
+def all_programs_view(raw, bbp_only, pvt_only, categories, wildcard):
+    record = raw["program"]
+    if not is_listed(record, bbp_only, pvt_only):
+        return None
+    max_bounty = record.get("maxBounty", {}).get("value", 0)
+    pdata = shape_scope(raw["detail"], categories, wildcard)
+    if pdata and "InScope" in pdata and pdata["InScope"]:
+        if any([bbp_only, pvt_only, categories, wildcard]):
+            pdata["MaxBounty"] = 0 if bbp_only else max_bounty
+        pdata["Program Type"] = record["confidentialityLevel"]["value"]
+        return pdata
+
+def bounty_programs_view(raw, categories, bbp_only, pvt_only):
+    record = raw["program"]
+    if not is_listed(record, bbp_only, pvt_only):
+        return None
+    max_bounty = record.get("maxBounty", {}).get("value", 0)
+    pdata = shape_scope(raw["detail"], categories, False)
+    if pdata is not None and max_bounty > 0:
+        pdata["MaxBounty"] = max_bounty
+        return pdata
+
+def wildcard_programs_view(raw, categories, bbp_only, pvt_only):
+    record = raw["program"]
+    if not is_listed(record, bbp_only, pvt_only):
+        return None
+    max_bounty = record.get("maxBounty", {}).get("value", 0)
+    pdata = shape_scope(raw["detail"], categories, True)
+    if pdata and pdata["InScope"]:
+        pdata["MaxBounty"] = max_bounty
+        return pdata
@@ -0,0 +1,117 @@
+import bisect
+import ipaddress
+import re
+
+# Interval index over the network scopes (CIDRs, single addresses and address
+# ranges) of every program. Ranges are parsed to integers and cut into
+# non-overlapping segments sorted by their first address, each listing the
+# scopes covering it, so finding the scopes of an address is one binary search.
+
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://", re.IGNORECASE)
+
+
+def parse_address(value):
+    # (IP version, integer address) of an address, optionally inside a URL,
+    # or None.
+    host = _SCHEME.sub("", value.strip())
+    host = re.split(r"[/?#\s]", host, maxsplit=1)[0]
+    if host.startswith("["):
+        host = host[1:].split("]", 1)[0]
+    elif host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return None
+    return address.version, int(address)
+
+
+def _parse_range(part):
+    if "/" in part:
+        network = ipaddress.ip_network(part, strict=False)
+        return network.version, int(network.network_address), int(network.broadcast_address)
+
+    if "-" in part:
+        first, last = part.split("-", 1)
+        start = ipaddress.ip_address(first)
+        # "10.0.0.1-10.0.0.50" or the short "10.0.0.1-50".
+        if last.isdigit() and start.version == 4:
+            last = first.rsplit(".", 1)[0] + "." + last
+        end = ipaddress.ip_address(last)
+        if start.version != end.version or end < start:
+            raise ValueError(part)
+        return start.version, int(start), int(end)
+
+    address = ipaddress.ip_address(part)
+    return address.version, int(address), int(address)
+
+
+def ip_ranges(asset):
+    # Integer ranges named by a scope asset, e.g. "10.0.0.0/8, 192.168.1.1-50".
+    ranges = []
+    for part in re.split(r"[,;\s]+", asset.strip()):
+        try:
+            ranges.append(_parse_range(part))
+        except ValueError:
+            continue
+    return ranges
+
+
+class NetworkIndex:
+    # The segment tables are kept up to date as programs change instead of
+    # being rebuilt: a program's ranges split the segments at their bounds
+    # and are added to or removed from the segments they cover. Segments
+    # refer to a range by (program key, position), so a program re-indexed
+    # with the same ranges (the usual refresh) only swaps its entries.
+    def __init__(self):
+        self.entries = {}
+        self._tables = {4: ([], []), 6: ([], [])}
+
+    def set(self, key, scopes):
+        # scopes: (IP version, first, last, entry) of one program; replaces
+        # whatever was indexed for it before.
+        old = self.entries.get(key, [])
+        if [scope[:3] for scope in old] != [scope[:3] for scope in scopes]:
+            for position, (version, first, last, _) in enumerate(old):
+                self._remove(version, first, last, (key, position))
+            for position, (version, first, last, _) in enumerate(scopes):
+                self._add(version, first, last, (key, position))
+        if scopes:
+            self.entries[key] = scopes
+        else:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return sum(len(scopes) for scopes in self.entries.values())
+
+    def _split(self, version, boundary):
+        # Index of the segment starting at boundary, splitting the segment
+        # containing it if needed. Bounds of removed ranges are left in place;
+        # their segments just cover the same scopes as their neighbours.
+        starts, covering = self._tables[version]
+        segment = bisect.bisect_left(starts, boundary)
+        if segment == len(starts) or starts[segment] != boundary:
+            starts.insert(segment, boundary)
+            covering.insert(segment, list(covering[segment - 1]) if segment else [])
+        return segment
+
+    def _add(self, version, first, last, ref):
+        start = self._split(version, first)
+        end = self._split(version, last + 1)
+        covering = self._tables[version][1]
+        for segment in range(start, end):
+            covering[segment].append(ref)
+
+    def _remove(self, version, first, last, ref):
+        starts, covering = self._tables[version]
+        for segment in range(bisect.bisect_left(starts, first), bisect.bisect_left(starts, last + 1)):
+            covering[segment].remove(ref)
+
+    def lookup(self, address):
+        # Entries of every range containing the (version, integer) address.
+        version, value = address
+        starts, covering = self._tables[version]
+        segment = bisect.bisect_right(starts, value) - 1
+        if segment < 0:
+            return []
+        return [self.entries[key][position][3] for key, position in covering[segment]]
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from modules import hackerone, intigriti, progress, ratelimit, scheduler, sync, yeswehack
+
+# Crawls submitted as jobs run independently of the request that created them:
+# the client gets a job id back, follows the job's status and pages through its
+# results once they are in. Jobs are kept in memory until JOB_TTL after they
+# finish.
+
+# platform: (crawl generator, credential fields, filters with their defaults)
+CRAWLS = {
+    "hackerone": (
+        hackerone.iter_hackerone,
+        ("username", "token"),
+        {"private": False, "bounty": False, "wildcards": False, "mobile_app": False, "single_domain": False},
+    ),
+    "intigriti": (
+        intigriti.iter_intigriti_programs,
+        ("token",),
+        {"vdp": False, "hidden": False, "wildcard": False},
+    ),
+    "yeswehack": (
+        yeswehack.iter_yeswehack_programs,
+        ("token",),
+        {"vdp": False, "hidden": False, "categories": "all"},
+    ),
+}
+
+# Jobs waiting or running, over all users and per user (credential).
+MAX_PENDING = 100
+MAX_PENDING_PER_USER = 10
+# Jobs running at once, over all users and per user.
+MAX_RUNNING = 10
+MAX_RUNNING_PER_USER = 2
+
+JOB_TTL = 3600
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+
+class JobError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Crawl:
+    # One run of a crawl generator, shared by every identical job (same
+    # platform, credential and filters) submitted while it is in flight.
+    def __init__(self, key, owner, platform, filters, credentials):
+        self.key = key
+        self.owner = owner
+        self.platform = platform
+        self.filters = filters
+        self.credentials = credentials
+        self.state = "queued"
+        self.started_at = None
+        self.finished_at = None
+        self.results = []
+        self.counts = {counter: 0 for counter in scheduler.COUNTERS.values()}
+        self.error = None
+        self.task = None
+        self.jobs = []
+
+    def notify(self):
+        for job in self.jobs:
+            job.notify()
+
+    def report(self, event, data):
+        counter = scheduler.COUNTERS.get(event)
+        if counter:
+            self.counts[counter] += 1
+            self.notify()
+
+    def detached(self, state):
+        # Copy of the crawl as it is now, for a job that stops following it.
+        copy = Crawl(self.key, self.owner, self.platform, self.filters, None)
+        copy.state = state
+        copy.started_at = self.started_at
+        copy.finished_at = time.time()
+        copy.results = list(self.results)
+        copy.counts = dict(self.counts)
+        return copy
+
+
+class Job:
+    def __init__(self, crawl):
+        self.job_id = uuid.uuid4().hex
+        self.crawl = crawl
+        self.created_at = time.time()
+        self.changed = asyncio.Event()
+        crawl.jobs.append(self)
+
+    def notify(self):
+        # Wake up every status subscriber; they re-read the job.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def finished(self):
+        return self.crawl.state in FINISHED_STATES
+
+    def status(self):
+        crawl = self.crawl
+        return {
+            "Job ID": self.job_id,
+            "Platform": crawl.platform,
+            "Filters": crawl.filters,
+            "State": crawl.state,
+            "Created At": self.created_at,
+            "Started At": crawl.started_at,
+            "Finished At": crawl.finished_at,
+            "Progress": {**crawl.counts, "matched": len(crawl.results)},
+            "Results": len(crawl.results),
+            "Error": crawl.error,
+        }
+
+
+class JobManager:
+    def __init__(self):
+        self.jobs = {}
+        self.crawls = {}
+        self._running = None
+        self._running_per_user = {}
+
+    def _semaphores(self, owner):
+        if self._running is None:
+            self._running = asyncio.Semaphore(MAX_RUNNING)
+        if owner not in self._running_per_user:
+            self._running_per_user[owner] = asyncio.Semaphore(MAX_RUNNING_PER_USER)
+        return self._running_per_user[owner], self._running
+
+    def _purge(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished() and now - job.crawl.finished_at > JOB_TTL:
+                del self.jobs[job_id]
+        active = {crawl.owner for crawl in self.crawls.values()}
+        for owner in list(self._running_per_user):
+            if owner not in active:
+                del self._running_per_user[owner]
+
+    def submit(self, platform, filters=None, credentials=None):
+        if platform not in CRAWLS:
+            raise JobError(400, f"Unknown platform {platform!r}, expected one of {', '.join(CRAWLS)}")
+        _, credential_fields, defaults = CRAWLS[platform]
+
+        filters = filters or {}
+        unknown = set(filters) - set(defaults)
+        if unknown:
+            raise JobError(400, f"Unknown {platform} filters: {', '.join(sorted(unknown))}")
+        # Filters take the type of their default: booleans, or a string for
+        # the YesWeHack categories.
+        invalid = [name for name, value in filters.items() if not isinstance(value, type(defaults[name]))]
+        if invalid:
+            raise JobError(400, f"Invalid {platform} filter values for: {', '.join(sorted(invalid))}")
+        # An unknown category would only fail once the crawl's first program
+        # detail is shaped.
+        if platform == "yeswehack" and "categories" in filters:
+            try:
+                yeswehack.get_category_id(filters["categories"])
+            except ValueError:
+                raise JobError(400, f"Invalid yeswehack categories: {filters['categories']!r}")
+        credentials = credentials or {}
+        missing = [field for field in credential_fields if not credentials.get(field)]
+        if missing:
+            raise JobError(400, f"Missing {platform} credentials: {', '.join(missing)}")
+
+        self._purge()
+        values = tuple(credentials[field] for field in credential_fields)
+        owner = ratelimit.token_key(*values)
+        pending = [job for job in self.jobs.values() if not job.finished()]
+        if len(pending) >= MAX_PENDING:
+            raise JobError(429, "Too many crawl jobs pending, try again later")
+        if sum(1 for job in pending if job.crawl.owner == owner) >= MAX_PENDING_PER_USER:
+            raise JobError(429, f"At most {MAX_PENDING_PER_USER} crawl jobs may be pending per credential")
+
+        # Identical crawls already in flight are joined instead of started again.
+        filters = {name: filters.get(name, default) for name, default in defaults.items()}
+        key = sync.fingerprint([platform, owner, list(filters.values())])
+        crawl = self.crawls.get(key)
+        if crawl is None:
+            crawl = Crawl(key, owner, platform, filters, values)
+            self.crawls[key] = crawl
+            crawl.task = asyncio.create_task(self._run(crawl))
+
+        job = Job(crawl)
+        self.jobs[job.job_id] = job
+        return job
+
+    async def _run(self, crawl):
+        func = CRAWLS[crawl.platform][0]
+        user_slots, slots = self._semaphores(crawl.owner)
+        try:
+            async with user_slots, slots:
+                crawl.state = "running"
+                crawl.started_at = time.time()
+                crawl.notify()
+                progress.report_to(crawl.report)
+                async for item in func(*crawl.credentials, *crawl.filters.values()):
+                    crawl.results.append(item)
+                    crawl.notify()
+            crawl.state = "completed"
+        except asyncio.CancelledError:
+            crawl.state = "cancelled"
+        except Exception as e:
+            logging.error(f"Crawl job {crawl.key} failed: {e}")
+            crawl.state = "failed"
+            crawl.error = str(e)
+        finally:
+            crawl.finished_at = time.time()
+            # Credentials are only needed while the crawl runs.
+            crawl.credentials = None
+            self.crawls.pop(crawl.key, None)
+            crawl.notify()
+
+    async def stop(self):
+        tasks = [crawl.task for crawl in self.crawls.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.jobs.clear()
+        self.crawls.clear()
+        self._running = None
+        self._running_per_user.clear()
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise JobError(404, f"No crawl job {job_id}")
+        return job
+
+    async def cancel(self, job_id):
+        # Stops following the crawl; the crawl itself is cancelled once no
+        # other job follows it.
+        job = self.get(job_id)
+        crawl = job.crawl
+        if job.finished():
+            return job
+
+        crawl.jobs.remove(job)
+        job.crawl = crawl.detached("cancelled")
+        job.notify()
+        if not crawl.jobs:
+            crawl.task.cancel()
+            await asyncio.gather(crawl.task, return_exceptions=True)
+        return job
+
+    def results(self, job_id, offset=0, limit=PAGE_SIZE):
+        job = self.get(job_id)
+        results = job.crawl.results
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        page = results[offset:offset + limit]
+        next_offset = offset + len(page)
+        return {
+            "State": job.crawl.state,
+            "Total": len(results),
+            "Offset": offset,
+            "Next Offset": next_offset if next_offset < len(results) or not job.finished() else None,
+            "Results": page,
+        }
+
+    async def follow(self, job_id):
+        # Yields the job's status every time it changes, until it finishes.
+        job = self.get(job_id)
+        while True:
+            changed = job.changed
+            yield job.status()
+            if job.finished():
+                return
+            await changed.wait()
+
+
+manager = JobManager()
@@ -0,0 +1,173 @@
+import enum
+import sys
+
+# One record shape for programs and scope items of every platform, built from
+# the platform modules' normalized records (normalize_program/normalize_scope).
+# Records use __slots__ and share their repeated values: platforms and asset
+# kinds are enum members and raw asset types are interned strings, so a scope
+# item costs a fixed handful of pointers instead of a dict of string keys.
+
+
+class Platform(str, enum.Enum):
+    HACKERONE = "hackerone"
+    INTIGRITI = "intigriti"
+    YESWEHACK = "yeswehack"
+    BUGCROWD = "bugcrowd"
+
+
+class AssetKind(str, enum.Enum):
+    # Platform-independent kind of a scope item.
+    WILDCARD = "wildcard"
+    URL = "url"
+    API = "api"
+    NETWORK = "network"
+    MOBILE = "mobile"
+    EXECUTABLE = "executable"
+    HARDWARE = "hardware"
+    SOURCE_CODE = "source_code"
+    OTHER = "other"
+
+
+# Raw asset types of each platform, by kind. Types not listed are OTHER.
+ASSET_KINDS = {
+    Platform.HACKERONE: {
+        "WILDCARD": AssetKind.WILDCARD,
+        "URL": AssetKind.URL,
+        "API": AssetKind.API,
+        "CIDR": AssetKind.NETWORK,
+        "IP_ADDRESS": AssetKind.NETWORK,
+        "GOOGLE_PLAY_APP_ID": AssetKind.MOBILE,
+        "APPLE_STORE_APP_ID": AssetKind.MOBILE,
+        "OTHER_APK": AssetKind.MOBILE,
+        "OTHER_IPA": AssetKind.MOBILE,
+        "TESTFLIGHT": AssetKind.MOBILE,
+        "DOWNLOADABLE_EXECUTABLES": AssetKind.EXECUTABLE,
+        "WINDOWS_APP_STORE_APP_ID": AssetKind.EXECUTABLE,
+        "HARDWARE": AssetKind.HARDWARE,
+        "SOURCE_CODE": AssetKind.SOURCE_CODE,
+        "SMART_CONTRACT": AssetKind.SOURCE_CODE,
+    },
+    Platform.INTIGRITI: {
+        "Url": AssetKind.URL,
+        "Wildcard": AssetKind.WILDCARD,
+        "IpRange": AssetKind.NETWORK,
+        "Android": AssetKind.MOBILE,
+        "iOS": AssetKind.MOBILE,
+        "Device": AssetKind.HARDWARE,
+    },
+    Platform.YESWEHACK: {
+        "web-application": AssetKind.URL,
+        "api": AssetKind.API,
+        "ip-address": AssetKind.NETWORK,
+        "mobile-application": AssetKind.MOBILE,
+        "mobile-application-android": AssetKind.MOBILE,
+        "mobile-application-ios": AssetKind.MOBILE,
+        "application": AssetKind.EXECUTABLE,
+    },
+    Platform.BUGCROWD: {
+        "website": AssetKind.URL,
+        "api": AssetKind.API,
+        "network": AssetKind.NETWORK,
+        "android": AssetKind.MOBILE,
+        "ios": AssetKind.MOBILE,
+        "hardware": AssetKind.HARDWARE,
+        "iot": AssetKind.HARDWARE,
+        "code": AssetKind.SOURCE_CODE,
+    },
+}
+
+
+def asset_kind(platform, asset_type, asset):
+    kind = ASSET_KINDS.get(platform, {}).get(asset_type, AssetKind.OTHER)
+    # Most platforms file "*.example.com" under their plain URL type.
+    if kind is AssetKind.URL and "*" in asset:
+        return AssetKind.WILDCARD
+    return kind
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Program:
+    __slots__ = ("platform", "handle", "name", "private", "bounty", "max_bounty", "created_at", "updated_at", "owners", "scopes")
+
+    def __init__(self, platform, handle):
+        self.platform = Platform(platform)
+        self.handle = handle
+        self.name = None
+        self.private = None
+        self.bounty = None
+        self.max_bounty = None
+        self.created_at = None
+        self.updated_at = None
+        # Credential hashes that listed the program, and its ScopeItems.
+        self.owners = set()
+        self.scopes = ()
+
+    def update(self, record):
+        # record: a normalized program record or stored program document.
+        self.name = record.get("name", self.name)
+        self.private = record.get("private", self.private)
+        self.bounty = record.get("bounty", self.bounty)
+        self.max_bounty = record.get("max_bounty", self.max_bounty)
+        self.created_at = record.get("created_at", self.created_at)
+
+    def set_scopes(self, records):
+        # records: the complete normalized scope of the program.
+        self.scopes = tuple(ScopeItem(self, record) for record in records)
+        # The program changed when its most recently updated asset did.
+        self.updated_at = max((item.updated_at for item in self.scopes if item.updated_at), default=None)
+
+
+class ScopeItem:
+    __slots__ = ("program", "asset", "type", "kind", "in_scope", "bounty", "updated_at")
+
+    def __init__(self, program, record):
+        # record: a normalized scope record or stored scope document.
+        self.program = program
+        self.asset = record["asset"]
+        self.type = _intern(record["type"])
+        self.kind = asset_kind(program.platform, record["type"], record["asset"])
+        self.in_scope = bool(record["in_scope"])
+        self.bounty = record.get("bounty")
+        self.updated_at = record.get("updated_at")
+
+
+# Serializers, one per output shape.
+
+def scope_to_dict(item):
+    return {
+        "Asset": item.asset,
+        "Type": item.type,
+        "Kind": item.kind.value,
+        "Eligible for Bounty": item.bounty,
+        "Last Updated": item.updated_at,
+    }
+
+
+def program_to_dict(program):
+    return {
+        "Platform": program.platform.value,
+        "Program Handle": program.handle,
+        "Program Name": program.name,
+        "Program Type": "Private" if program.private else "Public",
+        "Offer Rewards": program.bounty,
+        "Max Bounty": program.max_bounty,
+        "Creation Date": program.created_at,
+        "Last Updated": program.updated_at,
+        "In Scope": [scope_to_dict(item) for item in program.scopes if item.in_scope],
+        "Out of Scope": [scope_to_dict(item) for item in program.scopes if not item.in_scope],
+    }
+
+
+def scope_to_match(item):
+    # A scope item answering a host lookup, see hostindex.HostIndex.lookup.
+    return {
+        "Platform": item.program.platform.value,
+        "Program Handle": item.program.handle,
+        "Program Name": item.program.name,
+        "Asset": item.asset,
+        "Type": item.type,
+        "State": "In-Scope" if item.in_scope else "Out-of-Scope",
+    }
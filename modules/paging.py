@@ -0,0 +1,95 @@
+import base64
+import bisect
+import json
+
+# Server-side paging of program lists. Items are the output dicts of a
+# program endpoint; a page is cut after sorting on one item field, with the
+# program's identity breaking ties. The cursor is the sort key of the last
+# item served, so following pages continue after it even when a newer crawl
+# added or dropped programs in between.
+
+MAX_LIMIT = 1000
+
+# The field naming a program, by output shape.
+IDENTITY_FIELDS = ("Program Handle", "Program Name", "Title", "Program")
+
+
+class PagingError(ValueError):
+    pass
+
+
+def parse_fields(fields):
+    # "Program Name,Program Type" -> ["Program Name", "Program Type"]
+    return [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+
+def project(item, fields):
+    if not fields or not isinstance(item, dict):
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def _sortable(value, descending=False):
+    # Field values of different types, or missing, still compare: numbers
+    # first, then text, and missing values last in either direction.
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, "")
+    if value is None:
+        return (-1 if descending else 2, 0, "")
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True)
+    return (1, 0, value)
+
+
+def sort_key(item, field, position, descending=False):
+    # The list position only separates items that are otherwise identical.
+    identity = next((item[name] for name in IDENTITY_FIELDS if name in item), None)
+    return (_sortable(item.get(field), descending) if field else (2, 0, ""), _sortable(identity), position)
+
+
+def encode_cursor(sort, key):
+    raw = json.dumps([sort, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+        key = tuple(tuple(part) if isinstance(part, list) else part for part in key)
+    except (ValueError, TypeError):
+        raise PagingError("Invalid cursor")
+    if cursor_sort != sort:
+        raise PagingError("The cursor was issued for another sort order")
+    return key
+
+
+def paginate(items, sort=None, cursor=None, limit=None, fields=None):
+    # sort: an item field, "-" prefixed for descending order. Returns
+    # (page of projected items, next cursor or None); without a cursor or
+    # limit the page is the whole sorted list.
+    if limit is not None and not 1 <= limit <= MAX_LIMIT:
+        raise PagingError(f"limit must be between 1 and {MAX_LIMIT}")
+    fields = parse_fields(fields)
+    if not sort and cursor is None and limit is None:
+        return [project(item, fields) for item in items], None
+
+    field = sort.lstrip("-") if sort else None
+    descending = bool(sort) and sort.startswith("-")
+    keyed = sorted((sort_key(item, field, index, descending), index) for index, item in enumerate(items))
+    keys = [key for key, _ in keyed]
+
+    if descending:
+        end = len(keys) if cursor is None else bisect.bisect_left(keys, decode_cursor(cursor, sort))
+        start = 0 if limit is None else max(0, end - limit)
+        window = keyed[start:end][::-1]
+        more = start > 0
+    else:
+        start = 0 if cursor is None else bisect.bisect_right(keys, decode_cursor(cursor, sort))
+        end = len(keys) if limit is None else start + limit
+        window = keyed[start:end]
+        more = end < len(keys)
+
+    page = [project(items[index], fields) for _, index in window]
+    next_cursor = encode_cursor(sort, window[-1][0]) if more and window else None
+    return page, next_cursor
@@ -0,0 +1,19 @@
+import contextvars
+
+# Progress events of the crawl running in the current task. The scheduler
+# installs a reporter for every crawl it runs; the platform modules and the
+# shared client report through emit(), which does nothing outside a crawl.
+# Tasks spawned by a crawl inherit its reporter.
+_reporter = contextvars.ContextVar("crawl_reporter", default=None)
+
+
+def report_to(reporter):
+    _reporter.set(reporter)
+
+
+def emit(event, **data):
+    # event: "page" for a fetched listing page, "program" for a program whose
+    # scope was resolved, "rate_limit" when waiting on a platform's limits.
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter(event, data)
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import random
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+# Request quotas per platform API host: refill rate in requests per second and
+# the burst size a fresh bucket starts with. Hosts not listed here share the
+# default quota.
+PLATFORM_LIMITS = {
+    "api.hackerone.com": {"rate": 10, "burst": 20},
+    "api.intigriti.com": {"rate": 5, "burst": 10},
+    "api.yeswehack.com": {"rate": 5, "burst": 10},
+    "bugcrowd.com": {"rate": 3, "burst": 6},
+}
+DEFAULT_LIMIT = {"rate": 5, "burst": 10}
+
+# Some platforms answer a throttled request with a normal status code and an
+# error page instead of a 429.
+BLOCKED_MARKERS = {
+    "api.intigriti.com": "Request blocked",
+}
+
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Waits for a token at least this long are reported as crawl progress.
+REPORT_WAIT = 1.0
+
+_buckets = {}
+_buckets_loop = None
+
+
+def token_key(*credentials):
+    # Stable, non-reversible key for a credential so raw tokens never end up in
+    # dictionary keys or log lines.
+    raw = "\x00".join(str(c) for c in credentials if c is not None)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order.
+        # Returns how long the caller waited.
+        started = time.monotonic()
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - started
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def backoff(self, delay):
+        # Pause every caller sharing this bucket and halve the refill rate; it
+        # climbs back towards the quota as requests succeed again.
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + delay)
+        self.rate = max(self.max_rate / 10, self.rate / 2)
+
+    def success(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def get_bucket(host, credential):
+    global _buckets, _buckets_loop
+
+    # asyncio.Lock is bound to the loop it is used on, so start over whenever
+    # the running loop changes.
+    loop = asyncio.get_running_loop()
+    if _buckets_loop is not loop:
+        _buckets = {}
+        _buckets_loop = loop
+
+    key = (host, credential)
+    if key not in _buckets:
+        limit = PLATFORM_LIMITS.get(host, DEFAULT_LIMIT)
+        _buckets[key] = TokenBucket(limit["rate"], limit["burst"])
+    return _buckets[key]
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def throttle_delay(host, response, attempt):
+    # Returns how long to wait before retrying a throttled response, or None
+    # when the response was not throttled.
+    marker = BLOCKED_MARKERS.get(host)
+    throttled = response.status_code in THROTTLE_STATUSES or (marker is not None and marker in response.text)
+    if not throttled:
+        return None
+
+    delay = parse_retry_after(response.headers.get("Retry-After"))
+    if delay is None:
+        delay = BACKOFF_BASE * 2 ** attempt + random.uniform(0, BACKOFF_BASE)
+    return min(delay, BACKOFF_MAX)
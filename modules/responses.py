@@ -0,0 +1,165 @@
+import datetime
+import gzip
+import hashlib
+import json
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+# Response encoding for every route: JSON through orjson when it is installed,
+# and bodies compressed with brotli or gzip when the client accepts them.
+# Both libraries are optional; without them the stdlib encoder and gzip are
+# used.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this gain too little to be worth compressing.
+MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+# Quality 5 beats gzip's ratio at a similar cost; the higher qualities gain a
+# few percent more for many times the time, too slow to run per request.
+BROTLI_QUALITY = 5
+ENCODINGS = ("br", "gzip")
+
+
+def _default(value):
+    # The non-JSON values crawl results carry: dates from the store and sets.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Integers beyond 64 bits and other values orjson refuses.
+            pass
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    # Routes returning a plain dict still go through FastAPI's
+    # jsonable_encoder first, which costs far more than the encoding itself on
+    # large crawl results; routes that build the response themselves skip it.
+    def render(self, content):
+        return dumps(content)
+
+
+def etag(*parts):
+    # A strong ETag for the representation built from parts: a content hash
+    # and whatever else shapes the body (paging, description).
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest() + '"'
+
+
+def _entity_tag(tag):
+    # The tag before CompressionMiddleware added the content coding to it.
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def not_modified(request, tag):
+    # The tag of the request's If-None-Match matching tag, compared weakly and
+    # as sent (with its content coding), or None.
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return tag
+    return next((candidate.strip() for candidate in if_none_match.split(",") if _entity_tag(candidate) == tag), None)
+
+
+def accepted_encoding(accept_encoding):
+    # The best encoding the client accepts: "br", "gzip" or None.
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    # Compresses responses sent in one piece. Streamed responses (SSE, NDJSON,
+    # large files) pass through untouched: buffering them for the compressor
+    # would hold back events the client is waiting for.
+    def __init__(self, app, minimum_size=MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(raw=response_start["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body") or len(body) < self.minimum_size or "content-encoding" in headers:
+                await send(response_start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            # A strong ETag names one exact body, so each coding gets its own.
+            tag = headers.get("etag")
+            if tag and tag.endswith('"') and not tag.startswith("W/"):
+                headers["ETag"] = f'{tag[:-1]}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(response_start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
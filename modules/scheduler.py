@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+from modules import bugcrowd, changes, hackerone, intigriti, progress, ratelimit, singleflight, store, sync, yeswehack
+
+# Crawls run in the background instead of inside request handlers. The first
+# request for a crawl (platform raw crawl and credential) registers it and
+# waits for its first result; from then on the scheduler refreshes it every
+# interval, with jitter so crawls registered together drift apart, and the
+# endpoints answer from the latest completed crawl. Endpoints differ only in
+# their view of the raw records (see filters.viewed), so every filter
+# combination of a credential shares one crawl and the views are computed from
+# its result. Crawls are the platform modules' async generators, so the first
+# crawl can also be streamed while it runs.
+PLATFORMS = ("hackerone", "intigriti", "yeswehack", "bugcrowd")
+CRAWL_INTERVAL = {platform: int(os.environ.get(f"{platform.upper()}_CRAWL_INTERVAL", 3600)) for platform in PLATFORMS}
+CRAWL_JITTER = 0.1
+
+# How many crawls of the same platform may run at once.
+CRAWL_CONCURRENCY = {platform: int(os.environ.get(f"{platform.upper()}_CRAWL_CONCURRENCY", 2)) for platform in PLATFORMS}
+
+# Crawls nobody asked for in this long stop being refreshed.
+IDLE_TIMEOUT = int(os.environ.get("CRAWL_IDLE_TIMEOUT", 24 * 3600))
+# Views of the latest result kept per crawl.
+MAX_VIEWS = 16
+TICK = 1
+
+# Progress counters of a crawl, by the progress event that advances them.
+COUNTERS = {"page": "pages", "program": "programs", "rate_limit": "rate_limit_waits"}
+
+# The platform module keying and rebuilding the raw records of each platform's
+# crawls. A completed crawl is persisted as the keys of its records; the
+# programs and scopes themselves are in the store already.
+RECORDS = {"hackerone": hackerone, "intigriti": intigriti, "yeswehack": yeswehack, "bugcrowd": bugcrowd}
+
+
+class Job:
+    def __init__(self, job_id, platform, func, credentials):
+        self.job_id = job_id
+        self.platform = platform
+        self.func = func
+        self.credentials = credentials
+        self.result = None
+        # Content hash of result, the version the endpoints' ETags derive from.
+        self.result_hash = None
+        # (items, content hash) per (view, filters), computed from result.
+        self.views = {}
+        self.completed_at = None
+        self.next_run = time.time()
+        self.last_requested = time.time()
+        self.error = None
+        self.task = None
+        # Items and progress counters of the crawl in progress, and queues of
+        # the requests following it.
+        self.partial = None
+        self.counts = None
+        self.listeners = []
+
+    def publish(self, message):
+        for queue in self.listeners:
+            queue.put_nowait(message)
+
+    def report(self, event, data):
+        counter = COUNTERS.get(event)
+        if counter:
+            self.counts[counter] += 1
+        self.publish(("progress", {"event": event, **data, **self.counts}))
+
+    def view(self, view, filters):
+        # Items of the view over the latest result, and their content hash.
+        key = (view.__name__, filters)
+        if key not in self.views:
+            items = [item for item in (view(record, *filters) for record in self.result) if item is not None]
+            self.views[key] = (items, changes.result_hash(items))
+            if len(self.views) > MAX_VIEWS:
+                del self.views[next(iter(self.views))]
+        return self.views[key]
+
+    def set_result(self, result):
+        self.result = result
+        self.result_hash = changes.result_hash(result)
+        self.views = {}
+
+    def state(self):
+        # Credentials are never persisted; a restarted process resumes a crawl
+        # once a request supplies them again.
+        return {
+            "platform": self.platform,
+            "name": self.func.__name__,
+            "records": [RECORDS[self.platform].record_key(record) for record in self.result],
+            "result_hash": self.result_hash,
+            "completed_at": self.completed_at,
+            "next_run": self.next_run,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+async def restore(platform, keys):
+    # The raw records of a persisted crawl rebuilt from the store, or None
+    # when one of its programs or scopes is no longer stored.
+    if platform not in RECORDS or keys is None:
+        return None
+    stored = await store.load_records(platform, [key["handle"] for key in keys])
+    if stored is None:
+        return None
+
+    programs, scopes = stored
+    records = []
+    for key in keys:
+        program = programs.get(key["handle"])
+        if program is None or (key["scoped"] and not program.get("scopes_fetched_at")):
+            return None
+        records.append(RECORDS[platform].stored_record(key, program, scopes[key["handle"]] if key["scoped"] else None))
+    return records
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+        self._semaphores = {}
+        self._loop_task = None
+        # Jobs whose persisted schedule is being loaded, by job id.
+        self._loading = singleflight.Group()
+
+    def start(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [job.task for job in self.jobs.values() if job.task]
+        if self._loop_task:
+            tasks.append(self._loop_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self.jobs.clear()
+        self._semaphores.clear()
+
+    async def _job(self, platform, func, credentials):
+        self.start()
+        job_id = sync.fingerprint([platform, func.__name__, ratelimit.token_key(*credentials)])
+
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = await self._loading.do(job_id, self._load, job_id, platform, func, credentials)
+
+        job.last_requested = time.time()
+        return job
+
+    async def _load(self, job_id, platform, func, credentials):
+        # A new job with its persisted result, if any. It is only registered,
+        # and so only picked up by the refresh loop, once that is restored.
+        job = Job(job_id, platform, func, credentials)
+        state = await store.load_schedule(job_id)
+        if state and state.get("completed_at"):
+            # Programs re-stored by other crawls since may have changed; a
+            # result that no longer matches is crawled again instead.
+            result = await restore(platform, state.get("records"))
+            if result is not None and changes.result_hash(result) == state.get("result_hash"):
+                job.set_result(result)
+                job.completed_at = state["completed_at"]
+                job.next_run = state["next_run"]
+        self.jobs[job_id] = job
+        return job
+
+    async def latest(self, platform, func, view, credentials, *filters):
+        # Items of view(record, *filters) over the latest completed crawl of
+        # func(*credentials).
+        result, _ = await self.latest_tagged(platform, func, view, credentials, *filters)
+        return result
+
+    async def latest_tagged(self, platform, func, view, credentials, *filters):
+        # Like latest, but returns (items, content hash of the items).
+        job = await self._job(platform, func, credentials)
+        if job.completed_at is not None:
+            return job.view(view, filters)
+
+        # Nothing crawled yet: run now and wait for it, sharing the crawl with
+        # any other request that arrives meanwhile.
+        if job.task is None:
+            job.task = asyncio.create_task(self._crawl(job))
+        await asyncio.shield(job.task)
+        if job.completed_at is None:
+            self.jobs.pop(job.job_id, None)
+            raise job.error
+        return job.view(view, filters)
+
+    async def stream(self, platform, func, view, credentials, *filters):
+        # Like latest, but yields the items one by one. Before the first crawl
+        # has completed, items are yielded as the crawl produces them.
+        async for kind, payload in self.events(platform, func, view, credentials, *filters):
+            if kind == "item":
+                yield payload
+
+    async def events(self, platform, func, view, credentials, *filters):
+        # Like stream, but yields (kind, payload) messages: "item" for every
+        # item, "progress" while the first crawl runs, then "done" or "error".
+        # Progress counts the crawl's records; "matched" counts the items.
+        job = await self._job(platform, func, credentials)
+        matched = 0
+        if job.completed_at is None:
+            async for kind, payload in self._follow(job):
+                if kind == "item":
+                    payload = view(payload, *filters)
+                    if payload is None:
+                        continue
+                    matched += 1
+                elif kind == "progress":
+                    payload = {**payload, "matched": matched}
+                yield kind, payload
+            if job.completed_at is None:
+                yield "error", {"error": str(job.error)}
+                return
+        else:
+            items, _ = job.view(view, filters)
+            for item in items:
+                matched += 1
+                yield "item", item
+        yield "done", {"items": matched, "completed_at": job.completed_at}
+
+    async def _follow(self, job):
+        # Messages of the crawl in progress, starting it if needed. Items
+        # produced before the caller attached are replayed first.
+        if job.task is None:
+            job.task = asyncio.create_task(self._crawl(job))
+
+        queue = asyncio.Queue()
+        items = list(job.partial or [])
+        job.listeners.append(queue)
+        try:
+            if job.counts:
+                yield "progress", dict(job.counts)
+            for item in items:
+                yield "item", item
+            while (message := await queue.get()) is not None:
+                yield message
+        finally:
+            if queue in job.listeners:
+                job.listeners.remove(queue)
+
+        if job.completed_at is None:
+            self.jobs.pop(job.job_id, None)
+
+    def _semaphore(self, platform):
+        if platform not in self._semaphores:
+            self._semaphores[platform] = asyncio.Semaphore(CRAWL_CONCURRENCY.get(platform, 1))
+        return self._semaphores[platform]
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            for job_id, job in list(self.jobs.items()):
+                if job.task is not None:
+                    continue
+                if now - job.last_requested > IDLE_TIMEOUT:
+                    del self.jobs[job_id]
+                elif job.next_run <= now:
+                    job.task = asyncio.create_task(self._crawl(job))
+            await asyncio.sleep(TICK)
+
+    async def _crawl(self, job):
+        try:
+            items = job.partial = []
+            job.counts = {counter: 0 for counter in COUNTERS.values()}
+            job.counts["records"] = 0
+            progress.report_to(job.report)
+            async with self._semaphore(job.platform):
+                async for item in job.func(*job.credentials):
+                    items.append(item)
+                    job.counts["records"] += 1
+                    job.publish(("item", item))
+            job.set_result(items)
+            job.completed_at = time.time()
+            job.error = None
+        except Exception as e:
+            # A failed refresh keeps serving the previous crawl.
+            logging.error(f"Scheduled {job.platform} crawl {job.func.__name__} failed: {e}")
+            job.error = e
+        finally:
+            interval = CRAWL_INTERVAL.get(job.platform, 3600)
+            job.next_run = time.time() + interval * (1 + random.uniform(-CRAWL_JITTER, CRAWL_JITTER))
+            job.task = None
+            job.partial = None
+            job.publish(None)
+            job.listeners = []
+
+        if job.completed_at is not None:
+            await store.save_schedule(job.job_id, job.state())
+
+
+scheduler = Scheduler()
@@ -0,0 +1,121 @@
+import bisect
+
+from modules import changes, filters, hostindex, models
+
+# Cross-platform program search over the programs of the host index. Every
+# filterable attribute has a secondary index: a set of program keys per value
+# for exact attributes, and a sorted list of values for range attributes. A
+# query intersects the key sets of its filters, smallest first. The index
+# catches up with the programs the host index changed before each query.
+
+EXACT_ATTRIBUTES = ("platform", "bounty", "private", "kind")
+RANGE_ATTRIBUTES = ("created", "updated", "max_bounty")
+
+
+def _timestamp(value):
+    try:
+        date = filters.parse_date(value)
+    except (ValueError, OverflowError):
+        return None
+    return date.timestamp() if date else None
+
+
+def program_attributes(program):
+    # (exact postings, range values) of a program.
+    exact = {("platform", program.platform.value), ("bounty", bool(program.bounty)), ("private", bool(program.private))}
+    exact.update(("kind", item.kind.value) for item in program.scopes if item.in_scope)
+    ranges = {
+        "created": _timestamp(program.created_at),
+        "updated": _timestamp(program.updated_at),
+        "max_bounty": program.max_bounty if isinstance(program.max_bounty, (int, float)) else None,
+    }
+    return exact, {name: value for name, value in ranges.items() if value is not None}
+
+
+class ProgramIndex:
+    def __init__(self, source):
+        self.source = source
+        self.postings = {}
+        self.attributes = {}
+        self.values = {name: {} for name in RANGE_ATTRIBUTES}
+        self._sorted = {}
+        # Content hash of every program's output, for versioning results.
+        self.hashes = {}
+
+    def _catch_up(self):
+        changed = self.source.changed
+        if not changed:
+            return
+        for key in list(changed):
+            self._reindex(key, self.source.programs.get(key))
+        changed.clear()
+
+    def _reindex(self, key, program):
+        for posting in self.attributes.pop(key, ()):
+            keys = self.postings[posting]
+            keys.discard(key)
+            if not keys:
+                del self.postings[posting]
+        for name in RANGE_ATTRIBUTES:
+            if self.values[name].pop(key, None) is not None:
+                self._sorted.pop(name, None)
+        self.hashes.pop(key, None)
+        if program is None:
+            return
+
+        self.hashes[key] = changes.item_hash(models.program_to_dict(program))
+        exact, ranges = program_attributes(program)
+        self.attributes[key] = exact
+        for posting in exact:
+            self.postings.setdefault(posting, set()).add(key)
+        for name, value in ranges.items():
+            self.values[name][key] = value
+            self._sorted.pop(name, None)
+
+    def _range(self, name, low, high):
+        # Keys whose value of a range attribute lies within [low, high].
+        if name not in self._sorted:
+            pairs = sorted((value, key) for key, value in self.values[name].items())
+            self._sorted[name] = ([value for value, _ in pairs], [key for _, key in pairs])
+        values, keys = self._sorted[name]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+        return set(keys[start:end])
+
+    def search(self, credentials=frozenset(), platforms=None, bounty=None, private=None, kinds=None,
+               created_since=None, updated_since=None, min_bounty=None, max_bounty=None):
+        # Programs matching every given filter; list filters match any of
+        # their values. Dates are timestamps.
+        self._catch_up()
+
+        candidates = []
+        if platforms:
+            candidates.append(set().union(*[self.postings.get(("platform", models.Platform(p).value), set()) for p in platforms]))
+        if bounty is not None:
+            candidates.append(self.postings.get(("bounty", bounty), set()))
+        if private is not None:
+            candidates.append(self.postings.get(("private", private), set()))
+        if kinds:
+            candidates.append(set().union(*[self.postings.get(("kind", models.AssetKind(k).value), set()) for k in kinds]))
+        if created_since is not None:
+            candidates.append(self._range("created", created_since, None))
+        if updated_since is not None:
+            candidates.append(self._range("updated", updated_since, None))
+        if min_bounty is not None or max_bounty is not None:
+            candidates.append(self._range("max_bounty", min_bounty, max_bounty))
+
+        if candidates:
+            candidates.sort(key=len)
+            keys = candidates[0].intersection(*candidates[1:])
+        else:
+            keys = set(self.attributes)
+
+        programs = (self.source.programs[key] for key in sorted(keys))
+        return [program for program in programs if self.source.visible(program, credentials)]
+
+    def result_hash(self, programs):
+        # Content hash of a search result, from the hashes kept per program.
+        return changes.result_hash([self.hashes[(program.platform.value, program.handle)] for program in programs])
+
+
+index = ProgramIndex(hostindex.index)
@@ -0,0 +1,34 @@
+import asyncio
+
+# Single-flight calls: while a call for a key is in flight, identical calls
+# wait for it and share its result (or exception) instead of running again.
+# The call runs in its own task, so a caller giving up doesn't cancel it for
+# the others.
+
+
+class Group:
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, func, *args):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception even if every caller stopped waiting.
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self):
+        return len(self._calls)
+
+
+# Per-program scope lookups of store.snapshot_scopes, keyed by platform,
+# program, credential hash (None for public programs) and refresh.
+scope_fetches = Group()
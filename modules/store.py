@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DeleteMany, UpdateOne
+
+from modules import cache, changes, hostindex, singleflight
+
+# Normalized program and scope records from every platform are persisted in
+# MongoDB so crawled data survives restarts. Set MONGO_URI to enable the store;
+# "mongomock://" keeps everything in memory for local development and tests.
+MONGO_URI = os.environ.get("MONGO_URI")
+MONGO_DB = os.environ.get("MONGO_DB", "phoenixscope")
+
+# Stored scopes are served instead of re-crawling for as long as the in-process
+# scope cache would have kept them.
+STORE_MAX_AGE = cache.SCOPE_TTL
+BATCH_SIZE = 500
+
+_db = None
+
+
+def configure(uri=MONGO_URI, db_name=MONGO_DB):
+    global _db
+
+    if not uri:
+        _db = None
+        return None
+
+    if uri.startswith("mongomock://"):
+        import mongomock
+        mongo_client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        mongo_client = MongoClient(uri)
+
+    _db = mongo_client[db_name]
+    _db.programs.create_index([("platform", ASCENDING), ("handle", ASCENDING)], unique=True)
+    _db.scopes.create_index([("platform", ASCENDING), ("handle", ASCENDING)])
+    _db.scopes.create_index([("asset", ASCENDING), ("type", ASCENDING)])
+    _db.snapshots.create_index([("platform", ASCENDING), ("handle", ASCENDING)], unique=True)
+    return _db
+
+
+def enabled():
+    return _db is not None
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _bulk_write(collection, operations):
+    for start in range(0, len(operations), BATCH_SIZE):
+        collection.bulk_write(operations[start:start + BATCH_SIZE], ordered=True)
+
+
+async def run(func, *args):
+    # pymongo is blocking, so every store call runs in a worker thread.
+    if _db is None:
+        return None
+    try:
+        return await asyncio.to_thread(func, *args)
+    except Exception as e:
+        logging.error(f"Scope store operation failed: {e}")
+        return None
+
+
+def _save_programs(platform, credential, programs):
+    now = _now()
+    operations = [
+        UpdateOne(
+            {"platform": platform, "handle": program["handle"]},
+            {"$set": {**program, "platform": platform, "fetched_at": now}, "$addToSet": {"owners": credential}},
+            upsert=True,
+        )
+        for program in programs
+    ]
+    _bulk_write(_db.programs, operations)
+
+
+def _save_scopes(platform, handle, credential, program, scopes):
+    now = _now()
+    operations = [
+        # Keyed on the item's position: a program may list the same asset twice.
+        UpdateOne(
+            {"platform": platform, "handle": handle, "position": position},
+            {"$set": {**scope, "platform": platform, "handle": handle, "fetched_at": now}},
+            upsert=True,
+        )
+        for position, scope in enumerate(scopes)
+    ]
+    # Assets that disappeared upstream were not touched by this fetch.
+    operations.append(DeleteMany({"platform": platform, "handle": handle, "fetched_at": {"$lt": now}}))
+    _bulk_write(_db.scopes, operations)
+
+    _db.programs.update_one(
+        {"platform": platform, "handle": handle},
+        {"$set": {**program, "platform": platform, "handle": handle, "scopes_fetched_at": now}, "$addToSet": {"owners": credential}},
+        upsert=True,
+    )
+
+
+def _load_scopes(platform, handle, credential, max_age, public):
+    # Public programs are served whichever credential stored them.
+    query = {"platform": platform, "handle": handle}
+    query.update({"private": False} if public else {"owners": credential})
+    program = _db.programs.find_one(query)
+    if not program or not program.get("scopes_fetched_at"):
+        return None
+    if program["scopes_fetched_at"] < _now() - timedelta(seconds=max_age):
+        return None
+
+    scopes = _db.scopes.find({"platform": platform, "handle": handle}).sort("position", ASCENDING)
+    return program, [scope["raw"] for scope in scopes]
+
+
+def _save_snapshot(platform, handle, snapshot):
+    _db.snapshots.update_one(
+        {"platform": platform, "handle": handle},
+        {"$set": {**snapshot, "platform": platform, "handle": handle, "taken_at": _now()}},
+        upsert=True,
+    )
+
+
+def _load_snapshot(platform, handle):
+    return _db.snapshots.find_one({"platform": platform, "handle": handle}, {"_id": 0})
+
+
+def _load_index():
+    programs = list(_db.programs.find({}, {"platform": 1, "handle": 1, "name": 1, "private": 1, "bounty": 1, "max_bounty": 1, "created_at": 1, "owners": 1}))
+    scopes = list(_db.scopes.find({}, {"platform": 1, "handle": 1, "asset": 1, "type": 1, "in_scope": 1, "bounty": 1, "updated_at": 1}).sort("position", ASCENDING))
+    return programs, scopes
+
+
+def _load_records(platform, handles):
+    programs = {program["handle"]: program for program in _db.programs.find({"platform": platform, "handle": {"$in": handles}})}
+    scopes = {handle: [] for handle in handles}
+    for scope in _db.scopes.find({"platform": platform, "handle": {"$in": handles}}).sort("position", ASCENDING):
+        scopes[scope["handle"]].append(scope["raw"])
+    return programs, scopes
+
+
+def _save_schedule(job_id, state):
+    _db.schedules.replace_one({"_id": job_id}, state, upsert=True)
+
+
+def _load_schedule(job_id):
+    return _db.schedules.find_one({"_id": job_id})
+
+
+async def save_programs(platform, credential, programs):
+    # programs: normalized program records, each with at least a "handle".
+    if programs:
+        await run(_save_programs, platform, credential, programs)
+
+
+async def save_scopes(platform, handle, credential, program, scopes):
+    # Replaces the stored scope set of one program with freshly fetched,
+    # normalized scope records.
+    await run(_save_scopes, platform, handle, credential, program, scopes)
+
+
+async def load_scopes(platform, handle, credential, max_age=STORE_MAX_AGE, public=False):
+    # Returns (program record, raw scope items) when the credential, or anyone
+    # for a public program, has a fresh snapshot of the program's scope,
+    # otherwise None.
+    return await run(_load_scopes, platform, handle, credential, max_age, public)
+
+
+async def snapshot_scopes(platform, handle, credential, public, fetch, from_stored=None, key=None, refresh=False):
+    # The scope of one program from the first tier that has it: the shared
+    # cache of public scopes (keyed on key, by default the handle), a fresh
+    # stored snapshot, or fetch(). fetch returns (scope, fresh) where fresh is
+    # (handle, program, normalized scopes) when the scope came from upstream
+    # rather than the response cache, and scope is None when it could not be
+    # fetched. A fresh scope is stored, indexed and checked for changes.
+    # from_stored(program, raw scope items) rebuilds the scope from the store;
+    # by default the raw items are the scope. refresh skips the first two tiers.
+    #
+    # Overlapping crawls with the same credential share one lookup per
+    # program, and with any credential for a public program.
+    flight = (platform, key or handle, None if public else credential, refresh)
+    return await singleflight.scope_fetches.do(flight, _snapshot_scopes, platform, handle, credential, public, fetch, from_stored, key, refresh)
+
+
+async def _snapshot_scopes(platform, handle, credential, public, fetch, from_stored, key, refresh):
+    key = (platform, key or handle)
+    if public and not refresh:
+        shared = cache.public_scopes.get(key)
+        if shared is not None:
+            return shared
+    if handle and not refresh:
+        stored = await load_scopes(platform, handle, credential, public=public)
+        if stored is not None:
+            scope = from_stored(*stored) if from_stored else stored[1]
+            if public:
+                cache.public_scopes.set(key, scope)
+            return scope
+
+    scope, fresh = await fetch()
+    if scope is None:
+        return None
+    if public:
+        cache.public_scopes.set(key, scope)
+    if fresh is not None:
+        fresh_handle, program, scopes = fresh
+        await save_scopes(platform, fresh_handle, credential, program, scopes)
+        hostindex.index.add_scopes(platform, fresh_handle, credential, scopes)
+        await changes.detector.detect(platform, fresh_handle, scopes)
+    return scope
+
+
+async def save_snapshot(platform, handle, snapshot):
+    # snapshot: the content hashes of a program's scope, see changes.ScopeSnapshot.
+    await run(_save_snapshot, platform, handle, snapshot)
+
+
+async def load_snapshot(platform, handle):
+    return await run(_load_snapshot, platform, handle)
+
+
+async def load_index():
+    # (program documents, scope documents) of every stored program, for
+    # rebuilding the in-memory host index.
+    return await run(_load_index)
+
+
+async def load_records(platform, handles):
+    # (program documents by handle, raw scope items by handle) of the given
+    # programs, for rebuilding a persisted crawl.
+    return await run(_load_records, platform, handles)
+
+
+async def save_schedule(job_id, state):
+    # state: the schedule of one crawl and the keys of its latest records,
+    # see scheduler.Job.
+    await run(_save_schedule, job_id, state)
+
+
+async def load_schedule(job_id):
+    return await run(_load_schedule, job_id)
+
+
+configure()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import time
+
+from modules import filters
+
+# Programs whose listing metadata did not change are still re-fetched once
+# their scopes are this old, so scope edits that don't touch the listing are
+# eventually picked up.
+FULL_REFRESH_INTERVAL = 24 * 3600
+
+_states = {}
+
+
+def fingerprint(record):
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+class SyncState:
+    def __init__(self):
+        self.programs = {}
+        self.fingerprints = {}
+        self.scopes = {}
+        self.watermarks = {}
+        self.synced_at = {}
+        self.last_run = None
+
+    def update_listing(self, programs):
+        # Store the latest program listing and return the handles that appeared
+        # and disappeared since the previous run, plus the programs whose scopes
+        # need to be fetched again.
+        now = time.time()
+        added = [handle for handle in programs if handle not in self.programs]
+        removed = [handle for handle in self.programs if handle not in programs]
+
+        # A stale program keeps its previous fingerprint until update_scopes
+        # stores its new scopes, so a failed re-fetch is retried next run.
+        stale = []
+        for handle, program in programs.items():
+            if (
+                self.fingerprints.get(handle) != fingerprint(program)
+                or handle not in self.scopes
+                or now - self.synced_at.get(handle, 0) >= FULL_REFRESH_INTERVAL
+            ):
+                stale.append(program)
+
+        for handle in removed:
+            self.fingerprints.pop(handle, None)
+            self.scopes.pop(handle, None)
+            self.watermarks.pop(handle, None)
+            self.synced_at.pop(handle, None)
+
+        self.programs = programs
+        self.last_run = now
+        return added, removed, stale
+
+    def update_scopes(self, handle, scopes):
+        # Store freshly fetched scopes and return the ones that are new or whose
+        # updated_at moved past the stored watermark.
+        previous = self.watermarks.get(handle, {})
+        watermarks = {}
+        updated = []
+        for scope in scopes:
+            updated_at = scope["attributes"].get("updated_at")
+            watermarks[scope["id"]] = updated_at
+
+            last_seen = filters.parse_date(previous.get(scope["id"]))
+            current = filters.parse_date(updated_at)
+            if scope["id"] not in previous or (current and (last_seen is None or current > last_seen)):
+                updated.append(scope)
+
+        self.scopes[handle] = scopes
+        self.watermarks[handle] = watermarks
+        self.fingerprints[handle] = fingerprint(self.programs[handle])
+        self.synced_at[handle] = time.time()
+        return updated
+
+
+def get_state(platform, credential):
+    key = (platform, credential)
+    if key not in _states:
+        _states[key] = SyncState()
+    return _states[key]
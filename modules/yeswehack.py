@@ -1,13 +1,16 @@
-import requests
 import json
 import logging
+from modules import cache, client, filters, hostindex, progress, ratelimit, store
 
 YESWEHACK_PROGRAMS_ENDPOINT = "https://api.yeswehack.com/programs"
 YESWEHACK_PROGRAM_BASE_ENDPOINT = "https://api.yeswehack.com/programs/"
 
-def yeswehack_programs(api_token, vdp, hidden, categories):
-    program_info = get_all_programs_scope(api_token, vdp, hidden, categories)
-    return program_info
+# Listing pages and program details requested at once per crawl.
+LISTING_WORKERS = 5
+DETAIL_WORKERS = 10
+
+def iter_yeswehack_programs(api_token, vdp, hidden, categories):
+    return iter_all_programs_scope(api_token, vdp, hidden, categories)
 
 def get_category_id(input_str):
     categories = {
@@ -25,18 +28,69 @@ def get_category_id(input_str):
         raise ValueError("Invalid category")
     return selected_category
 
-def get_program_scope(token, company_slug, categories):
+def normalize_program(item):
+    return {
+        "handle": item['slug'],
+        "name": item['title'],
+        "private": not item['public'],
+        "bounty": bool(item['bounty']),
+        "max_bounty": item.get('bounty_reward_max') if item['bounty'] else None,
+        "raw": item,
+    }
+
+def normalize_scope(scope):
+    return {
+        "asset": scope["scope"],
+        "type": scope["scope_type"],
+        "in_scope": True,
+        "raw": scope,
+    }
+
+async def fetch_programs_page(token, page):
+    response = await client.get(f"{YESWEHACK_PROGRAMS_ENDPOINT}?page={page}", headers={"Authorization": f"Bearer {token}"}, cache_ttl=cache.LISTING_TTL)
+    response.raise_for_status()
+
+    data = response.json()
+    if not response.from_cache:
+        programs = [normalize_program(item) for item in data['items']]
+        await store.save_programs("yeswehack", ratelimit.token_key(token), programs)
+        hostindex.index.add_programs("yeswehack", ratelimit.token_key(token), programs)
+    progress.emit("page", platform="yeswehack", page=page)
+    return data
+
+async def fetch_program_detail(token, company_slug, public=False):
+    return await store.snapshot_scopes(
+        "yeswehack", company_slug, ratelimit.token_key(token), public,
+        lambda: _fetch_detail(token, company_slug),
+        from_stored=stored_detail,
+    )
+
+def stored_detail(program, scopes):
+    return {**program["detail"], "scopes": scopes}
+
+def record_key(raw):
+    # See hackerone.record_key.
+    return {"handle": raw["program"]["slug"], "scoped": raw["detail"] is not None}
+
+def stored_record(key, program, scopes):
+    return {"program": program["raw"], "detail": stored_detail(program, scopes) if scopes is not None else None}
+
+async def _fetch_detail(token, company_slug):
     url = YESWEHACK_PROGRAM_BASE_ENDPOINT + company_slug
     headers = {"Authorization": f"Bearer {token}"}
 
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        logging.fatal(f"HTTP request failed: {e}")
-        return None
+    response = await client.get(url, headers=headers, cache_ttl=cache.SCOPE_TTL)
+    response.raise_for_status()
 
     data = response.json()
+    if response.from_cache:
+        return data, None
+    detail = {key: value for key, value in data.items() if key != 'scopes'}
+    scopes = [normalize_scope(scope) for scope in data['scopes']]
+    return data, (company_slug, {"detail": detail}, scopes)
+
+def shape_scope(data, categories):
+    # The scopes of a program detail in the selected categories.
     scopes = data['scopes']
 
     pdata = {'InScope': []}
@@ -51,78 +105,70 @@ def get_program_scope(token, company_slug, categories):
             })
     return pdata
 
-def get_all_programs_scope(token, bbp_only, pvt_only, categories):
-    programs = []
-    page = 1
-    nb_pages = 2
-
-    while page <= nb_pages:
+async def iter_program_items(token):
+    # Listing items in page order. The first page tells how many pages there
+    # are; the rest are then requested together.
+    data = await fetch_programs_page(token, 1)
+    for item in data['items']:
+        yield item
+
+    pages = range(2, data['pagination']['nb_pages'] + 1)
+    async for data in client.stream_limited(lambda page: fetch_programs_page(token, page), pages, LISTING_WORKERS):
+        for item in data['items']:
+            yield item
+
+def is_listed(item, bbp_only, pvt_only):
+    return (not pvt_only or (pvt_only and not item['public'])) and (not bbp_only or (bbp_only and item['bounty']))
+
+async def iter_raw(token, workers=DETAIL_WORKERS):
+    # The raw crawl every YesWeHack view is taken from: each listing item with
+    # its program detail, None when it could not be fetched. Details are
+    # fetched while the listing is still paging.
+    async def collect_program(item):
         try:
-            response = requests.get(f"{YESWEHACK_PROGRAMS_ENDPOINT}?page={page}", headers={"Authorization": f"Bearer {token}"})
-            response.raise_for_status()
-        except requests.RequestException as e:
+            detail = await fetch_program_detail(token, item['slug'], item['public'])
+        except client.RequestError as e:
             logging.fatal(f"HTTP request failed: {e}")
-            return []
-
-        data = response.json()
-        items = data['items']
-        pagination = data['pagination']
-        nb_pages = pagination['nb_pages']
-
-        for item in items:
-            if not pvt_only or (pvt_only and not item['public']):
-                if not bbp_only or (bbp_only and item['bounty']):
-                    pdata = get_program_scope(token, item['slug'], categories)
-                    pdata["Title"] = item['title']
-                    pdata["Program Handle"] = item['slug']
-                    pdata["Program Type"] = ("Public" if item["public"] else "False")
-                    # pdata["Creation Date"] = item['event']
-                    pdata["Bounty"] = item['bounty']
-                    if item['bounty']:
-                        pdata["Bounty Minimum"] = item['bounty_reward_min']
-                        pdata["Bounty Maximum"] = item['bounty_reward_max']
-                        # pdata["Reward Grid Default"] = item.get('reward_grid_default', {})
-                    if pdata:
-                        programs.append(pdata)
-
-        page += 1
-
-    return programs
-
-def yeswehack_wildcard_programs(token, vdp, hidden, categories):
-    programs = []
-    page = 1
-    nb_pages = 2
-
-    while page <= nb_pages:
-        try:
-            response = requests.get(f"{YESWEHACK_PROGRAMS_ENDPOINT}?page={page}", headers={"Authorization": f"Bearer {token}"})
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logging.fatal(f"HTTP request failed: {e}")
-            return []
-
-        data = response.json()
-        items = data['items']
-        pagination = data['pagination']
-        nb_pages = pagination['nb_pages']
-
-        for item in items:
-            if not hidden or (hidden and not item['public']):
-                if not vdp or (vdp and item['bounty']):
-                    scope_data = get_program_scope(token, item['slug'], categories)
-                    if scope_data and scope_data['InScope']:
-                        pdata = {
-                            "Title": item['title'],
-                            "Bounty": item['bounty'],
-                            "Program Type": ("Public" if item["public"] else "False")
-                        }
-                        if item['bounty']:
-                            pdata["Bounty Minimum"] = item['bounty_reward_min']
-                            pdata["Bounty Maximum"] = item['bounty_reward_max']
-                        pdata['InScope'] = scope_data['InScope']
-                        programs.append(pdata)
-
-        page += 1
-
-    return programs
+            detail = None
+        finally:
+            progress.emit("program", platform="yeswehack", program=item['slug'])
+        return {"program": item, "detail": detail}
+
+    async for raw in client.pipeline(collect_program, iter_program_items(token), workers):
+        yield raw
+
+def iter_all_programs_scope(token, bbp_only, pvt_only, categories):
+    return filters.viewed(iter_raw(token), all_programs_view, bbp_only, pvt_only, categories)
+
+def all_programs_view(raw, bbp_only, pvt_only, categories):
+    item = raw["program"]
+    if not is_listed(item, bbp_only, pvt_only) or raw["detail"] is None:
+        return None
+    pdata = shape_scope(raw["detail"], categories)
+    pdata["Title"] = item['title']
+    pdata["Program Handle"] = item['slug']
+    pdata["Program Type"] = ("Public" if item["public"] else "False")
+    # pdata["Creation Date"] = item['event']
+    pdata["Bounty"] = item['bounty']
+    if item['bounty']:
+        pdata["Bounty Minimum"] = item['bounty_reward_min']
+        pdata["Bounty Maximum"] = item['bounty_reward_max']
+        # pdata["Reward Grid Default"] = item.get('reward_grid_default', {})
+    return pdata
+
+def wildcard_programs_view(raw, vdp, hidden, categories):
+    item = raw["program"]
+    if not is_listed(item, vdp, hidden) or raw["detail"] is None:
+        return None
+    scope_data = shape_scope(raw["detail"], categories)
+    if scope_data['InScope']:
+        pdata = {
+            "Title": item['title'],
+            "Bounty": item['bounty'],
+            "Program Type": ("Public" if item["public"] else "False")
+        }
+        if item['bounty']:
+            pdata["Bounty Minimum"] = item['bounty_reward_min']
+            pdata["Bounty Maximum"] = item['bounty_reward_max']
+        pdata['InScope'] = scope_data['InScope']
+        return pdata
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from modules import bugcrowd, cache, client, hostindex, progress, scheduler, store
+
+
+class FakeResponse:
+    def __init__(self, url, status, text, headers=None):
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self._text = text
+
+    async def text(self):
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    # Stands in for the pooled aiohttp session, answering each GET with the
+    # next (status, text, headers) queued for its URL.
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+        self.closed = False
+
+    def get(self, url, headers=None, auth=None, params=None):
+        self.calls.append(url)
+        reply = self.replies[url]
+        if isinstance(reply, Exception):
+            raise reply
+        status, text, reply_headers = reply.pop(0) if isinstance(reply, list) else reply
+        return FakeResponse(url, status, text, reply_headers)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(cache, "responses", cache.TTLCache(cache.MAX_ENTRIES, cache.SCOPE_TTL))
+    fake = FakeSession({})
+
+    async def get_session():
+        await asyncio.sleep(0)
+        return fake
+
+    monkeypatch.setattr(client, "get_session", get_session)
+    return fake
+
+
+class FakeCrawl:
+    # Stands in for bugcrowd.iter_raw: yields one raw record per program
+    # handle, waiting for release before each when gated.
+    def __init__(self, handles):
+        self.__name__ = "iter_raw"
+        self.handles = handles
+        self.runs = 0
+        self.error = None
+        self.gate = None
+
+    async def __call__(self, token, workers=None):
+        self.runs += 1
+        for handle in self.handles:
+            if self.gate is not None:
+                await self.gate.wait()
+            if self.error is not None:
+                raise self.error
+            progress.emit("program", platform="bugcrowd", program=handle)
+            yield {
+                "program": {"name": handle.title(), "program_url": f"/{handle}", "participation": "public", "max_rewards": len(handle)},
+                "targets": [{"name": f"{handle}.example.com", "category": "website", "in_scope": True}],
+            }
+
+
+@pytest.fixture
+def crawl(monkeypatch):
+    fake = FakeCrawl(["acme", "globex", "initech"])
+    monkeypatch.setattr(bugcrowd, "iter_raw", fake)
+    return fake
+
+
+@pytest.fixture
+def api(monkeypatch, crawl):
+    # The app with a fresh scheduler and host index and no store, serving the
+    # fake Bugcrowd crawl at /bugcrowd/programs.
+    monkeypatch.setattr(main, "scheduler", scheduler.Scheduler())
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    store.configure(None)
+    with TestClient(main.app) as test_client:
+        yield test_client
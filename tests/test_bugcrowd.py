@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+
+from modules import bugcrowd, cache, changes, hostindex, store
+
+
+def listed(handle, participation="public", max_rewards=1000, url=None):
+    return {"name": handle.title(), "program_url": url or f"/{handle}", "participation": participation, "max_rewards": max_rewards}
+
+
+def target(name, in_scope=True, category="website"):
+    return {"name": name, "category": category, "in_scope": in_scope}
+
+
+def test_program_handle_is_the_last_url_segment():
+    assert bugcrowd.program_handle(listed("acme")) == "acme"
+    assert bugcrowd.program_handle(listed("acme", url="/engagements/acme/")) == "acme"
+
+
+def test_shape_scope_splits_targets():
+    shaped = bugcrowd.shape_scope(listed("acme", participation="invite"), [target("a.acme.com"), target("b.acme.com", in_scope=False)])
+    assert shaped == {
+        "Program Name": "Acme",
+        "Program Handle": "acme",
+        "Program Type": "Private",
+        "Max Bounty": 1000,
+        "InScope": [{"Target": "a.acme.com", "Category": "website"}],
+        "OutOfScope": [{"Target": "b.acme.com", "Category": "website"}],
+    }
+
+
+def test_programs_view_filters():
+    raw = {"program": listed("acme"), "targets": [target("a.acme.com")]}
+    assert bugcrowd.programs_view(raw, False, False)["Program Handle"] == "acme"
+    # vdp keeps bounty programs only, hidden keeps private programs only.
+    assert bugcrowd.programs_view({**raw, "program": listed("vdp", max_rewards=None)}, True, False) is None
+    assert bugcrowd.programs_view(raw, False, True) is None
+    # Programs without targets, fetched or not, are left out.
+    assert bugcrowd.programs_view({**raw, "targets": None}, False, False) is None
+    assert bugcrowd.programs_view({**raw, "targets": []}, False, False) is None
+
+
+@pytest.fixture
+def upstream(session, monkeypatch):
+    # Two listing pages and the target groups of each program, with a fresh
+    # public scope cache and no store.
+    monkeypatch.setattr(cache, "public_scopes", cache.TTLCache(cache.MAX_ENTRIES, cache.SCOPE_TTL))
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    monkeypatch.setattr(changes, "detector", changes.ChangeDetector())
+    store.configure(None)
+    session.replies[bugcrowd.BUGCROWD_PROGRAMS_ENDPOINT] = [
+        (200, json.dumps({"programs": [listed("acme"), {"name": "No URL"}], "meta": {"totalPages": 2}}), {}),
+        (200, json.dumps({"programs": [listed("globex", url="/engagements/globex")]}), {}),
+    ]
+    for path, groups in (
+        ("/acme", [{"name": "Web", "targets_url": "/acme/web"}, {"name": "Legacy", "targets_url": "/acme/legacy", "in_scope": False}]),
+        ("/engagements/globex", [{"name": "Web", "targets_url": "/globex/web"}, {"name": "No targets"}]),
+    ):
+        session.replies[f"{bugcrowd.BUGCROWD_BASE_URL}{path}/target_groups"] = (200, json.dumps({"groups": groups}), {})
+    session.replies[f"{bugcrowd.BUGCROWD_BASE_URL}/acme/web"] = (200, json.dumps({"targets": [target("a.acme.com"), {"name": ""}]}), {})
+    session.replies[f"{bugcrowd.BUGCROWD_BASE_URL}/acme/legacy"] = (200, json.dumps({"targets": [target("old.acme.com")]}), {})
+    session.replies[f"{bugcrowd.BUGCROWD_BASE_URL}/globex/web"] = (500, "", {})
+    return session
+
+
+def test_iter_raw_collects_targets_of_every_listed_program(upstream):
+    async def run():
+        return [raw async for raw in bugcrowd.iter_raw("")]
+
+    records = {bugcrowd.program_handle(raw["program"]): raw["targets"] for raw in asyncio.run(run())}
+    assert records["acme"] == [
+        {**target("a.acme.com"), "group": "Web"},
+        {**target("old.acme.com"), "in_scope": False, "group": "Legacy"},
+    ]
+    # A program whose targets could not be fetched is kept without them.
+    assert records == {"acme": records["acme"], "globex": None}
@@ -0,0 +1,82 @@
+import asyncio
+
+from modules import cache, client
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    entries = cache.TTLCache(10, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=5)
+
+    clock.now += 10
+    assert entries.get("a") == 1
+    assert entries.get("b") is None
+    assert len(entries) == 1
+
+
+def test_least_recently_used_is_evicted():
+    entries = cache.TTLCache(2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert (entries.get("a"), entries.get("c")) == (1, 3)
+
+
+def test_byte_bound():
+    entries = cache.TTLCache(10, ttl=60, maxbytes=10, sizeof=len)
+    entries.set("a", "xxxx")
+    entries.set("b", "xxxx")
+    assert entries.size == 8
+
+    # Going over the byte bound evicts from the least recently used end.
+    entries.set("c", "xxxx")
+    assert entries.get("a") is None
+    assert entries.size == 8
+
+    # Replacing an entry accounts for the size it had.
+    entries.set("b", "x")
+    assert entries.size == 5
+    assert entries.pop("c") == "xxxx"
+    assert entries.size == 1
+
+
+def test_value_larger_than_the_cache_is_not_kept():
+    entries = cache.TTLCache(10, ttl=60, maxbytes=10, sizeof=len)
+    entries.set("a", "xxxx")
+    entries.set("big", "x" * 11)
+    assert entries.get("big") is None
+    assert entries.get("a") == "xxxx"
+
+
+def test_expired_entries_give_back_their_size(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    entries = cache.TTLCache(10, ttl=60, maxbytes=10, sizeof=len)
+    entries.set("a", "xxxx")
+    clock.now += 61
+    assert entries.get("a") is None
+    assert entries.size == 0
+
+
+def test_listings_are_cached_per_credential(session):
+    url = "https://api.example.com/programs"
+    session.replies[url] = (200, "[]", {})
+
+    async def scenario():
+        for token in ("alice", "alice", "bob"):
+            await client.get(url, headers={"Authorization": token}, cache_ttl=cache.LISTING_TTL)
+
+    asyncio.run(scenario())
+    assert len(session.calls) == 2
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from modules import changes, store
+
+
+def scope(asset, asset_type="URL", in_scope=True):
+    return {"asset": asset, "type": asset_type, "in_scope": in_scope}
+
+
+@pytest.fixture
+def db():
+    database = store.configure("mongomock://", "phoenixscope_test")
+    yield database
+    database.client.drop_database("phoenixscope_test")
+    store.configure(None)
+
+
+def test_snapshot_hash_ignores_order():
+    first = changes.ScopeSnapshot([scope("a"), scope("b")])
+    second = changes.ScopeSnapshot([scope("b"), scope("a")])
+    assert first.hash == second.hash
+    assert first.hash != changes.ScopeSnapshot([scope("a")]).hash
+
+
+def test_diff():
+    old = changes.ScopeSnapshot([scope("a"), scope("b"), scope("c")])
+    new = changes.ScopeSnapshot([scope("a"), scope("b", in_scope=False), scope("d")])
+    assert changes.diff(old, new) == {
+        "Added": [{"Asset": "d", "Type": "URL"}],
+        "Removed": [{"Asset": "c", "Type": "URL"}],
+        "Modified": [{"Asset": "b", "Type": "URL"}],
+    }
+    assert changes.diff(old, old) == {"Added": [], "Removed": [], "Modified": []}
+
+
+def test_repeated_assets_are_told_apart():
+    old = changes.ScopeSnapshot([scope("a"), scope("a", in_scope=False)])
+    new = changes.ScopeSnapshot([scope("a")])
+    assert changes.diff(old, new)["Removed"] == [{"Asset": "a", "Type": "URL"}]
+    # The same asset under another type is another item.
+    assert changes.diff(new, changes.ScopeSnapshot([scope("a", "WILDCARD")]))["Added"] == [{"Asset": "a", "Type": "WILDCARD"}]
+
+
+def test_document_round_trip():
+    snapshot = changes.ScopeSnapshot([scope("a"), scope("a"), scope("b")])
+    loaded = changes.ScopeSnapshot.from_document(snapshot.to_document())
+    assert loaded.hash == snapshot.hash
+    assert loaded.items == snapshot.items
+
+
+def test_result_hash_depends_on_order():
+    assert changes.result_hash([1, 2]) == changes.result_hash([1, 2])
+    assert changes.result_hash([1, 2]) != changes.result_hash([2, 1])
+
+
+def test_detector_feed(db):
+    detector = changes.ChangeDetector()
+    first = asyncio.run(detector.detect("hackerone", "acme", [scope("a")]))
+    assert first["Added"] == [{"Asset": "a", "Type": "URL"}]
+    # A program seen for the first time is not in the change feed.
+    assert list(detector.recent) == []
+
+    assert not any(asyncio.run(detector.detect("hackerone", "acme", [scope("a")])).values())
+    assert ("hackerone", "acme") not in detector.latest
+
+    asyncio.run(detector.detect("hackerone", "acme", [scope("a"), scope("b")]))
+    assert detector.latest[("hackerone", "acme")]["Added"] == [{"Asset": "b", "Type": "URL"}]
+    assert [entry["Program Handle"] for entry in detector.recent] == ["acme"]
+
+
+def test_detector_resumes_from_the_store(db):
+    asyncio.run(changes.ChangeDetector().detect("intigriti", "acme", [scope("a")]))
+    restarted = changes.ChangeDetector()
+    found = asyncio.run(restarted.detect("intigriti", "acme", [scope("a"), scope("b")]))
+    assert found == {"Added": [{"Asset": "b", "Type": "URL"}], "Removed": [], "Modified": []}
+
+
+def test_outdated_snapshot_is_replaced_silently(db):
+    # A snapshot stored before versioning, hashed over another item shape.
+    legacy = {"hash": "00", "items": [["a", "URL", 0, "ff"]]}
+    asyncio.run(store.save_snapshot("yeswehack", "acme", legacy))
+
+    detector = changes.ChangeDetector()
+    found = asyncio.run(detector.detect("yeswehack", "acme", [scope("a")]))
+    assert not any(found.values())
+    assert list(detector.recent) == []
+
+    stored = asyncio.run(store.load_snapshot("yeswehack", "acme"))
+    assert stored["version"] == changes.SNAPSHOT_VERSION
+    assert stored["hash"] == changes.ScopeSnapshot([scope("a")]).hash
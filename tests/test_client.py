@@ -0,0 +1,112 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from modules import client, ratelimit
+
+
+def test_get_serves_repeated_reads_from_cache(session):
+    session.replies["https://api.example.com/a"] = (200, '{"a": 1}', {})
+
+    async def scenario():
+        first = await client.get("https://api.example.com/a", cache_ttl=60)
+        second = await client.get("https://api.example.com/a", cache_ttl=60)
+        refreshed = await client.get("https://api.example.com/a", cache_ttl=60, refresh=True)
+        return first, second, refreshed
+
+    first, second, refreshed = asyncio.run(scenario())
+    assert first.json() == second.json() == {"a": 1}
+    assert (first.from_cache, second.from_cache, refreshed.from_cache) == (False, True, False)
+    assert len(session.calls) == 2
+
+
+def test_get_coalesces_identical_requests(session):
+    session.replies["https://api.example.com/a"] = (200, "{}", {})
+
+    async def scenario():
+        return await asyncio.gather(*[client.get("https://api.example.com/a") for _ in range(5)])
+
+    responses = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len(session.calls) == 1
+
+
+def test_get_wraps_connection_errors(session):
+    session.replies["https://api.example.com/a"] = aiohttp.ClientConnectionError("reset")
+    with pytest.raises(client.RequestError):
+        asyncio.run(client.get("https://api.example.com/a"))
+
+
+def test_get_retries_throttled_responses(session, monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0.0)
+    session.replies["https://api.example.com/a"] = [
+        (429, "", {"Retry-After": "0"}),
+        (200, "{}", {}),
+    ]
+
+    response = asyncio.run(client.get("https://api.example.com/a"))
+    assert response.status_code == 200
+    assert not response.throttled
+    assert len(session.calls) == 2
+
+
+def test_raise_for_refusal():
+    client.Response("u", 404, {}, "").raise_for_refusal()
+    with pytest.raises(client.HTTPError):
+        client.Response("u", 401, {}, "").raise_for_refusal()
+
+    throttled = client.Response("u", 200, {}, "")
+    throttled.throttled = True
+    with pytest.raises(client.HTTPError):
+        throttled.raise_for_refusal()
+
+
+def test_pipeline_keeps_item_order_and_overlaps_the_listing():
+    started = []
+    listed = []
+
+    async def items():
+        for item in range(6):
+            listed.append(item)
+            await asyncio.sleep(0)
+            yield item
+
+    async def work(item):
+        started.append((item, len(listed)))
+        # Later items finish first.
+        await asyncio.sleep(0.001 * (6 - item))
+        return item * 10
+
+    async def run():
+        return [result async for result in client.pipeline(work, items(), 3)]
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40, 50]
+    # The first call starts while the listing is still coming in.
+    assert started[0][1] < len(listed)
+
+
+def test_pipeline_cancels_pending_calls_when_the_consumer_stops():
+    cancelled = []
+
+    async def items():
+        for item in range(5):
+            yield item
+
+    async def work(item):
+        try:
+            await asyncio.sleep(0.001 if item == 0 else 1)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+        return item
+
+    async def run():
+        results = client.pipeline(work, items(), 3)
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert asyncio.run(run()) == 0
+    assert sorted(cancelled) == [1, 2]
@@ -0,0 +1,105 @@
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+
+import pytz
+
+from modules import filters
+
+CUTOFF = datetime(2025, 1, 1, tzinfo=pytz.utc)
+OLD = "2024-06-01T00:00:00.000Z"
+NEW = "2025-02-01T00:00:00.000Z"
+FLAGS = list(itertools.product([False, True], repeat=5))
+
+
+def program(state, bounty, started=OLD):
+    return {"attributes": {"state": state, "offers_bounties": bounty, "started_accepting_at": started}}
+
+
+PROGRAMS = [
+    program(state, bounty, started)
+    for state in ("public_mode", "soft_launched", "open")
+    for bounty in (False, True)
+    for started in (OLD, NEW, None)
+]
+SCOPES = [
+    ([], []),
+    ([{"Asset": "a", "Last Updated": OLD}], []),
+    ([], [{"Asset": "b", "Last Updated": OLD}]),
+    ([{"Asset": "a", "Last Updated": NEW}], []),
+    ([], [{"Asset": "b", "Last Updated": NEW}]),
+]
+
+
+# The branches of the per-flag if/else cascades the compiled filters replaced.
+
+def original_h1(private, reward, wildcard, mobile_app, url, item, in_scope, out_scope):
+    attributes = item["attributes"]
+    if private:
+        if attributes["state"] != "soft_launched":
+            return None
+    elif attributes["state"] != "public_mode":
+        return None
+    if reward and not attributes["offers_bounties"]:
+        return None
+    if private and wildcard and not url and not mobile_app and not reward:
+        return (in_scope, []) if in_scope else None
+    return (in_scope, out_scope) if in_scope or out_scope else None
+
+
+def original_h1_recent(private, reward, wildcard, mobile_app, url, item, in_scope, out_scope):
+    attributes = item["attributes"]
+    public = attributes["state"] == "public_mode"
+    scope_flag = wildcard or url or mobile_app
+    if (private or not scope_flag) and public:
+        return False
+    if reward and not attributes["offers_bounties"]:
+        return False
+    if not (in_scope or out_scope):
+        return False
+    created = filters.parse_date(attributes["started_accepting_at"])
+    created_recently = created is not None and created >= CUTOFF
+    if private and not reward and not scope_flag:
+        return created_recently
+    return created_recently or any(
+        filters.parse_date(entry["Last Updated"]) >= CUTOFF for entry in in_scope + out_scope
+    )
+
+
+def compiled(program_filter, item, in_scope, out_scope):
+    if not program_filter.matches_program(item) or not program_filter.matches_scope(item, in_scope, out_scope):
+        return None
+    return (in_scope, out_scope if program_filter.include_out_of_scope else [])
+
+
+def test_h1_filter_matches_original_cascade():
+    for flags in FLAGS:
+        program_filter = filters.compile_h1_filter(*flags)
+        for item, (in_scope, out_scope) in itertools.product(PROGRAMS, SCOPES):
+            assert compiled(program_filter, item, in_scope, out_scope) == original_h1(*flags, item, in_scope, out_scope), (flags, item, in_scope, out_scope)
+
+
+def test_h1_recent_filter_matches_original_cascade():
+    for flags in FLAGS:
+        program_filter = filters.compile_h1_recent_filter(*flags, CUTOFF)
+        for item, (in_scope, out_scope) in itertools.product(PROGRAMS, SCOPES):
+            matched = compiled(program_filter, item, in_scope, out_scope) is not None
+            assert matched == original_h1_recent(*flags, item, in_scope, out_scope), (flags, item, in_scope, out_scope)
+
+
+def test_parse_date_defaults_to_utc():
+    assert filters.parse_date("2025-01-01T00:00:00") == CUTOFF
+    assert filters.parse_date("2025-01-01T01:00:00+01:00") == CUTOFF
+    assert filters.parse_date(None) is None
+    assert filters.created_since(CUTOFF + timedelta(days=1))(program("open", False, NEW))
+
+
+def test_viewed_drops_unmatched_records():
+    async def records():
+        for number in range(5):
+            yield number
+
+    async def collect():
+        return [item async for item in filters.viewed(records(), lambda number, minimum: number * 10 if number >= minimum else None, 3)]
+
+    assert asyncio.run(collect()) == [30, 40]
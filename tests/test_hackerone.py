@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from modules import client, hackerone, hostindex
+
+
+def listed(handle, state="public_mode", bounty=True):
+    return {"attributes": {
+        "handle": handle, "name": handle.title(), "state": state,
+        "offers_bounties": bounty, "started_accepting_at": "2024-06-01T00:00:00.000Z",
+    }}
+
+
+def structured_scope(asset, asset_type="URL", eligible=True):
+    return {"attributes": {
+        "asset_identifier": asset, "asset_type": asset_type,
+        "eligible_for_submission": eligible, "updated_at": "2024-06-01T00:00:00.000Z",
+    }}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # A listing served in listing order, and the handles whose scope was
+    # fetched.
+    listing = []
+    fetched = []
+
+    async def list_programs(auth, refresh=False):
+        return list(listing)
+
+    async def fetch_structured_scopes(program_handle, auth, refresh=False, public=False):
+        fetched.append(program_handle)
+        return [structured_scope(f"{program_handle}.example.com")]
+
+    monkeypatch.setattr(hackerone, "list_programs", list_programs)
+    monkeypatch.setattr(hackerone, "fetch_structured_scopes", fetch_structured_scopes)
+    return listing, fetched
+
+
+def collect(items):
+    async def run():
+        return [item async for item in items]
+    return asyncio.run(run())
+
+
+def test_raw_crawl_fetches_every_shown_program(upstream):
+    listing, fetched = upstream
+    listing += [listed("acme"), listed("vdp", bounty=False), listed("hidden", state="soft_launched")]
+
+    records = collect(hackerone.iter_raw("alice", "token"))
+    assert [record["program"]["attributes"]["handle"] for record in records] == ["hidden", "vdp", "acme"]
+    assert sorted(fetched) == ["acme", "hidden", "vdp"]
+
+
+def test_single_filter_crawl_skips_scopes_it_cannot_show(upstream):
+    listing, fetched = upstream
+    listing += [listed("acme"), listed("vdp", bounty=False), listed("hidden", state="soft_launched")]
+
+    items = collect(hackerone.iter_h1_programs("alice", "token", False, True, False, False, True))
+    assert [item["Program Handle"] for item in items] == ["acme"]
+    assert items[0]["Program In-Scope Items"][0]["Asset"] == "acme.example.com"
+    assert fetched == ["acme"]
+
+
+def test_failed_listing_page_fails_the_crawl(session, monkeypatch):
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    for page in range(hackerone.LISTING_BATCH):
+        reply = (500, "", {}) if page == 1 else (200, json.dumps({"data": [listed(f"p{page}")] if page == 0 else []}), {})
+        session.replies[f"https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={page}"] = reply
+
+    with pytest.raises(client.HTTPError):
+        collect(hackerone.iter_raw("alice", "token"))
+
+
+def scope_pages(session, program_handle, replies):
+    # Queues one reply per page number of the program's scope.
+    for page, reply in replies.items():
+        session.replies[hackerone.scope_page_url(program_handle, page)] = reply
+
+
+def scope_body(assets, total=None, next_url=None):
+    body = {"data": [structured_scope(asset) for asset in assets], "links": {"next": next_url} if next_url else {}}
+    if total is not None:
+        body["meta"] = {"total_count": total}
+    return (200, json.dumps(body), {})
+
+
+def fetch_scope_pages(program_handle):
+    return asyncio.run(hackerone._fetch_scope_pages(program_handle, ("alice", "token"), False))
+
+
+def test_scope_pages_counted_by_total_are_fetched_together(session):
+    assets = [f"{n}.acme.com" for n in range(hackerone.SCOPE_PAGE_SIZE + 1)]
+    scope_pages(session, "acme", {
+        1: scope_body(assets[:-1], total=len(assets)),
+        2: scope_body(assets[-1:], total=len(assets)),
+    })
+
+    scopes, fresh = fetch_scope_pages("acme")
+    assert [scope["attributes"]["asset_identifier"] for scope in scopes] == assets
+    assert fresh[0] == "acme" and len(fresh[2]) == len(assets)
+
+
+def test_scope_pages_without_a_total_follow_links(session):
+    scope_pages(session, "acme", {
+        1: scope_body(["a.acme.com"], next_url="https://api.hackerone.com/next-2"),
+    })
+    session.replies["https://api.hackerone.com/next-2"] = scope_body(["b.acme.com"], next_url="https://api.hackerone.com/next-3")
+    session.replies["https://api.hackerone.com/next-3"] = scope_body(["c.acme.com"])
+
+    scopes, _ = fetch_scope_pages("acme")
+    assert [scope["attributes"]["asset_identifier"] for scope in scopes] == ["a.acme.com", "b.acme.com", "c.acme.com"]
+    assert session.calls[1:] == ["https://api.hackerone.com/next-2", "https://api.hackerone.com/next-3"]
+
+
+def test_scope_missing_a_page_is_not_served(session):
+    scope_pages(session, "acme", {
+        1: scope_body(["a.acme.com"], total=2 * hackerone.SCOPE_PAGE_SIZE),
+        2: (404, "", {}),
+    })
+    assert fetch_scope_pages("acme") == (None, None)
+
+    scope_pages(session, "globex", {1: scope_body(["a.globex.com"], next_url="https://api.hackerone.com/gone")})
+    session.replies["https://api.hackerone.com/gone"] = (404, "", {})
+    assert fetch_scope_pages("globex") == (None, None)
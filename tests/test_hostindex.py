@@ -0,0 +1,121 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from modules import hostindex, ratelimit
+
+
+def scope(asset, asset_type, in_scope=True):
+    return {"asset": asset, "type": asset_type, "in_scope": in_scope}
+
+
+def build():
+    index = hostindex.HostIndex()
+    index.add_programs("hackerone", "alice", [
+        {"handle": "acme", "name": "Acme", "private": False},
+        {"handle": "secret", "name": "Secret", "private": True},
+    ])
+    index.add_scopes("hackerone", "acme", "alice", [
+        scope("*.acme.com", "WILDCARD"),
+        scope("admin.acme.com", "URL", in_scope=False),
+        scope("https://api.acme.io/v1", "URL"),
+        scope("10.0.0.0/24", "CIDR"),
+    ])
+    index.add_scopes("hackerone", "secret", "alice", [scope("*.acme.com", "WILDCARD")])
+    return index
+
+
+def test_wildcards_cover_subdomains_only():
+    index = build()
+    assert [match["Asset"] for match in index.lookup("www.acme.com")] == ["*.acme.com"]
+    assert [match["Asset"] for match in index.lookup("a.b.acme.com")] == ["*.acme.com"]
+    assert index.lookup("acme.com") == []
+    assert [match["Asset"] for match in index.lookup("https://api.acme.io/v2?x=1")] == ["https://api.acme.io/v1"]
+    assert index.lookup("not a host") == []
+
+
+def test_private_programs_need_an_owner():
+    index = build()
+    assert {match["Program Handle"] for match in index.lookup("www.acme.com")} == {"acme"}
+    assert {match["Program Handle"] for match in index.lookup("www.acme.com", {"alice"})} == {"acme", "secret"}
+
+
+def test_rescoping_replaces_previous_entries():
+    index = build()
+    index.add_scopes("hackerone", "acme", "alice", [scope("*.acme.net", "WILDCARD")])
+    assert index.lookup("www.acme.com") == []
+    assert [match["Asset"] for match in index.lookup("www.acme.net")] == ["*.acme.net"]
+
+
+def test_load_matches_the_indexed_scopes():
+    loaded = hostindex.HostIndex()
+    loaded.load(
+        [{"platform": "hackerone", "handle": "acme", "name": "Acme", "private": True, "owners": ["alice"]}],
+        [{"platform": "hackerone", "handle": "acme", **scope("*.acme.com", "WILDCARD")}],
+    )
+    assert loaded.lookup("www.acme.com") == []
+    assert [match["Program Handle"] for match in loaded.lookup("www.acme.com", {"alice"})] == ["acme"]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    index = build()
+    index.add_programs("hackerone", ratelimit.token_key("bob", "t"), [{"handle": "secret", "name": "Secret", "private": True}])
+    monkeypatch.setattr(hostindex, "index", index)
+    return TestClient(main.app)
+
+
+def test_lookup_endpoints(api):
+    matches = api.get("/lookup", params={"host": "www.acme.com"}).json()["Matches"]
+    assert [match["Program Handle"] for match in matches] == ["acme"]
+
+    owned = api.get("/lookup", params={"host": "www.acme.com", "username": "bob", "token": "t"}).json()["Matches"]
+    assert {match["Program Handle"] for match in owned} == {"acme", "secret"}
+
+    body = api.post("/lookup", json={"hosts": ["www.acme.com", "example.org"]}).json()
+    assert list(body["Matches"]) == ["www.acme.com", "example.org"]
+    assert body["Matches"]["example.org"] == []
+
+
+def test_classify_prefers_out_of_scope_within_a_program():
+    index = build()
+    assert index.classify("admin.acme.com")["State"] == "Out-of-Scope"
+    assert index.classify("www.acme.com")["State"] == "In-Scope"
+    assert index.classify("example.org") == {"Host": "example.org", "State": "No Match", "Programs": []}
+
+
+def test_classify_is_in_scope_if_any_program_says_so():
+    index = build()
+    index.add_programs("intigriti", "alice", [{"handle": "other", "name": "Other", "private": False}])
+    index.add_scopes("intigriti", "other", "alice", [scope("admin.acme.com", "Url")])
+
+    classified = index.classify("admin.acme.com")
+    assert classified["State"] == "In-Scope"
+    assert {program["Program Handle"]: program["State"] for program in classified["Programs"]} == {
+        "acme": "Out-of-Scope",
+        "other": "In-Scope",
+    }
+
+
+def test_classify_endpoint_streams_one_line_per_host(api):
+    response = api.post("/lookup/classify", content=b"www.acme.com\n\nadmin.acme.com\nexample.org")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["Host"], line["State"]) for line in lines] == [
+        ("www.acme.com", "In-Scope"),
+        ("admin.acme.com", "Out-of-Scope"),
+        ("example.org", "No Match"),
+    ]
+
+
+def test_addresses_are_looked_up_in_networks():
+    index = build()
+    assert [match["Asset"] for match in index.lookup("10.0.0.5")] == ["10.0.0.0/24"]
+    assert [match["Asset"] for match in index.lookup("http://10.0.0.255:8080/")] == ["10.0.0.0/24"]
+    assert index.lookup("10.0.1.0") == []
+
+    # Rescoping drops the program's networks too.
+    index.add_scopes("hackerone", "acme", "alice", [scope("*.acme.net", "WILDCARD")])
+    assert index.lookup("10.0.0.5") == []
@@ -0,0 +1,37 @@
+from modules import ipindex
+
+
+def test_ip_ranges():
+    assert ipindex.ip_ranges("10.0.0.0/30, 192.168.1.1-3; junk") == [
+        (4, 167772160, 167772163),
+        (4, 3232235777, 3232235779),
+    ]
+    assert ipindex.ip_ranges("2001:db8::/127") == [(6, 42540766411282592856903984951653826560, 42540766411282592856903984951653826561)]
+    assert ipindex.ip_ranges("10.0.0.9-10.0.0.1") == []
+
+
+def test_parse_address():
+    assert ipindex.parse_address("10.0.0.1") == (4, 167772161)
+    assert ipindex.parse_address("https://[::1]:443/path") == (6, 1)
+    assert ipindex.parse_address("acme.com") is None
+
+
+def test_network_index_segments():
+    networks = ipindex.NetworkIndex()
+    networks.set("a", [(4, 0, 99, "a-wide"), (4, 40, 59, "a-narrow")])
+    networks.set("b", [(4, 50, 149, "b")])
+
+    assert networks.lookup((4, 10)) == ["a-wide"]
+    assert sorted(networks.lookup((4, 55))) == ["a-narrow", "a-wide", "b"]
+    assert networks.lookup((4, 120)) == ["b"]
+    assert networks.lookup((6, 55)) == []
+    assert len(networks) == 3
+
+    # Same ranges with new entries only swap the entries.
+    networks.set("b", [(4, 50, 149, "b-renamed")])
+    assert networks.lookup((4, 120)) == ["b-renamed"]
+
+    networks.set("a", [])
+    assert networks.lookup((4, 10)) == []
+    assert networks.lookup((4, 55)) == ["b-renamed"]
+    assert len(networks) == 1
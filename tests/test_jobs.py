@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from modules import jobs
+
+
+@pytest.fixture
+def crawls(monkeypatch):
+    # A fake platform whose crawl yields one item per count and records every
+    # run; release lets a test hold crawls until it is ready.
+    state = {"runs": [], "release": None}
+
+    async def crawl(token, count, fail):
+        state["runs"].append((token, count, fail))
+        await state["release"].wait()
+        for number in range(count):
+            yield {"Program Handle": f"program-{number}"}
+        if fail:
+            raise RuntimeError("upstream went away")
+
+    monkeypatch.setitem(jobs.CRAWLS, "fake", (crawl, ("token",), {"count": 3, "fail": False}))
+    return state
+
+
+def run(crawls, scenario):
+    async def main():
+        crawls["release"] = asyncio.Event()
+        manager = jobs.JobManager()
+        try:
+            return await scenario(manager, crawls["release"])
+        finally:
+            await manager.stop()
+    return asyncio.run(main())
+
+
+async def settle(job):
+    while not job.finished():
+        await asyncio.sleep(0)
+
+
+def test_job_runs_and_pages_results(crawls):
+    async def scenario(manager, release):
+        job = manager.submit("fake", {"count": 3}, {"token": "t"})
+        assert job.status()["State"] == "queued"
+        release.set()
+        await settle(job)
+
+        first = manager.results(job.job_id, limit=2)
+        assert first["State"] == "completed"
+        assert [item["Program Handle"] for item in first["Results"]] == ["program-0", "program-1"]
+        assert first["Next Offset"] == 2
+        assert manager.results(job.job_id, offset=2)["Next Offset"] is None
+        assert job.status()["Progress"]["matched"] == 3
+
+    run(crawls, scenario)
+
+
+def test_identical_jobs_share_one_crawl(crawls):
+    async def scenario(manager, release):
+        first = manager.submit("fake", {"count": 2}, {"token": "t"})
+        second = manager.submit("fake", {"count": 2}, {"token": "t"})
+        other = manager.submit("fake", {"count": 1}, {"token": "t"})
+        release.set()
+        for job in (first, second, other):
+            await settle(job)
+
+        assert first.crawl is second.crawl
+        assert other.crawl is not first.crawl
+        assert sorted(crawls["runs"]) == [("t", 1, False), ("t", 2, False)]
+
+    run(crawls, scenario)
+
+
+def test_failed_crawl_keeps_its_results(crawls):
+    async def scenario(manager, release):
+        job = manager.submit("fake", {"count": 1, "fail": True}, {"token": "t"})
+        release.set()
+        await settle(job)
+
+        status = job.status()
+        assert status["State"] == "failed"
+        assert status["Error"] == "upstream went away"
+        assert status["Results"] == 1
+
+    run(crawls, scenario)
+
+
+def test_cancel_stops_a_crawl_nobody_follows(crawls):
+    async def scenario(manager, release):
+        first = manager.submit("fake", {}, {"token": "t"})
+        second = manager.submit("fake", {}, {"token": "t"})
+        await asyncio.sleep(0)
+        crawl = first.crawl
+
+        await manager.cancel(first.job_id)
+        assert first.status()["State"] == "cancelled"
+        assert not crawl.task.done()
+
+        await manager.cancel(second.job_id)
+        assert crawl.task.done()
+        assert crawl.state == "cancelled"
+
+    run(crawls, scenario)
+
+
+def test_follow_yields_until_finished(crawls):
+    async def scenario(manager, release):
+        job = manager.submit("fake", {"count": 2}, {"token": "t"})
+        release.set()
+        return [status["State"] async for status in manager.follow(job.job_id)]
+
+    states = run(crawls, scenario)
+    assert states[0] == "queued"
+    assert states[-1] == "completed"
+
+
+@pytest.mark.parametrize("platform, filters, credentials, status_code", [
+    ("nowhere", {}, {"token": "t"}, 400),
+    ("fake", {"unknown": True}, {"token": "t"}, 400),
+    ("fake", {"count": "3"}, {"token": "t"}, 400),
+    ("fake", {}, {}, 400),
+    ("yeswehack", {"categories": "websites"}, {"token": "t"}, 400),
+])
+def test_invalid_submissions(crawls, platform, filters, credentials, status_code):
+    async def scenario(manager, release):
+        with pytest.raises(jobs.JobError) as error:
+            manager.submit(platform, filters, credentials)
+        assert error.value.status_code == status_code
+
+    run(crawls, scenario)
+
+
+def test_pending_jobs_are_limited_per_credential(crawls, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_PENDING_PER_USER", 2)
+
+    async def scenario(manager, release):
+        manager.submit("fake", {"count": 1}, {"token": "t"})
+        manager.submit("fake", {"count": 2}, {"token": "t"})
+        with pytest.raises(jobs.JobError) as error:
+            manager.submit("fake", {"count": 3}, {"token": "t"})
+        assert error.value.status_code == 429
+        manager.submit("fake", {"count": 3}, {"token": "other"})
+
+    run(crawls, scenario)
+
+
+def test_unknown_job(crawls):
+    async def scenario(manager, release):
+        with pytest.raises(jobs.JobError) as error:
+            manager.get("missing")
+        assert error.value.status_code == 404
+
+    run(crawls, scenario)
+
+
+def test_valid_categories_are_accepted(crawls, monkeypatch):
+    monkeypatch.setitem(jobs.CRAWLS, "yeswehack", (jobs.CRAWLS["fake"][0], ("token",), {"categories": "all"}))
+
+    async def scenario(manager, release):
+        assert manager.submit("yeswehack", {"categories": "Mobile"}, {"token": "t"}).status()["State"] == "queued"
+
+    run(crawls, scenario)
@@ -0,0 +1,52 @@
+from modules import models
+
+
+def test_asset_kinds_per_platform():
+    assert models.asset_kind("hackerone", "CIDR", "10.0.0.0/8") is models.AssetKind.NETWORK
+    assert models.asset_kind(models.Platform.INTIGRITI, "Wildcard", "*.acme.com") is models.AssetKind.WILDCARD
+    assert models.asset_kind(models.Platform.YESWEHACK, "web-application", "*.acme.com") is models.AssetKind.WILDCARD
+    assert models.asset_kind(models.Platform.BUGCROWD, "website", "acme.com") is models.AssetKind.URL
+    assert models.asset_kind(models.Platform.HACKERONE, "NEW_TYPE", "acme") is models.AssetKind.OTHER
+
+
+def test_program_records():
+    program = models.Program("hackerone", "acme")
+    program.update({"handle": "acme", "name": "Acme", "private": False, "bounty": True, "max_bounty": 500})
+    # Later listings only change the attributes they carry.
+    program.update({"handle": "acme", "private": True})
+    program.set_scopes([
+        {"asset": "*.acme.com", "type": "WILDCARD", "in_scope": True, "updated_at": "2024-05-01"},
+        {"asset": "admin.acme.com", "type": "URL", "in_scope": False, "updated_at": "2024-06-01"},
+    ])
+
+    assert (program.name, program.private, program.max_bounty) == ("Acme", True, 500)
+    assert program.updated_at == "2024-06-01"
+    assert not hasattr(program, "__dict__")
+
+    shaped = models.program_to_dict(program)
+    assert shaped["Platform"] == "hackerone"
+    assert shaped["Program Type"] == "Private"
+    assert [item["Asset"] for item in shaped["In Scope"]] == ["*.acme.com"]
+    assert shaped["Out of Scope"][0]["Kind"] == "url"
+
+
+def test_scope_types_are_interned():
+    first = models.Program("intigriti", "a")
+    second = models.Program("intigriti", "b")
+    first.set_scopes([{"asset": "a.com", "type": "".join(["U", "rl"]), "in_scope": True}])
+    second.set_scopes([{"asset": "b.com", "type": "".join(["Ur", "l"]), "in_scope": True}])
+    assert first.scopes[0].type is second.scopes[0].type
+
+
+def test_scope_to_match():
+    program = models.Program("bugcrowd", "acme")
+    program.update({"name": "Acme"})
+    program.set_scopes([{"asset": "acme.com", "type": "website", "in_scope": False}])
+    assert models.scope_to_match(program.scopes[0]) == {
+        "Platform": "bugcrowd",
+        "Program Handle": "acme",
+        "Program Name": "Acme",
+        "Asset": "acme.com",
+        "Type": "website",
+        "State": "Out-of-Scope",
+    }
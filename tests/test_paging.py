@@ -0,0 +1,78 @@
+import pytest
+
+from modules import paging
+
+ITEMS = [
+    {"Program Handle": "delta", "Max Bounty": 500, "Program Type": "Public"},
+    {"Program Handle": "alpha", "Max Bounty": None, "Program Type": "Private"},
+    {"Program Handle": "charlie", "Max Bounty": 1000, "Program Type": "Public"},
+    {"Program Handle": "bravo", "Max Bounty": 500, "Program Type": "Private"},
+    {"Program Handle": "echo", "Program Type": "Public"},
+]
+
+
+def handles(page):
+    return [item["Program Handle"] for item in page]
+
+
+def walk(sort, limit):
+    # Every page of a listing, following the cursors.
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = paging.paginate(ITEMS, sort=sort, cursor=cursor, limit=limit)
+        pages.append(handles(page))
+        if cursor is None:
+            return pages
+
+
+def test_without_paging_the_list_is_unchanged():
+    assert paging.paginate(ITEMS) == (ITEMS, None)
+
+
+def test_pages_follow_the_sort_order():
+    assert walk("Max Bounty", 2) == [["bravo", "delta"], ["charlie", "alpha"], ["echo"]]
+    assert walk("-Max Bounty", 2) == [["charlie", "delta"], ["bravo", "echo"], ["alpha"]]
+    assert walk(None, 2) == [["alpha", "bravo"], ["charlie", "delta"], ["echo"]]
+
+
+def test_cursor_survives_changed_lists():
+    page, cursor = paging.paginate(ITEMS, sort="Program Handle", limit=2)
+    assert handles(page) == ["alpha", "bravo"]
+
+    # Programs added or dropped before the cursor do not shift the next page.
+    changed = [{"Program Handle": "aardvark"}] + [item for item in ITEMS if item["Program Handle"] != "alpha"]
+    page, _ = paging.paginate(changed, sort="Program Handle", cursor=cursor, limit=2)
+    assert handles(page) == ["charlie", "delta"]
+
+
+def test_fields_project_items():
+    page, _ = paging.paginate(ITEMS, limit=1, fields="Program Handle, Missing")
+    assert page == [{"Program Handle": "alpha"}]
+    assert paging.parse_fields("") is None
+    assert paging.project(["not", "a", "dict"], ["Program Handle"]) == ["not", "a", "dict"]
+
+
+def test_invalid_requests():
+    with pytest.raises(paging.PagingError):
+        paging.paginate(ITEMS, limit=0)
+    with pytest.raises(paging.PagingError):
+        paging.paginate(ITEMS, limit=paging.MAX_LIMIT + 1)
+    with pytest.raises(paging.PagingError):
+        paging.paginate(ITEMS, cursor="not a cursor", limit=1)
+
+    _, cursor = paging.paginate(ITEMS, sort="Program Handle", limit=1)
+    with pytest.raises(paging.PagingError):
+        paging.paginate(ITEMS, sort="Max Bounty", cursor=cursor, limit=1)
+
+
+def test_program_endpoint_pages_by_cursor(api):
+    params = {"limit": 2, "fields": "Program Handle", "sort": "-Max Bounty"}
+    first = api.get("/bugcrowd/programs", params=params).json()
+    assert first["Programs"] == [{"Program Handle": "initech"}, {"Program Handle": "globex"}]
+
+    second = api.get("/bugcrowd/programs", params={**params, "cursor": first["Next Cursor"]}).json()
+    assert second["Programs"] == [{"Program Handle": "acme"}]
+    assert second["Next Cursor"] is None
+
+    assert api.get("/bugcrowd/programs", params={"limit": 0}).status_code == 400
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from modules import client, ratelimit
+
+
+def response(status, text="", headers=None):
+    return client.Response("https://api.example.com", status, headers or {}, text)
+
+
+def test_token_key_hides_the_credential():
+    key = ratelimit.token_key("alice", "secret")
+    assert key == ratelimit.token_key("alice", "secret")
+    assert key != ratelimit.token_key("alice", "other")
+    assert "secret" not in key
+    # Missing parts are skipped rather than stringified.
+    assert ratelimit.token_key("alice", None) == ratelimit.token_key("alice")
+
+
+def test_bucket_spends_burst_then_waits():
+    async def scenario():
+        bucket = ratelimit.TokenBucket(rate=100, burst=3)
+        waits = [await bucket.acquire() for _ in range(4)]
+        return bucket, waits
+
+    bucket, waits = asyncio.run(scenario())
+    assert max(waits[:3]) < 0.005
+    assert waits[3] >= 0.005
+    assert bucket.tokens < 1
+
+
+def test_backoff_blocks_and_halves_the_rate():
+    bucket = ratelimit.TokenBucket(rate=10, burst=10)
+    bucket.backoff(5)
+    assert bucket.tokens == 0
+    assert bucket.rate == 5
+    assert bucket.blocked_until > 0
+
+    # The rate never drops below a tenth of the quota...
+    for _ in range(10):
+        bucket.backoff(0)
+    assert bucket.rate == 1
+
+    # ...and climbs back towards it on success.
+    for _ in range(100):
+        bucket.success()
+    assert bucket.rate == 10
+
+
+def test_buckets_are_per_host_and_credential():
+    async def scenario():
+        return (
+            ratelimit.get_bucket("api.hackerone.com", "a"),
+            ratelimit.get_bucket("api.hackerone.com", "a"),
+            ratelimit.get_bucket("api.hackerone.com", "b"),
+            ratelimit.get_bucket("unknown.example.com", "a"),
+        )
+
+    first, same, other, unknown = asyncio.run(scenario())
+    assert first is same
+    assert first is not other
+    assert first.max_rate == ratelimit.PLATFORM_LIMITS["api.hackerone.com"]["rate"]
+    assert unknown.max_rate == ratelimit.DEFAULT_LIMIT["rate"]
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("7", 7.0),
+    ("-3", 0.0),
+    ("soon", None),
+])
+def test_parse_retry_after(value, expected):
+    assert ratelimit.parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = ratelimit.parse_retry_after(format_datetime(retry_at, usegmt=True))
+    assert 25 < delay <= 30
+
+    past = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert ratelimit.parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_throttle_delay():
+    host = "api.hackerone.com"
+    assert ratelimit.throttle_delay(host, response(200), 0) is None
+    assert ratelimit.throttle_delay(host, response(404), 0) is None
+    assert ratelimit.throttle_delay(host, response(429, headers={"Retry-After": "4"}), 0) == 4.0
+    assert ratelimit.throttle_delay(host, response(503, headers={"Retry-After": "600"}), 0) == ratelimit.BACKOFF_MAX
+
+    # Without Retry-After the delay grows exponentially with the attempt.
+    first = ratelimit.throttle_delay(host, response(429), 0)
+    third = ratelimit.throttle_delay(host, response(429), 2)
+    assert ratelimit.BACKOFF_BASE <= first < 2 * ratelimit.BACKOFF_BASE
+    assert 4 * ratelimit.BACKOFF_BASE <= third < 5 * ratelimit.BACKOFF_BASE
+
+
+def test_throttle_delay_detects_block_pages():
+    blocked = response(200, "<html>Request blocked</html>")
+    assert ratelimit.throttle_delay("api.intigriti.com", blocked, 0) is not None
+    assert ratelimit.throttle_delay("api.hackerone.com", blocked, 0) is None
@@ -0,0 +1,128 @@
+import datetime
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from modules import hostindex, jobs, responses
+
+BODY = "x" * (2 * responses.MINIMUM_SIZE)
+
+
+def test_dumps_encodes_store_values():
+    encoded = responses.dumps({"at": datetime.date(2024, 6, 1), "owners": {"alice"}, "big": 2 ** 70})
+    assert encoded == b'{"at":"2024-06-01","owners":["alice"],"big":1180591620717411303424}'
+
+
+def test_accepted_encoding(monkeypatch):
+    assert responses.accepted_encoding("") is None
+    assert responses.accepted_encoding("gzip;q=0, identity") is None
+    assert responses.accepted_encoding("gzip, deflate") == "gzip"
+    assert responses.accepted_encoding("*") == ("br" if responses.brotli else "gzip")
+    monkeypatch.setattr(responses, "brotli", None)
+    assert responses.accepted_encoding("br, gzip;q=0.5") == "gzip"
+
+
+def application():
+    app = FastAPI()
+    app.add_middleware(responses.CompressionMiddleware)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("x", headers={"ETag": '"abc"'})
+
+    @app.get("/stream")
+    def stream():
+        async def chunks():
+            yield BODY.encode()
+            yield BODY.encode()
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_large_bodies_are_compressed(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    response = application().get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    # The coding is part of the entity tag.
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert response.text == BODY
+
+
+def test_compressed_body_round_trips():
+    assert gzip.decompress(responses.compress(BODY.encode(), "gzip")) == BODY.encode()
+    if responses.brotli is not None:
+        assert responses.brotli.decompress(responses.compress(BODY.encode(), "br")) == BODY.encode()
+
+
+def test_small_and_streamed_bodies_pass_through():
+    client = application()
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["etag"] == '"abc"'
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in streamed.headers
+    assert streamed.text == BODY * 2
+
+    plain = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def revalidate(api, url, params=None):
+    # (first response, status of a request repeating its ETag)
+    first = api.get(url, params=params)
+    again = api.get(url, params=params, headers={"If-None-Match": first.headers["etag"]})
+    return first, again.status_code
+
+
+def test_program_listing_revalidates(api):
+    first, status = revalidate(api, "/bugcrowd/programs")
+    assert first.status_code == 200 and status == 304
+
+    # Another page of the same result is another representation.
+    paged = api.get("/bugcrowd/programs", params={"limit": 1}, headers={"If-None-Match": first.headers["etag"]})
+    assert paged.status_code == 200
+
+    # A tag CompressionMiddleware gave a gzip body matches in any coding.
+    coded = first.headers["etag"][:-1] + '-gzip"'
+    assert api.get("/bugcrowd/programs", headers={"If-None-Match": coded}).status_code == 304
+
+
+def test_lookup_revalidates_until_the_index_changes(api):
+    hostindex.index.add_programs("hackerone", "alice", [{"handle": "acme", "name": "Acme", "private": False}])
+    hostindex.index.add_scopes("hackerone", "acme", "alice", [{"asset": "*.acme.com", "type": "WILDCARD", "in_scope": True}])
+    first, status = revalidate(api, "/lookup", {"host": "www.acme.com"})
+    assert status == 304
+
+    hostindex.index.add_scopes("hackerone", "acme", "alice", [{"asset": "*.acme.com", "type": "WILDCARD", "in_scope": False}])
+    changed = api.get("/lookup", params={"host": "www.acme.com"}, headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["Matches"][0]["State"] == "Out-of-Scope"
+
+
+def test_job_results_revalidate_until_results_grow(api, monkeypatch):
+    manager = jobs.JobManager()
+    monkeypatch.setattr(jobs, "manager", manager)
+    crawl = jobs.Crawl("key", "owner", "fake", {}, None)
+    crawl.state = "running"
+    crawl.results = [{"Program Handle": "acme"}]
+    job = jobs.Job(crawl)
+    manager.jobs[job.job_id] = job
+
+    url = f"/jobs/{job.job_id}/results"
+    first, status = revalidate(api, url)
+    assert status == 304
+
+    crawl.results.append({"Program Handle": "globex"})
+    grown = api.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert grown.status_code == 200
+    assert grown.json()["Total"] == 2
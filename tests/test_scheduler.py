@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from modules import bugcrowd, changes, client, hostindex, scheduler, store
+
+
+def listed(handle):
+    return {"name": handle.title(), "program_url": f"/{handle}", "participation": "public", "max_rewards": 100}
+
+
+def target(name):
+    return {"name": name, "category": "website", "in_scope": True, "group": "Web"}
+
+
+class Crawl:
+    # A stand-in for bugcrowd.iter_raw that stores what it crawls, like the
+    # real fetchers do, and fails once failing is set.
+    def __init__(self, handles):
+        self.__name__ = "iter_raw"
+        self.handles = handles
+        self.runs = 0
+        self.failing = False
+
+    async def __call__(self, token):
+        self.runs += 1
+        if self.failing:
+            raise client.RequestError("unreachable")
+        for handle in self.handles:
+            program = listed(handle)
+            targets = [target(f"{handle}.example.com")]
+            await store.save_programs("bugcrowd", "alice", [bugcrowd.normalize_program(program)])
+            await store.save_scopes("bugcrowd", handle, "alice", {}, [bugcrowd.normalize_scope(item) for item in targets])
+            yield {"program": program, "targets": targets}
+
+
+def count_view(raw):
+    count_view.calls += 1
+    return raw["program"]["name"]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    monkeypatch.setattr(changes, "detector", changes.ChangeDetector())
+    count_view.calls = 0
+    database = store.configure("mongomock://", "phoenixscope_test")
+    yield database
+    database.client.drop_database("phoenixscope_test")
+    store.configure(None)
+
+
+def latest(crawl, view=count_view, stop=True):
+    async def run():
+        instance = scheduler.Scheduler()
+        try:
+            return await instance.latest_tagged("bugcrowd", crawl, view, ("token",)), instance
+        finally:
+            if stop:
+                await instance.stop()
+    return asyncio.run(run())
+
+
+def test_views_are_cached_per_filters(db):
+    crawl = Crawl(["acme", "globex"])
+
+    async def run():
+        instance = scheduler.Scheduler()
+        first = await instance.latest_tagged("bugcrowd", crawl, count_view, ("token",))
+        again = await instance.latest_tagged("bugcrowd", crawl, count_view, ("token",))
+        await instance.stop()
+        return first, again
+
+    (items, version), again = asyncio.run(run())
+    assert items == ["Acme", "Globex"]
+    assert again == (items, version)
+    assert version == changes.result_hash(items)
+    assert count_view.calls == 2
+    assert crawl.runs == 1
+
+
+def test_failed_refresh_keeps_the_previous_result(db):
+    crawl = Crawl(["acme"])
+
+    async def run():
+        instance = scheduler.Scheduler()
+        items, _ = await instance.latest_tagged("bugcrowd", crawl, count_view, ("token",))
+        job = next(iter(instance.jobs.values()))
+        crawl.failing = True
+        await instance._crawl(job)
+        after, _ = await instance.latest_tagged("bugcrowd", crawl, count_view, ("token",))
+        await instance.stop()
+        return items, after, job.error
+
+    items, after, error = asyncio.run(run())
+    assert items == after == ["Acme"]
+    assert isinstance(error, client.RequestError)
+
+
+def test_failed_first_crawl_raises(db):
+    crawl = Crawl(["acme"])
+    crawl.failing = True
+    with pytest.raises(client.RequestError):
+        latest(crawl)
+
+
+def test_schedule_keeps_only_record_keys(db):
+    latest(Crawl(["acme"]))
+    state = db.schedules.find_one()
+    assert "result" not in state
+    assert state["records"] == [{"handle": "acme", "scoped": True}]
+    assert state["result_hash"]
+
+
+def test_restart_rebuilds_the_result_from_the_store(db):
+    crawl = Crawl(["acme", "globex"])
+    (items, version), _ = latest(crawl)
+
+    (restored, restored_version), _ = latest(crawl)
+    assert (restored, restored_version) == (items, version)
+    assert crawl.runs == 1
+
+
+def test_restart_crawls_again_when_the_store_changed(db):
+    crawl = Crawl(["acme", "globex"])
+    latest(crawl)
+
+    db.programs.update_one({"handle": "globex"}, {"$set": {"raw.name": "Globex Corp"}})
+    (items, _), _ = latest(crawl)
+    assert items == ["Acme", "Globex"]
+    assert crawl.runs == 2
+
+
+def test_restart_crawls_again_without_stored_scopes(db):
+    crawl = Crawl(["acme"])
+    latest(crawl)
+
+    db.programs.update_one({"handle": "acme"}, {"$unset": {"scopes_fetched_at": ""}})
+    latest(crawl)
+    assert crawl.runs == 2
@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from modules import hostindex, ratelimit, search
+
+
+def scope(asset, asset_type, in_scope=True):
+    return {"asset": asset, "type": asset_type, "in_scope": in_scope}
+
+
+def build():
+    source = hostindex.HostIndex()
+    source.add_programs("hackerone", "alice", [
+        {"handle": "acme", "name": "Acme", "private": False, "bounty": True, "max_bounty": 5000, "created_at": "2024-01-01T00:00:00Z"},
+        {"handle": "secret", "name": "Secret", "private": True, "bounty": True, "max_bounty": 200, "created_at": "2024-06-01T00:00:00Z"},
+    ])
+    source.add_scopes("hackerone", "acme", "alice", [scope("*.acme.com", "WILDCARD"), scope("10.0.0.0/8", "CIDR", in_scope=False)])
+    source.add_scopes("hackerone", "secret", "alice", [scope("secret.com", "URL")])
+    source.add_programs("intigriti", "bob", [{"handle": "globex", "name": "Globex", "private": False, "bounty": False}])
+    source.add_scopes("intigriti", "globex", "bob", [scope("*.globex.com", "Url")])
+    return source
+
+
+def handles(programs):
+    return [program.handle for program in programs]
+
+
+def test_filters_intersect():
+    index = search.ProgramIndex(build())
+    assert handles(index.search()) == ["acme", "globex"]
+    assert handles(index.search(kinds=["wildcard"])) == ["acme", "globex"]
+    assert handles(index.search(kinds=["wildcard"], bounty=True)) == ["acme"]
+    assert handles(index.search(platforms=["intigriti", "bugcrowd"])) == ["globex"]
+    # Out-of-scope assets do not make a program match their kind.
+    assert index.search(kinds=["network"]) == []
+
+
+def test_ranges_and_private_programs():
+    index = search.ProgramIndex(build())
+    assert handles(index.search({"alice"}, private=True)) == ["secret"]
+    assert handles(index.search({"alice"}, min_bounty=100, max_bounty=1000)) == ["secret"]
+    since = search._timestamp("2024-03-01")
+    assert handles(index.search({"alice"}, created_since=since)) == ["secret"]
+    # Private programs need a credential that listed them.
+    assert index.search(private=True) == []
+
+
+def test_index_catches_up_with_the_host_index():
+    source = build()
+    index = search.ProgramIndex(source)
+    before = index.result_hash(index.search())
+
+    source.add_scopes("intigriti", "globex", "bob", [scope("10.1.0.0/16", "IpRange")])
+    assert handles(index.search(kinds=["network"])) == ["globex"]
+    assert handles(index.search(kinds=["wildcard"])) == ["acme"]
+    assert index.result_hash(index.search()) != before
+
+
+@pytest.fixture
+def api(monkeypatch):
+    source = build()
+    source.add_programs("hackerone", ratelimit.token_key("carol", "t"), [{"handle": "secret", "private": True}])
+    monkeypatch.setattr(hostindex, "index", source)
+    monkeypatch.setattr(search, "index", search.ProgramIndex(source))
+    return TestClient(main.app)
+
+
+def test_search_endpoint(api):
+    body = api.get("/programs/search", params={"asset_type": "wildcard", "bounty": "true"}).json()
+    assert [program["Program Handle"] for program in body["Programs"]] == ["acme"]
+    assert body["Programs"][0]["In Scope"][0]["Kind"] == "wildcard"
+
+    owned = api.get("/programs/search", params={"private": "true", "username": "carol", "token": "t"}).json()
+    assert [program["Program Handle"] for program in owned["Programs"]] == ["secret"]
+
+
+def test_search_endpoint_rejects_unknown_values(api):
+    assert api.get("/programs/search", params={"platform": "hackerrank"}).status_code == 400
+    assert api.get("/programs/search", params={"created_since": "yesterday-ish"}).status_code == 400
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from modules import cache, singleflight, store
+
+
+def test_concurrent_calls_share_one_run():
+    runs = []
+
+    async def work(value):
+        runs.append(value)
+        await asyncio.sleep(0)
+        return value * 2
+
+    async def scenario():
+        group = singleflight.Group()
+        results = await asyncio.gather(group.do("a", work, 1), group.do("a", work, 1), group.do("b", work, 2))
+        return results, len(group)
+
+    results, in_flight = asyncio.run(scenario())
+    assert results == [2, 2, 4]
+    assert runs == [1, 2]
+    # Finished calls are forgotten, so a later call runs again.
+    assert in_flight == 0
+
+
+def test_exceptions_are_shared():
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    async def scenario():
+        group = singleflight.Group()
+        return await asyncio.gather(group.do("a", fail), group.do("a", fail), return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, ValueError) and first is second
+
+
+def test_a_caller_giving_up_does_not_cancel_the_others():
+    async def scenario():
+        group = singleflight.Group()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        impatient = asyncio.ensure_future(group.do("a", work))
+        patient = asyncio.ensure_future(group.do("a", work))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        release.set()
+        return await patient
+
+    assert asyncio.run(scenario()) == "done"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # A gated scope fetch counting its calls, with the shared caches reset.
+    monkeypatch.setattr(cache, "public_scopes", cache.TTLCache(cache.MAX_ENTRIES, cache.SCOPE_TTL))
+    monkeypatch.setattr(singleflight, "scope_fetches", singleflight.Group())
+    store.configure(None)
+    state = {"calls": 0}
+
+    async def fetch():
+        state["calls"] += 1
+        await asyncio.sleep(0.01)
+        return ["a.acme.com"], None
+
+    state["fetch"] = fetch
+    return state
+
+
+def lookups(upstream, *calls):
+    async def scenario():
+        return await asyncio.gather(*[
+            store.snapshot_scopes(platform, "acme", credential, public, upstream["fetch"], **options)
+            for platform, credential, public, options in calls
+        ])
+    return asyncio.run(scenario())
+
+
+def test_same_credential_shares_a_scope_fetch(upstream):
+    results = lookups(upstream, ("hackerone", "alice", False, {}), ("hackerone", "alice", False, {}))
+    assert results == [["a.acme.com"]] * 2
+    assert upstream["calls"] == 1
+
+
+def test_private_scopes_are_fetched_per_credential(upstream):
+    lookups(upstream, ("hackerone", "alice", False, {}), ("hackerone", "bob", False, {}))
+    assert upstream["calls"] == 2
+
+
+def test_public_scopes_are_fetched_once(upstream):
+    lookups(upstream, ("intigriti", "alice", True, {"key": "id-1"}), ("intigriti", "bob", True, {"key": "id-1"}))
+    assert upstream["calls"] == 1
+
+
+def test_refresh_does_not_join_a_cached_lookup(upstream):
+    lookups(upstream, ("hackerone", "alice", True, {}), ("hackerone", "alice", True, {"refresh": True}))
+    assert upstream["calls"] == 2
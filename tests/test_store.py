@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from modules import cache, changes, hostindex, store
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # A fresh in-memory store, host index, change detector and public scope
+    # cache per test.
+    monkeypatch.setattr(cache, "public_scopes", cache.TTLCache(cache.MAX_ENTRIES, cache.SCOPE_TTL))
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    monkeypatch.setattr(changes, "detector", changes.ChangeDetector())
+    database = store.configure("mongomock://", "phoenixscope_test")
+    yield database
+    database.client.drop_database("phoenixscope_test")
+    store.configure(None)
+
+
+def scope(asset, in_scope=True):
+    return {"asset": asset, "type": "URL", "in_scope": in_scope, "raw": {"asset": asset}}
+
+
+def test_scopes_round_trip(db):
+    program = {"handle": "acme", "name": "Acme", "private": True}
+    asyncio.run(store.save_programs("hackerone", "alice", [program]))
+    asyncio.run(store.save_scopes("hackerone", "acme", "alice", {}, [scope("a.acme.com"), scope("b.acme.com", False)]))
+
+    document, raw = asyncio.run(store.load_scopes("hackerone", "acme", "alice"))
+    assert document["name"] == "Acme"
+    assert document["owners"] == ["alice"]
+    assert raw == [{"asset": "a.acme.com"}, {"asset": "b.acme.com"}]
+
+    # Private programs are only served to a credential that stored them.
+    assert asyncio.run(store.load_scopes("hackerone", "acme", "bob")) is None
+    assert asyncio.run(store.load_scopes("hackerone", "acme", "bob", public=True)) is None
+
+
+def test_save_scopes_drops_removed_assets(db):
+    asyncio.run(store.save_scopes("intigriti", "acme", "alice", {}, [scope("a.acme.com"), scope("b.acme.com")]))
+    asyncio.run(store.save_scopes("intigriti", "acme", "alice", {}, [scope("b.acme.com")]))
+
+    _, raw = asyncio.run(store.load_scopes("intigriti", "acme", "alice"))
+    assert raw == [{"asset": "b.acme.com"}]
+
+
+def test_stale_scopes_are_not_served(db):
+    asyncio.run(store.save_scopes("yeswehack", "acme", "alice", {}, [scope("a.acme.com")]))
+    assert asyncio.run(store.load_scopes("yeswehack", "acme", "alice", max_age=-1)) is None
+
+
+def test_public_scopes_are_shared(db):
+    asyncio.run(store.save_scopes("bugcrowd", "acme", "alice", {"private": False}, [scope("a.acme.com")]))
+    _, raw = asyncio.run(store.load_scopes("bugcrowd", "acme", "bob", public=True))
+    assert raw == [{"asset": "a.acme.com"}]
+
+
+def test_snapshot_and_schedule_round_trip(db):
+    asyncio.run(store.save_snapshot("hackerone", "acme", {"hash": "00", "items": []}))
+    snapshot = asyncio.run(store.load_snapshot("hackerone", "acme"))
+    assert snapshot.pop("taken_at")
+    assert snapshot == {"platform": "hackerone", "handle": "acme", "hash": "00", "items": []}
+
+    asyncio.run(store.save_schedule("job", {"records": [{"handle": "acme"}], "result": [1, 2], "completed_at": 1.0}))
+    asyncio.run(store.save_schedule("job", {"records": [{"handle": "acme"}], "result_hash": "00", "completed_at": 2.0}))
+    # A saved schedule replaces the previous one entirely.
+    assert asyncio.run(store.load_schedule("job")) == {"_id": "job", "records": [{"handle": "acme"}], "result_hash": "00", "completed_at": 2.0}
+
+
+def test_disabled_store_is_a_no_op(db):
+    store.configure(None)
+    asyncio.run(store.save_scopes("hackerone", "acme", "alice", {}, [scope("a.acme.com")]))
+    assert asyncio.run(store.load_scopes("hackerone", "acme", "alice")) is None
+
+
+def test_load_index_rebuilds_host_index(db):
+    asyncio.run(store.save_programs("hackerone", "alice", [{"handle": "acme", "name": "Acme", "private": False}]))
+    asyncio.run(store.save_scopes("hackerone", "acme", "alice", {}, [{**scope("*.acme.com"), "type": "WILDCARD"}]))
+
+    index = hostindex.HostIndex()
+    index.load(*asyncio.run(store.load_index()))
+    assert [match["Program Handle"] for match in index.lookup("api.acme.com")] == ["acme"]
+
+
+class Upstream:
+    # A fetch callable for store.snapshot_scopes that counts its calls.
+    def __init__(self, items, fresh=True):
+        self.items = items
+        self.fresh = fresh
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.items is None:
+            return None, None
+        normalized = [scope(asset) for asset in self.items]
+        return list(self.items), ("acme", {}, normalized) if self.fresh else None
+
+
+def test_snapshot_scopes_fetches_then_serves_the_store(db):
+    upstream = Upstream(["a.acme.com"])
+    first = asyncio.run(store.snapshot_scopes("hackerone", "acme", "alice", False, upstream))
+    second = asyncio.run(store.snapshot_scopes("hackerone", "acme", "alice", False, upstream))
+
+    assert first == ["a.acme.com"]
+    assert second == [{"asset": "a.acme.com"}]
+    assert upstream.calls == 1
+    # The fresh scope was indexed and snapshotted for change detection.
+    assert hostindex.index.lookup("a.acme.com", {"alice"})
+    assert changes.detector.latest[("hackerone", "acme")]["Added"] == [{"Asset": "a.acme.com", "Type": "URL"}]
+
+
+def test_snapshot_scopes_rebuilds_stored_scopes(db):
+    asyncio.run(store.snapshot_scopes("yeswehack", "acme", "alice", False, Upstream(["a.acme.com"])))
+    rebuilt = asyncio.run(store.snapshot_scopes(
+        "yeswehack", "acme", "alice", False, Upstream(["b.acme.com"]),
+        from_stored=lambda program, raw: {"handle": program["handle"], "scopes": raw},
+    ))
+    assert rebuilt == {"handle": "acme", "scopes": [{"asset": "a.acme.com"}]}
+
+
+def test_snapshot_scopes_shares_public_scopes(db):
+    upstream = Upstream(["a.acme.com"], fresh=False)
+    asyncio.run(store.snapshot_scopes("intigriti", "acme", "alice", True, upstream, key="id-1"))
+    shared = asyncio.run(store.snapshot_scopes("intigriti", "acme", "bob", True, upstream, key="id-1"))
+
+    assert shared == ["a.acme.com"]
+    assert upstream.calls == 1
+    # Scopes served from the response cache are not written back.
+    assert asyncio.run(store.load_scopes("intigriti", "acme", "alice")) is None
+
+
+def test_snapshot_scopes_refresh_skips_cache_and_store(db):
+    upstream = Upstream(["a.acme.com"])
+    asyncio.run(store.snapshot_scopes("hackerone", "acme", "alice", True, upstream))
+    asyncio.run(store.snapshot_scopes("hackerone", "acme", "alice", True, upstream, refresh=True))
+    assert upstream.calls == 2
+
+
+def test_snapshot_scopes_failed_fetch(db):
+    assert asyncio.run(store.snapshot_scopes("bugcrowd", "acme", "alice", True, Upstream(None))) is None
+    assert cache.public_scopes.get(("bugcrowd", "acme")) is None
@@ -0,0 +1,78 @@
+import json
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_parameter_gives_one_program_per_line(api):
+    response = api.get("/bugcrowd/programs", params={"stream": 1})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [item["Program Handle"] for item in ndjson(response)] == ["acme", "globex", "initech"]
+
+
+def test_accept_header_selects_ndjson(api):
+    response = api.get("/bugcrowd/programs", headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(ndjson(response)) == 3
+
+
+def test_streamed_programs_are_projected(api):
+    response = api.get("/bugcrowd/programs", params={"stream": 1, "fields": "Program Handle,Max Bounty"})
+    assert ndjson(response)[0] == {"Program Handle": "acme", "Max Bounty": 4}
+
+
+def test_stream_and_json_share_one_crawl(api, crawl):
+    streamed = ndjson(api.get("/bugcrowd/programs", params={"stream": 1}))
+    listed = api.get("/bugcrowd/programs").json()["Programs"]
+    assert streamed == listed
+    assert crawl.runs == 1
+
+
+def events(response):
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def test_first_crawl_streams_progress_then_programs(api):
+    response = api.get("/bugcrowd/programs", headers={"Accept": "text/event-stream"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    received = events(response)
+    kinds = [kind for kind, _ in received]
+    assert kinds.count("program") == 3
+    assert "progress" in kinds
+    assert kinds[-1] == "done"
+    assert received[-1][1]["items"] == 3
+
+    progress = [payload for kind, payload in received if kind == "progress"]
+    assert progress[-1]["programs"] == 3
+    assert progress[-1]["matched"] <= 3
+
+
+def test_completed_crawl_streams_programs_only(api):
+    api.get("/bugcrowd/programs")
+    received = events(api.get("/bugcrowd/programs", headers={"Accept": "text/event-stream"}, params={"fields": "Program Name"}))
+    assert received[:3] == [("program", {"Program Name": name}) for name in ("Acme", "Globex", "Initech")]
+    assert received[3][0] == "done"
+
+
+def test_failed_crawl_ends_with_an_error_event(api, crawl):
+    crawl.error = RuntimeError("upstream went away")
+    received = events(api.get("/bugcrowd/programs", headers={"Accept": "text/event-stream"}))
+    assert received[-1] == ("error", {"error": "upstream went away"})
+    assert not any(kind == "program" for kind, _ in received)
+
+
+def test_streams_stop_at_the_limit(api):
+    assert len(ndjson(api.get("/bugcrowd/programs", params={"stream": 1, "limit": 2}))) == 2
+
+    received = events(api.get("/bugcrowd/programs", headers={"Accept": "text/event-stream"}, params={"limit": 1}))
+    assert [kind for kind, _ in received].count("program") == 1
+    # The end of the crawl still counts every program.
+    assert received[-1] == ("done", {"items": 3, "completed_at": received[-1][1]["completed_at"]})
+
+    assert api.get("/bugcrowd/programs", params={"stream": 1, "limit": 0}).status_code == 400
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+
+from modules import cache, changes, hackerone, hostindex, ratelimit, store, sync
+
+LISTING = "https://api.hackerone.com/v1/hackers/programs?page[size]=100&page[number]={}"
+
+
+def listed(handle, bounty=True):
+    return {"attributes": {
+        "handle": handle, "name": handle, "state": "public_mode",
+        "offers_bounties": bounty, "started_accepting_at": None,
+    }}
+
+
+def structured_scope(scope_id, updated_at):
+    return {"id": scope_id, "attributes": {
+        "asset_identifier": f"{scope_id}.example.com", "asset_type": "URL",
+        "eligible_for_submission": True, "updated_at": updated_at,
+    }}
+
+
+def test_listing_reports_added_removed_and_stale():
+    state = sync.SyncState()
+    added, removed, stale = state.update_listing({"a": listed("a"), "b": listed("b")})
+    assert (added, removed, len(stale)) == (["a", "b"], [], 2)
+    for handle in ("a", "b"):
+        state.update_scopes(handle, [])
+
+    added, removed, stale = state.update_listing({"a": listed("a", bounty=False), "c": listed("c")})
+    assert added == ["c"]
+    assert removed == ["b"]
+    assert [program["attributes"]["handle"] for program in stale] == ["a", "c"]
+    assert "b" not in state.fingerprints
+
+
+def test_unchanged_programs_are_not_refetched():
+    state = sync.SyncState()
+    state.update_listing({"a": listed("a")})
+    state.update_scopes("a", [])
+    assert state.update_listing({"a": listed("a")})[2] == []
+
+
+def test_old_scopes_are_refetched():
+    state = sync.SyncState()
+    state.update_listing({"a": listed("a")})
+    state.update_scopes("a", [])
+    state.synced_at["a"] -= sync.FULL_REFRESH_INTERVAL
+    assert len(state.update_listing({"a": listed("a")})[2]) == 1
+
+
+def test_failed_refetch_is_retried():
+    state = sync.SyncState()
+    state.update_listing({"a": listed("a")})
+    state.update_scopes("a", [])
+
+    # The listing changed but the scope re-fetch failed: the next run must
+    # still see the program as stale.
+    assert len(state.update_listing({"a": listed("a", bounty=False)})[2]) == 1
+    assert len(state.update_listing({"a": listed("a", bounty=False)})[2]) == 1
+    state.update_scopes("a", [])
+    assert state.update_listing({"a": listed("a", bounty=False)})[2] == []
+
+
+def test_scopes_past_the_watermark_are_updated():
+    state = sync.SyncState()
+    state.update_listing({"a": listed("a")})
+    first = [structured_scope("x", "2025-01-01T00:00:00Z"), structured_scope("y", None)]
+    assert len(state.update_scopes("a", first)) == 2
+
+    second = [structured_scope("x", "2025-02-01T00:00:00Z"), structured_scope("y", None), structured_scope("z", None)]
+    assert [scope["id"] for scope in state.update_scopes("a", second)] == ["x", "z"]
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    monkeypatch.setattr(sync, "_states", {})
+    monkeypatch.setattr(cache, "public_scopes", cache.TTLCache(cache.MAX_ENTRIES, cache.SCOPE_TTL))
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    monkeypatch.setattr(changes, "detector", changes.ChangeDetector())
+    monkeypatch.setattr(ratelimit, "DEFAULT_LIMIT", {"rate": 10000, "burst": 10000})
+    monkeypatch.setattr(ratelimit, "PLATFORM_LIMITS", {})
+    store.configure(None)
+
+
+def test_sync_sees_every_listed_program(session, fresh):
+    programs = [listed(f"p{number}") for number in range(150)]
+    for page in range(hackerone.LISTING_BATCH):
+        data = programs[page * 100:(page + 1) * 100]
+        session.replies[LISTING.format(page)] = (200, json.dumps({"data": data}), {})
+    for program in programs:
+        handle = program["attributes"]["handle"]
+        session.replies[hackerone.scope_page_url(handle, 1)] = (200, json.dumps({"data": [structured_scope(handle, None)]}), {})
+
+    result = asyncio.run(hackerone.hackerone_sync("alice", "token"))
+    assert result["Programs"] == 150
+    assert len(result["Programs Refetched"]) == 150
+    assert len(result["Updated Scopes"]) == 150
+
+    session.calls.clear()
+    result = asyncio.run(hackerone.hackerone_sync("alice", "token"))
+    assert result["Programs Refetched"] == []
+    # The listing itself is never served from the cache.
+    assert LISTING.format(0) in session.calls
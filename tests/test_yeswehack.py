@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import pytest
+
+from modules import cache, changes, hostindex, store, yeswehack
+
+
+def listed(slug, public=True):
+    return {"slug": slug, "title": slug.title(), "public": public, "bounty": False}
+
+
+def detail(slug):
+    return {"title": slug.title(), "scopes": [{"scope": f"{slug}.example.com", "scope_type": "web-application"}]}
+
+
+@pytest.fixture
+def upstream(session, monkeypatch):
+    # A one-page listing of a public and a private program, served to every
+    # credential, with a fresh public scope cache and no store.
+    monkeypatch.setattr(cache, "public_scopes", cache.TTLCache(cache.MAX_ENTRIES, cache.SCOPE_TTL))
+    monkeypatch.setattr(hostindex, "index", hostindex.HostIndex())
+    monkeypatch.setattr(changes, "detector", changes.ChangeDetector())
+    store.configure(None)
+    listing = json.dumps({"items": [listed("acme"), listed("secret", public=False)], "pagination": {"nb_pages": 1}})
+    session.replies[f"{yeswehack.YESWEHACK_PROGRAMS_ENDPOINT}?page=1"] = (200, listing, {})
+    for slug in ("acme", "secret"):
+        session.replies[yeswehack.YESWEHACK_PROGRAM_BASE_ENDPOINT + slug] = (200, json.dumps(detail(slug)), {})
+    return session
+
+
+def crawl(token):
+    async def run():
+        return [raw async for raw in yeswehack.iter_raw(token)]
+    return asyncio.run(run())
+
+
+def test_public_details_are_fetched_once_for_every_token(upstream):
+    first = crawl("alice")
+    second = crawl("bob")
+
+    assert [raw["detail"]["scopes"] for raw in first] == [raw["detail"]["scopes"] for raw in second]
+    details = [url.rsplit("/", 1)[1] for url in upstream.calls if "?" not in url]
+    # Only the private program is fetched again with the second token.
+    assert sorted(details) == ["acme", "secret", "secret"]
+
+
+def test_public_details_are_indexed_once_fetched(upstream):
+    crawl("alice")
+    assert [match["Program Handle"] for match in hostindex.index.lookup("acme.example.com")] == ["acme"]
+
+
+def test_listing_pages_are_read_in_order(upstream):
+    base = yeswehack.YESWEHACK_PROGRAMS_ENDPOINT
+    upstream.replies[f"{base}?page=1"] = (200, json.dumps({"items": [listed("acme")], "pagination": {"nb_pages": 3}}), {})
+    upstream.replies[f"{base}?page=2"] = (200, json.dumps({"items": [listed("secret", public=False)], "pagination": {"nb_pages": 3}}), {})
+    upstream.replies[f"{base}?page=3"] = (200, json.dumps({"items": [listed("globex")], "pagination": {"nb_pages": 3}}), {})
+    upstream.replies[yeswehack.YESWEHACK_PROGRAM_BASE_ENDPOINT + "globex"] = (200, json.dumps(detail("globex")), {})
+
+    assert [raw["program"]["slug"] for raw in crawl("alice")] == ["acme", "secret", "globex"]